@@ -195,6 +195,13 @@ async def run_analysis(
 
         logger.info(f"[Batch {batch_num}] Complete: {analyzed} analyzed, {failed + errors} failed, {missing} missing")
         logger.info(f"Cumulative totals: {total_analyzed} analyzed, {total_failed} failed, {total_missing} missing")
+        if settings.analysis_cache_enabled:
+            from src.analyzer import get_analysis_cache
+            cache_stats = get_analysis_cache().get_stats()
+            logger.info(
+                f"Analysis cache: {cache_stats['hits']} hits ({cache_stats['hit_rate']:.0%}), "
+                f"${cache_stats['dollars_saved']:.2f} saved"
+            )
 
         # If not looping, break after first batch
         if not loop_until_done:
@@ -204,6 +211,10 @@ async def run_analysis(
         logger.info("Starting next batch in 5 seconds...")
         await asyncio.sleep(5)
 
+    # Uploads are kept around for reuse during the run; delete them now
+    from src.analyzer.uploads import get_upload_manager
+    await get_upload_manager().flush()
+
     # Final summary
     logger.info("=" * 60)
     logger.info("All analysis complete!")
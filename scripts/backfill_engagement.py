@@ -1,11 +1,16 @@
 """
-Backfill engagement metrics for existing posts using yt-dlp.
+Refresh engagement metrics for existing posts using yt-dlp metadata.
 
-Fetches view_count, like_count, comment_count, repost_count from TikTok
-without downloading videos.
+Fetches view_count, like_count, comment_count, repost_count and the posting
+date without downloading videos. Requests run concurrently through warm
+yt-dlp workers with a per-host rate limit, and results are written back in
+bulk, so the whole table can be refreshed on an hourly schedule. Each write
+also appends a post_metrics snapshot, which feeds the velocity index.
 
 Usage:
-    python scripts/backfill_engagement.py [--limit 50] [--delay 2]
+    python scripts/backfill_engagement.py [--limit 50]              # posts with no engagement yet
+    python scripts/backfill_engagement.py --missing-date            # posts missing posted_at
+    python scripts/backfill_engagement.py --all --stale-hours 1     # hourly refresh, stalest first
 """
 
 import asyncio
@@ -17,87 +22,64 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from supabase import create_client
 from config.settings import settings
+from src.downloader import VideoDownloader
+from src.storage import SupabaseStorage
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-def fetch_engagement(url: str) -> dict | None:
-    """Fetch engagement metrics and posting date using yt-dlp without downloading."""
-    try:
-        import yt_dlp
-        from datetime import datetime
-
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-
-            if info:
-                result = {
-                    'views': info.get('view_count', 0) or 0,
-                    'likes': info.get('like_count', 0) or 0,
-                    'comments': info.get('comment_count', 0) or 0,
-                    'shares': info.get('repost_count', 0) or 0,
-                }
-                # Extract upload timestamp for time-weighted metrics
-                if info.get('timestamp'):
-                    result['posted_at'] = datetime.utcfromtimestamp(info['timestamp']).isoformat()
-                return result
-    except Exception as e:
-        logger.warning(f"Failed to fetch {url}: {e}")
-
-    return None
-
-
-async def backfill(limit: int = 50, delay: float = 2.0, missing_date_only: bool = False):
-    """Backfill engagement for posts missing data."""
-
-    client = create_client(settings.supabase_url, settings.supabase_key)
-
-    # Get posts missing posted_at (primary) or engagement data
-    if missing_date_only:
-        result = client.table("posts").select(
-            "id, video_url, views, likes, comments, shares, posted_at"
-        ).is_("posted_at", "null").limit(limit).execute()
-    else:
-        result = client.table("posts").select(
-            "id, video_url, views, likes, comments, shares, posted_at"
-        ).eq("views", 0).eq("comments", 0).limit(limit).execute()
-
-    posts = result.data
-    logger.info(f"Found {len(posts)} posts to backfill")
-
+async def backfill(
+    limit: int | None = 50,
+    missing_date_only: bool = False,
+    refresh_all: bool = False,
+    stale_hours: float | None = None,
+    concurrency: int | None = None,
+    host_rpm: int | None = None,
+    write_batch_size: int = 200,
+):
+    """Refresh engagement for the selected posts and write it back in batches."""
+    storage = SupabaseStorage()
+
+    posts = storage.get_posts_for_engagement_refresh(
+        limit=limit,
+        stale_hours=stale_hours,
+        missing_date_only=missing_date_only,
+        missing_engagement_only=not (refresh_all or missing_date_only),
+    )
+    logger.info(f"Found {len(posts)} posts to refresh")
+
+    ids_by_url: dict[str, list[str]] = {}
+    for post in posts:
+        ids_by_url.setdefault(post['video_url'], []).append(post['id'])
+
+    downloader = VideoDownloader()
+    pending: list[dict] = []
     updated = 0
     failed = 0
-
-    for i, post in enumerate(posts):
-        logger.info(f"[{i+1}/{len(posts)}] Fetching: {post['video_url'][:60]}...")
-
-        engagement = fetch_engagement(post['video_url'])
-
-        if engagement and (engagement['views'] > 0 or engagement['comments'] > 0 or engagement.get('posted_at')):
-            try:
-                client.table("posts").update(engagement).eq("id", post['id']).execute()
-                posted = engagement.get('posted_at', 'N/A')[:10] if engagement.get('posted_at') else 'N/A'
-                logger.info(f"  Updated: {engagement['views']:,} views, {engagement['likes']:,} likes, posted: {posted}")
-                updated += 1
-            except Exception as e:
-                logger.error(f"  Failed to update: {e}")
-                failed += 1
+    done = 0
+
+    async for result in downloader.fetch_metadata_batch(
+        ids_by_url,
+        max_concurrent=concurrency,
+        requests_per_minute_per_host=host_rpm,
+    ):
+        done += 1
+        if result.success and (result.views > 0 or result.comments > 0 or result.posted_at):
+            engagement = result.engagement()
+            pending.extend({"id": post_id, **engagement} for post_id in ids_by_url[result.video_url])
         else:
-            logger.warning(f"  No engagement data (may be blocked)")
+            logger.warning(f"  No engagement data for {result.video_url[:60]} (may be blocked): {result.error}")
             failed += 1
 
-        # Rate limit
-        if i < len(posts) - 1:
-            await asyncio.sleep(delay)
+        if len(pending) >= write_batch_size:
+            updated += storage.update_post_engagement_bulk(pending)
+            pending = []
+            logger.info(f"[{done}/{len(ids_by_url)}] {updated} updated, {failed} failed")
+
+    if pending:
+        updated += storage.update_post_engagement_bulk(pending)
 
     logger.info(f"\nBackfill complete: {updated} updated, {failed} failed")
     return updated, failed
@@ -105,12 +87,22 @@ async def backfill(limit: int = 50, delay: float = 2.0, missing_date_only: bool
 
 def main():
     parser = argparse.ArgumentParser(description='Backfill engagement metrics')
-    parser.add_argument('--limit', type=int, default=50, help='Max posts to process')
-    parser.add_argument('--delay', type=float, default=2.0, help='Delay between requests (seconds)')
+    parser.add_argument('--limit', type=int, default=50, help='Max posts to process (0 = no limit)')
     parser.add_argument('--missing-date', action='store_true', help='Only backfill posts missing posted_at')
+    parser.add_argument('--all', action='store_true', help='Refresh all posts, not just ones without engagement')
+    parser.add_argument('--stale-hours', type=float, help='Only posts not refreshed within this many hours')
+    parser.add_argument('--concurrency', type=int, default=settings.metadata_max_concurrent, help='Requests in flight')
+    parser.add_argument('--host-rpm', type=int, default=settings.metadata_host_rpm, help='Requests per minute per host')
     args = parser.parse_args()
 
-    asyncio.run(backfill(limit=args.limit, delay=args.delay, missing_date_only=args.missing_date))
+    asyncio.run(backfill(
+        limit=args.limit or None,
+        missing_date_only=args.missing_date,
+        refresh_all=args.all,
+        stale_hours=args.stale_hours,
+        concurrency=args.concurrency,
+        host_rpm=args.host_rpm,
+    ))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+"""
+Measure what the analysis format policy and transcode save per video.
+
+Downloads each URL twice - once as "archive" (best mp4) and once as
+"analysis" (height-capped format plus ffmpeg downscale) - into separate temp
+directories, then reports sizes, bytes saved and download/transcode time.
+With --analyze, both copies are also analyzed with Gemini to show the effect
+on end-to-end pipeline time.
+
+Usage:
+    python scripts/benchmark_analysis_format.py URL [URL ...]
+    python scripts/benchmark_analysis_format.py --file urls.txt --analyze
+"""
+
+import asyncio
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from src.downloader import VideoDownloader
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def run_purpose(purpose: str, urls: list[str], analyze: bool, concurrency: int) -> dict:
+    """Download (and optionally analyze) every URL for one purpose and time it."""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{purpose}_") as tmp:
+        downloader = VideoDownloader(output_dir=Path(tmp))
+
+        started = time.perf_counter()
+        results = await downloader.download_batch(urls, max_concurrent=concurrency, purpose=purpose)
+        download_seconds = time.perf_counter() - started
+
+        analysis_seconds = 0.0
+        if analyze:
+            from src.analyzer import GeminiAnalyzer
+
+            analyzer = GeminiAnalyzer(api_key=settings.gemini_api_key)
+            paths = [r.file_path for r in results if r.success and r.file_path]
+            started = time.perf_counter()
+            await analyzer.analyze_batch(paths, max_concurrent=settings.max_concurrent_analyses)
+            analysis_seconds = time.perf_counter() - started
+            await analyzer.uploads.flush()
+
+    return {
+        "purpose": purpose,
+        "results": results,
+        "download_seconds": download_seconds,
+        "analysis_seconds": analysis_seconds,
+    }
+
+
+async def benchmark(urls: list[str], analyze: bool, concurrency: int) -> None:
+    archive = await run_purpose("archive", urls, analyze, concurrency)
+    analysis = await run_purpose("analysis", urls, analyze, concurrency)
+
+    print(f"\n{'video':<50} {'archive MB':>11} {'analysis MB':>12} {'saved %':>8} {'transcode s':>12}")
+    for url, full, reduced in zip(urls, archive["results"], analysis["results"]):
+        if not (full.success and reduced.success):
+            print(f"{url[:50]:<50} {'failed':>11}")
+            continue
+        saved = 1 - reduced.file_size_bytes / full.file_size_bytes if full.file_size_bytes else 0.0
+        print(
+            f"{url[:50]:<50} {full.file_size_bytes / 1024 / 1024:>11.1f} "
+            f"{reduced.file_size_bytes / 1024 / 1024:>12.1f} {saved * 100:>7.0f}% "
+            f"{reduced.transcode_seconds:>12.1f}"
+        )
+
+    full_bytes = sum(r.file_size_bytes for r in archive["results"] if r.success)
+    reduced_bytes = sum(r.file_size_bytes for r in analysis["results"] if r.success)
+    print(f"\nTotal: {full_bytes / 1024 / 1024:.1f}MB -> {reduced_bytes / 1024 / 1024:.1f}MB")
+    for run in (archive, analysis):
+        total = run["download_seconds"] + run["analysis_seconds"]
+        print(
+            f"{run['purpose']:<9} download {run['download_seconds']:.1f}s"
+            + (f", analysis {run['analysis_seconds']:.1f}s, total {total:.1f}s" if analyze else "")
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure analysis format/transcode savings')
+    parser.add_argument('urls', nargs='*', help='Video URLs')
+    parser.add_argument('--file', type=Path, help='File with one URL per line')
+    parser.add_argument('--analyze', action='store_true', help='Also time Gemini analysis of both copies')
+    parser.add_argument('--concurrency', type=int, default=3, help='Downloads in flight')
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.file:
+        urls += [line.strip() for line in args.file.read_text().splitlines() if line.strip()]
+    if not urls:
+        parser.error("no URLs given")
+
+    asyncio.run(benchmark(urls, args.analyze, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark download throughput: in-process yt-dlp worker pool vs one CLI process per video.
+
+Downloads the same URLs with each engine into separate temp directories and
+reports videos per minute and success counts.
+
+Usage:
+    python scripts/benchmark_download.py URL [URL ...] [--concurrency 3]
+    python scripts/benchmark_download.py --file urls.txt --engines pool cli
+"""
+
+import asyncio
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.downloader import VideoDownloader
+from src.downloader.ytdlp_pool import get_ytdlp_pool
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def run_engine(engine: str, urls: list[str], concurrency: int) -> dict:
+    """Download every URL with one engine and time it."""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{engine}_") as tmp:
+        downloader = VideoDownloader(output_dir=Path(tmp), engine=engine)
+
+        if engine == "pool":
+            # Start the workers before timing, as a long-running server would have
+            await get_ytdlp_pool().warm_up()
+
+        started = time.perf_counter()
+        results = await downloader.download_batch(urls, platform="bench", max_concurrent=concurrency)
+        elapsed = time.perf_counter() - started
+
+    succeeded = sum(1 for r in results if r.success)
+    return {
+        "engine": engine,
+        "videos": len(urls),
+        "succeeded": succeeded,
+        "seconds": elapsed,
+        "videos_per_minute": succeeded / elapsed * 60 if elapsed else 0.0,
+    }
+
+
+async def benchmark(urls: list[str], engines: list[str], concurrency: int) -> list[dict]:
+    rows = []
+    for engine in engines:
+        print(f"Running {engine} engine on {len(urls)} URLs (concurrency {concurrency})...")
+        rows.append(await run_engine(engine, urls, concurrency))
+
+    print(f"\n{'engine':<8} {'ok':>6} {'seconds':>9} {'videos/min':>11}")
+    for row in rows:
+        print(
+            f"{row['engine']:<8} {row['succeeded']:>3}/{row['videos']:<2} "
+            f"{row['seconds']:>9.1f} {row['videos_per_minute']:>11.2f}"
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark yt-dlp download engines')
+    parser.add_argument('urls', nargs='*', help='Video URLs to download')
+    parser.add_argument('--file', type=Path, help='File with one URL per line')
+    parser.add_argument('--engines', nargs='+', default=['pool', 'cli'], choices=['pool', 'cli'])
+    parser.add_argument('--concurrency', type=int, default=3, help='Downloads in flight / worker processes')
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.file:
+        urls += [line.strip() for line in args.file.read_text().splitlines() if line.strip()]
+    if not urls:
+        parser.error("no URLs given")
+
+    get_ytdlp_pool(max_workers=args.concurrency)
+    asyncio.run(benchmark(urls, args.engines, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
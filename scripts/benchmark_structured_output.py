@@ -0,0 +1,97 @@
+"""
+Measure the JSON parse-failure rate with and without schema-constrained output.
+
+Analyzes the same local videos twice: once free-form (the prompt alone,
+fenced JSON parsed by hand) and once with the response schema generated from
+VideoAnalysis (settings.gemini_structured_output). Reports per mode the
+responses, parse failures, failure rate, successful analyses, output tokens
+and wall time. The analysis cache is bypassed and parse regenerations are
+disabled, so every video costs exactly one request per mode.
+
+Usage:
+    python scripts/benchmark_structured_output.py VIDEO [VIDEO ...]
+    python scripts/benchmark_structured_output.py --dir data/videos --limit 50 --niche-mode data_engineering
+"""
+
+import asyncio
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from src.analyzer import GeminiAnalyzer, RetryPolicy, get_parse_stats
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def run_mode(structured: bool, paths: list[Path], niche_mode: str, concurrency: int) -> dict:
+    """Analyze every video once with structured output on or off and collect the counts."""
+    stats = get_parse_stats()
+    stats.reset()
+    analyzer = GeminiAnalyzer(
+        niche_mode=niche_mode,
+        retry_policy=RetryPolicy(parse_retries=0),
+        structured_output=structured,
+    )
+    started = time.perf_counter()
+    results = await analyzer.analyze_batch(paths, max_concurrent=concurrency)
+    seconds = time.perf_counter() - started
+    await analyzer.uploads.flush()
+
+    counts = stats.get_stats()["structured" if structured else "freeform"]
+    return {
+        "mode": "structured" if structured else "free-form",
+        **counts,
+        "analyzed": sum(1 for r in results if r.success),
+        "output_tokens": sum(r.usage.get("output_tokens", 0) for r in results),
+        "seconds": seconds,
+    }
+
+
+async def benchmark(paths: list[Path], niche_mode: str, concurrency: int) -> None:
+    # Both modes must actually call Gemini
+    settings.analysis_cache_enabled = False
+    runs = [
+        await run_mode(False, paths, niche_mode, concurrency),
+        await run_mode(True, paths, niche_mode, concurrency),
+    ]
+
+    print(f"\n{len(paths)} videos, niche mode {niche_mode}, model {settings.gemini_model}")
+    print(f"{'mode':<11} {'responses':>10} {'parse fail':>11} {'rate':>7} {'analyzed':>9} {'out tokens':>11} {'time s':>8}")
+    for run in runs:
+        rate = f"{run['failure_rate'] * 100:.1f}%" if run["failure_rate"] is not None else "-"
+        print(
+            f"{run['mode']:<11} {run['responses']:>10} {run['parse_failures']:>11} {rate:>7} "
+            f"{run['analyzed']:>9} {run['output_tokens']:>11} {run['seconds']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare parse failures of free-form vs schema-constrained analysis')
+    parser.add_argument('videos', nargs='*', type=Path, help='Local video files')
+    parser.add_argument('--dir', type=Path, help='Directory of .mp4 files to sample')
+    parser.add_argument('--limit', type=int, default=20, help='Most videos to analyze')
+    parser.add_argument('--niche-mode', default=settings.niche_mode,
+                        choices=['entertainment', 'data_engineering', 'both'], help='Prompt and schema to use')
+    parser.add_argument('--concurrency', type=int, default=settings.max_concurrent_analyses,
+                        help='Analyses in flight')
+    args = parser.parse_args()
+
+    paths = list(args.videos)
+    if args.dir:
+        paths += sorted(args.dir.glob('*.mp4'))
+    paths = [p for p in paths if p.exists()][:args.limit]
+    if not paths:
+        parser.error("no videos given")
+
+    asyncio.run(benchmark(paths, args.niche_mode, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Run the velocity-prioritized engagement refresh scheduler.
+
+Keeps every post in a priority queue keyed by expected change (post age and
+recent views/hour), refreshes due posts through metadata-only yt-dlp fetches
+within a global request budget, and logs throughput and staleness
+percentiles. Replaces running backfill_engagement.py on a fixed schedule.
+
+Usage:
+    python scripts/refresh_scheduler.py                        # run until interrupted
+    python scripts/refresh_scheduler.py --budget 1200 --report-minutes 1
+    python scripts/refresh_scheduler.py --minutes 60           # run for an hour, then print stats
+"""
+
+import asyncio
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from src.batch import EngagementRefreshScheduler
+from src.storage import SupabaseStorage
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def run(budget: int, target_views: int, minutes: float | None, report_minutes: float) -> dict:
+    scheduler = EngagementRefreshScheduler(
+        SupabaseStorage(),
+        budget_per_hour=budget,
+        target_views=target_views,
+    )
+    stop = asyncio.Event()
+    if minutes:
+        asyncio.get_running_loop().call_later(minutes * 60, stop.set)
+
+    try:
+        await scheduler.run(stop=stop, report_minutes=report_minutes)
+    finally:
+        stats = scheduler.stats()
+        print(json.dumps(stats, indent=2))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Velocity-prioritized engagement refresh scheduler')
+    parser.add_argument('--budget', type=int, default=settings.refresh_budget_per_hour, help='Requests per hour')
+    parser.add_argument('--target-views', type=int, default=settings.refresh_target_views,
+                        help='Expected new views between refreshes of a post')
+    parser.add_argument('--minutes', type=float, help='Stop after this many minutes (default: run forever)')
+    parser.add_argument('--report-minutes', type=float, default=5.0, help='How often to log stats')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args.budget, args.target_views, args.minutes, args.report_minutes))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -235,6 +235,9 @@ async def run_analysis(limit: int = None, delay: float = 2.0, store_to_db: bool
         if (i + 1) % 50 == 0:
             logger.info(f"Progress: {i+1}/{total} ({analyzed} analyzed, {failed} failed, {stored} stored)")
 
+    # Uploads are kept around for reuse during the run; delete them now
+    await analyzer.uploads.flush()
+
     # Final summary
     logger.info("=" * 60)
     logger.info(f"Analysis complete!")
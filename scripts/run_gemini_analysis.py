@@ -115,6 +115,9 @@ async def run_analysis(limit: int = None, delay: float = 5.0):
         if (i + 1) % 10 == 0:
             logger.info(f"Progress: {i+1}/{total} ({analyzed} analyzed, {failed} failed)")
 
+    # Uploads are kept around for reuse during the run; delete them now
+    await analyzer.uploads.flush()
+
     # Final summary
     logger.info("=" * 50)
     logger.info(f"Analysis complete!")
@@ -5,6 +5,7 @@ Saves posts to JSON for Claude analysis.
 Usage:
     python scripts/scrape_substack.py
     python scripts/scrape_substack.py --count 50
+    python scripts/scrape_substack.py --archive --since 2024-01-01 --count 500
 """
 import asyncio
 import json
@@ -102,7 +103,23 @@ DATA_ENGINEERING_PUBLICATIONS = [
 OUTPUT_DIR = Path(r'C:\Users\steph\.social-scraper\cache\substack')
 
 
-async def scrape_all(count_per_pub: int = 30):
+async def fetch_posts(
+    extractor: SubstackExtractor,
+    pub_name: str,
+    count_per_pub: int,
+    archive: bool = False,
+    since: datetime = None,
+) -> list:
+    """Get posts from the RSS feed, or page the archive API for a backfill."""
+    if not archive:
+        posts, _ = await extractor.extract_publication(pub_name, count_per_pub)
+        return posts
+    return [
+        post async for post in extractor.iter_archive(pub_name, since=since, max_posts=count_per_pub)
+    ]
+
+
+async def scrape_all(count_per_pub: int = 30, archive: bool = False, since: datetime = None):
     """Scrape all data engineering Substacks."""
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -115,7 +132,7 @@ async def scrape_all(count_per_pub: int = 30):
         logger.info(f"Scraping: {pub_name}.substack.com")
 
         try:
-            posts, result = await extractor.extract_publication(pub_name, count_per_pub)
+            posts = await fetch_posts(extractor, pub_name, count_per_pub, archive, since)
 
             if posts:
                 for post in posts:
@@ -171,9 +188,12 @@ def main():
     import argparse
     parser = argparse.ArgumentParser(description='Scrape data engineering Substacks')
     parser.add_argument('--count', type=int, default=30, help='Posts per publication')
+    parser.add_argument('--archive', action='store_true', help='Page the archive API instead of the RSS feed')
+    parser.add_argument('--since', type=str, default=None, help='Archive mode: stop at posts on/before this date (YYYY-MM-DD)')
     args = parser.parse_args()
 
-    asyncio.run(scrape_all(args.count))
+    since = datetime.fromisoformat(args.since) if args.since else None
+    asyncio.run(scrape_all(args.count, archive=args.archive, since=since))
 
 
 if __name__ == "__main__":
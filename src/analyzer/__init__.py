@@ -1,4 +1,23 @@
 from .gemini import GeminiAnalyzer, VideoAnalysis
 from .account_comparison import AccountComparer
+from .cache import AnalysisCache, get_analysis_cache, summarize_analysis_costs
+from .rate_limiter import AdaptiveRateLimiter, get_gemini_rate_limiter
+from .retry import FailureKind, QuotaRetryQueue, RetryPolicy, classify_failure
+from .schema import ParseStats, get_parse_stats
 
-__all__ = ["GeminiAnalyzer", "VideoAnalysis", "AccountComparer"]
+__all__ = [
+    "GeminiAnalyzer",
+    "VideoAnalysis",
+    "AccountComparer",
+    "AnalysisCache",
+    "get_analysis_cache",
+    "summarize_analysis_costs",
+    "AdaptiveRateLimiter",
+    "get_gemini_rate_limiter",
+    "FailureKind",
+    "QuotaRetryQueue",
+    "RetryPolicy",
+    "classify_failure",
+    "ParseStats",
+    "get_parse_stats",
+]
@@ -0,0 +1,233 @@
+"""
+Persistent cache of Gemini analysis results.
+
+An analysis is keyed by the sha256 of the video bytes, a hash of the prompt
+text, the model name and niche_mode. A retry, a rerun of
+scripts/analyze_unanalyzed_videos.py, or the same video from another source
+therefore returns the stored VideoAnalysis without an upload or API call.
+
+Each entry is one JSON file under settings.cache_dir/analysis, alongside the
+token usage and cost of the call that produced it, so hits can be reported
+as dollars saved. Entries older than settings.analysis_cache_ttl_days are
+evicted, as are the least recently used ones beyond
+settings.analysis_cache_max_entries.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from config.settings import settings
+from src.downloader.cache import file_sha256
+
+if TYPE_CHECKING:
+    from .gemini import VideoAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def estimate_cost(usage: dict) -> float:
+    """Dollar cost of one call from its token usage and the configured Gemini prices."""
+    return (
+        usage.get("input_tokens", 0) * settings.gemini_input_price_per_m
+        + usage.get("output_tokens", 0) * settings.gemini_output_price_per_m
+    ) / 1_000_000
+
+
+def summarize_analysis_costs(analyses: list["VideoAnalysis"]) -> dict:
+    """
+    Cache hit rate and spend for a batch of analyses.
+
+    Returns:
+        {analysis_cache_hits, analysis_cache_misses, analysis_cache_hit_rate,
+        analysis_cost_usd, dollars_saved}
+    """
+    successful = [a for a in analyses if a.success]
+    hits = [a for a in successful if a.cache_hit]
+    return {
+        "analysis_cache_hits": len(hits),
+        "analysis_cache_misses": len(successful) - len(hits),
+        "analysis_cache_hit_rate": round(len(hits) / len(successful), 3) if successful else 0.0,
+        "analysis_cost_usd": round(sum(a.cost_usd for a in successful if not a.cache_hit), 4),
+        "dollars_saved": round(sum(a.cost_usd for a in hits), 4),
+    }
+
+
+class AnalysisCache:
+    """On-disk analysis results keyed by video content, prompt, model and niche_mode."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_entries: Optional[int] = None,
+        ttl_days: Optional[float] = None,
+    ):
+        """
+        Args:
+            directory: Where entries are stored (defaults to settings.cache_dir/analysis)
+            max_entries: Entries kept before LRU eviction
+            ttl_days: Age after which an entry is evicted
+        """
+        self.directory = Path(directory or Path(settings.cache_dir) / "analysis")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries or settings.analysis_cache_max_entries
+        self.ttl_seconds = (ttl_days or settings.analysis_cache_ttl_days) * 86400
+
+        self._lock = threading.Lock()
+        # key -> last access time, least recently used first (file mtime doubles as last access)
+        self._index: OrderedDict[str, float] = OrderedDict(
+            sorted(
+                ((path.stem, path.stat().st_mtime) for path in self.directory.glob("*.json")),
+                key=lambda item: item[1],
+            )
+        )
+        self._hash_memo: dict[tuple[str, int, int], str] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dollars_saved = 0.0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def content_hash(self, video_path: Path) -> str:
+        """sha256 of a video, memoized by path, size and mtime."""
+        stat = video_path.stat()
+        memo_key = (str(video_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            digest = file_sha256(video_path)
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    def key_for(self, video_path: Path, prompt: str, model: str, niche_mode: str) -> str:
+        parts = [self.content_hash(video_path), prompt_hash(prompt), model, niche_mode]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str, video_path: Optional[Path] = None) -> Optional["VideoAnalysis"]:
+        """
+        Return the cached analysis for a key, or None.
+
+        Args:
+            key: Key from key_for()
+            video_path: Path to report on the returned analysis (the cached
+                copy may have been produced from another path)
+        """
+        from .gemini import VideoAnalysis
+
+        path = self._path(key)
+        with self._lock:
+            known = key in self._index
+        entry = None
+        if known:
+            try:
+                entry = json.loads(path.read_text())
+            except Exception:
+                entry = None
+        if entry and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove(key)
+            entry = None
+
+        if not entry:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._index[key] = now
+            self._index.move_to_end(key)
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+        analysis = VideoAnalysis.from_dict(
+            entry["analysis"],
+            video_path=str(video_path) if video_path else entry["analysis"].get("video_path"),
+        )
+        analysis.cache_hit = True
+        analysis.usage = entry.get("usage", {})
+        analysis.cost_usd = entry.get("cost_usd", 0.0)
+        self.hits += 1
+        self.dollars_saved += analysis.cost_usd
+        logger.info(f"Analysis cache hit for {video_path or key} (saved ${analysis.cost_usd:.4f})")
+        return analysis
+
+    def put(self, key: str, analysis: "VideoAnalysis", model: str, niche_mode: str) -> None:
+        """Store a successful analysis, then evict if over the entry cap."""
+        entry = {
+            "analysis": analysis.to_dict(),
+            "model": model,
+            "niche_mode": niche_mode,
+            "usage": analysis.usage,
+            "cost_usd": analysis.cost_usd,
+            "created_at": time.time(),
+        }
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry))
+        tmp.replace(path)
+        with self._lock:
+            self._index[key] = time.time()
+            self._index.move_to_end(key)
+        self.evict()
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            self._index.pop(key, None)
+        self._path(key).unlink(missing_ok=True)
+        self.evictions += 1
+
+    def evict(self) -> int:
+        """
+        Drop expired entries and the least recently used ones beyond max_entries.
+
+        Returns:
+            Number of entries removed
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            # Last access >= creation, so an entry idle past the TTL is also expired
+            victims = [key for key, accessed in self._index.items() if accessed < cutoff]
+            overflow = len(self._index) - len(victims) - self.max_entries
+            if overflow > 0:
+                expired = set(victims)
+                victims += [key for key in self._index if key not in expired][:overflow]
+        for key in victims:
+            self._remove(key)
+        if victims:
+            logger.info(f"Evicted {len(victims)} analysis cache entries")
+        return len(victims)
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "dollars_saved": round(self.dollars_saved, 4),
+        }
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get the process-wide analysis cache."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache()
+    return _analysis_cache
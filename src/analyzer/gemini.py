@@ -5,7 +5,7 @@ Comprehensive marketing intelligence extraction for trend analysis.
 """
 
 import asyncio
-import time
+from functools import lru_cache
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, Any
@@ -17,6 +17,25 @@ from google.genai import types
 
 from config.settings import settings
 from src.utils import safe_int, safe_float, dataclass_to_dict
+from .cache import AnalysisCache, estimate_cost, get_analysis_cache
+from .rate_limiter import AdaptiveRateLimiter, get_gemini_rate_limiter
+from .retry import (
+    AnalysisParseError,
+    FailureKind,
+    QuotaRetryQueue,
+    RetryPolicy,
+    classify_failure,
+)
+from .multi import (
+    OUTPUT_TOKENS_PER_VIDEO,
+    build_multi_prompt,
+    estimate_video_tokens,
+    group_by_budget,
+    parse_multi_response,
+    probe_duration,
+)
+from .schema import dataclass_schema, get_parse_stats, object_schema
+from .uploads import UploadManager, get_upload_manager
 
 logger = logging.getLogger(__name__)
 
@@ -64,7 +83,10 @@ class VisualAnalysis:
     camera_type: str = ""  # selfie, pov, tripod, handheld, drone
     camera_movement: list[str] = field(default_factory=list)  # pan, zoom, static, tracking
     transition_types: list[str] = field(default_factory=list)  # cut, swipe, zoom, morph, etc.
-    text_overlays: list[dict] = field(default_factory=list)  # [{text, style, position, timing}]
+    text_overlays: list[dict] = field(
+        default_factory=list,
+        metadata={"items": {"text": str, "style": str, "position": str, "timing": str}},
+    )  # [{text, style, position, timing}]
     visual_effects: list[str] = field(default_factory=list)  # green_screen, split_screen, duet, stitch, collab, filter, picture_in_picture, etc.
     editing_pace: str = ""  # fast_cuts, medium, slow, single_shot
     estimated_cuts_count: int = 0
@@ -221,6 +243,42 @@ class BrandSafety:
     copyright_risk: str = ""  # low|medium|high
 
 
+def _parse_nested_dataclass(data: dict, key: str, dataclass_type: type) -> Any:
+    """Parse nested dictionary into dataclass with type coercion."""
+    nested_data = data.get(key, {})
+    if not isinstance(nested_data, dict):
+        return dataclass_type()
+
+    field_values = {}
+    for field_name, field_info in dataclass_type.__dataclass_fields__.items():
+        if field_name in nested_data:
+            value = nested_data[field_name]
+            field_type = field_info.type
+
+            # Coerce types for common mismatches
+            if field_type == int or field_type == 'int':
+                value = safe_int(value, 0)
+            elif field_type == float or field_type == 'float':
+                value = safe_float(value, 0.0)
+            elif field_type == bool or field_type == 'bool':
+                if isinstance(value, str):
+                    value = value.lower() in ('true', '1', 'yes')
+                else:
+                    value = bool(value) if value is not None else False
+
+            field_values[field_name] = value
+
+    try:
+        return dataclass_type(**field_values)
+    except Exception as e:
+        logger.warning(f"Failed to parse {key}: {e}")
+        return dataclass_type()
+
+
+# Bookkeeping for the current call, not part of the stored analysis
+_RUNTIME_FIELDS = ("cache_hit", "usage", "cost_usd", "failure_kind", "attempts")
+
+
 @dataclass
 class VideoAnalysis:
     """Complete marketing intelligence for a video."""
@@ -259,9 +317,98 @@ class VideoAnalysis:
     # Raw data
     raw_response: Optional[str] = None
 
+    # Runtime only (see _RUNTIME_FIELDS)
+    cache_hit: bool = False  # Served from the analysis cache without an API call
+    usage: dict = field(default_factory=dict)  # {"input_tokens", "output_tokens"} of the producing call
+    cost_usd: float = 0.0  # Cost of the producing call (saved, on a cache hit)
+    failure_kind: Optional[str] = None  # FailureKind value when the analysis failed
+    attempts: int = 0  # Gemini attempts made for this result
+
     def to_dict(self) -> dict:
         """Convert to dictionary for storage."""
-        return dataclass_to_dict(self)
+        data = dataclass_to_dict(self)
+        for name in _RUNTIME_FIELDS:
+            data.pop(name, None)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, video_path: Optional[str] = None, raw_response: Optional[str] = None) -> "VideoAnalysis":
+        """
+        Build a successful analysis from parsed model output or a stored to_dict().
+
+        Args:
+            data: Analysis dict with the nested sections (hook, audio, ...)
+            video_path: Path to record (defaults to data["video_path"])
+            raw_response: Raw model text (defaults to data["raw_response"])
+        """
+        return cls(
+            success=True,
+            video_path=video_path or data.get("video_path"),
+            description=data.get("description", ""),
+            hook=_parse_nested_dataclass(data, "hook", HookAnalysis),
+            audio=_parse_nested_dataclass(data, "audio", AudioAnalysis),
+            visual=_parse_nested_dataclass(data, "visual", VisualAnalysis),
+            structure=_parse_nested_dataclass(data, "structure", ContentStructure),
+            engagement=_parse_nested_dataclass(data, "engagement", EngagementMechanics),
+            trends=_parse_nested_dataclass(data, "trends", TrendSignals),
+            emotion=_parse_nested_dataclass(data, "emotion", EmotionalAnalysis),
+            niche=_parse_nested_dataclass(data, "niche", NicheAnalysis),
+            production=_parse_nested_dataclass(data, "production", ProductionAnalysis),
+            replicability=_parse_nested_dataclass(data, "replicability", ReplicabilityAnalysis),
+            educational=_parse_nested_dataclass(data, "educational", EducationalAnalysis),
+            data_engineering=_parse_nested_dataclass(data, "data_engineering", DataEngineeringContext),
+            technical=_parse_nested_dataclass(data, "technical", TechnicalSpecs),
+            brand_safety=_parse_nested_dataclass(data, "brand_safety", BrandSafety),
+            why_it_works=data.get("why_it_works", ""),
+            competitive_advantage=data.get("competitive_advantage", ""),
+            improvement_opportunities=data.get("improvement_opportunities", []),
+            raw_response=raw_response if raw_response is not None else data.get("raw_response"),
+        )
+
+
+# VideoAnalysis fields each niche-mode prompt asks for, in prompt order
+NICHE_MODE_FIELDS = {
+    "entertainment": (
+        "description", "hook", "audio", "visual", "structure", "engagement", "trends", "emotion",
+        "niche", "production", "replicability", "technical", "brand_safety",
+        "why_it_works", "competitive_advantage", "improvement_opportunities",
+    ),
+    "data_engineering": (
+        "description", "educational", "data_engineering", "hook", "production", "structure",
+        "engagement", "replicability", "technical", "brand_safety",
+        "why_it_works", "improvement_opportunities",
+    ),
+    "both": (
+        "description", "hook", "audio", "visual", "structure", "engagement", "trends", "emotion",
+        "niche", "production", "replicability", "educational", "data_engineering", "technical",
+        "brand_safety", "why_it_works", "competitive_advantage", "improvement_opportunities",
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def analysis_response_schema(niche_mode: str, count: int = 1) -> dict:
+    """
+    Gemini response schema for a niche mode's analysis, generated from VideoAnalysis.
+
+    Args:
+        niche_mode: Niche mode (modes without their own prompt use the entertainment fields)
+        count: Videos per request; above 1 the schema is an array of analyses,
+            each with a video_index
+
+    Returns:
+        Schema dict for GenerateContentConfig.response_schema
+    """
+    names = NICHE_MODE_FIELDS.get(niche_mode, NICHE_MODE_FIELDS["entertainment"])
+    schema = dataclass_schema(VideoAnalysis, only=names)
+    if count > 1:
+        schema = {
+            "type": "ARRAY",
+            "items": object_schema({"video_index": {"type": "INTEGER"}, **schema["properties"]}),
+            "min_items": count,
+            "max_items": count,
+        }
+    return schema
 
 
 class GeminiAnalyzer:
@@ -271,11 +418,23 @@ class GeminiAnalyzer:
         self,
         api_key: Optional[str] = None,
         model: Optional[str] = None,
-        niche_mode: Optional[str] = None
+        niche_mode: Optional[str] = None,
+        cache: Optional[AnalysisCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        upload_manager: Optional[UploadManager] = None,
+        structured_output: Optional[bool] = None,
     ):
         self.api_key = api_key or settings.gemini_api_key
         self.model = model or settings.gemini_model
         self.niche_mode = niche_mode or settings.niche_mode
+        self.cache = cache or (get_analysis_cache() if settings.analysis_cache_enabled else None)
+        self.rate_limiter = rate_limiter or get_gemini_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.structured_output = (
+            settings.gemini_structured_output if structured_output is None else structured_output
+        )
+        self.parse_stats = get_parse_stats()
 
         if not self.api_key:
             raise ValueError(
@@ -283,13 +442,18 @@ class GeminiAnalyzer:
             )
 
         self.client = genai.Client(api_key=self.api_key)
+        # Uploads are shared across analyzers (and niche modes) using the same key
+        self.uploads = upload_manager or (
+            get_upload_manager() if self.api_key == settings.gemini_api_key else UploadManager(self.client)
+        )
         logger.info(f"GeminiAnalyzer initialized with model: {self.model}, niche_mode: {self.niche_mode}")
 
-    def _get_prompt(self) -> str:
+    def _get_prompt(self, niche_mode: Optional[str] = None) -> str:
         """Get the appropriate analysis prompt based on niche mode."""
-        if self.niche_mode == "data_engineering":
+        niche_mode = niche_mode or self.niche_mode
+        if niche_mode == "data_engineering":
             return EDUCATIONAL_ANALYSIS_PROMPT
-        elif self.niche_mode == "both":
+        elif niche_mode == "both":
             return COMBINED_ANALYSIS_PROMPT
         return ANALYSIS_PROMPT
 
@@ -503,39 +667,107 @@ class GeminiAnalyzer:
 
     def _parse_nested_dataclass(self, data: dict, key: str, dataclass_type: type) -> Any:
         """Parse nested dictionary into dataclass with type coercion."""
-        nested_data = data.get(key, {})
-        if not isinstance(nested_data, dict):
-            return dataclass_type()
-
-        field_values = {}
-        for field_name, field_info in dataclass_type.__dataclass_fields__.items():
-            if field_name in nested_data:
-                value = nested_data[field_name]
-                field_type = field_info.type
-
-                # Coerce types for common mismatches
-                if field_type == int or field_type == 'int':
-                    value = safe_int(value, 0)
-                elif field_type == float or field_type == 'float':
-                    value = safe_float(value, 0.0)
-                elif field_type == bool or field_type == 'bool':
-                    if isinstance(value, str):
-                        value = value.lower() in ('true', '1', 'yes')
-                    else:
-                        value = bool(value) if value is not None else False
-
-                field_values[field_name] = value
+        return _parse_nested_dataclass(data, key, dataclass_type)
+
+    def response_schema(self, niche_mode: Optional[str] = None, count: int = 1) -> Optional[dict]:
+        """Response schema for the niche mode's prompt, or None when structured output is off."""
+        if not self.structured_output:
+            return None
+        return analysis_response_schema(niche_mode or self.niche_mode, count)
+
+    # ==================== Gemini calls (async client) ====================
+
+    async def _generate(
+        self,
+        video_files: list,
+        prompt: str,
+        kind: str = "video_analysis",
+        estimated_tokens: Optional[int] = None,
+        response_schema: Optional[dict] = None,
+    ) -> tuple[str, dict]:
+        """
+        Run the analysis prompt against ACTIVE uploaded files (videos first, then the prompt).
+
+        Args:
+            video_files: Uploaded files, in the order the prompt refers to them
+            prompt: Analysis prompt
+            kind: Rate limiter call category
+            estimated_tokens: Token cost to reserve (defaults to the limiter's estimate for kind)
+            response_schema: Constrain the response to this JSON schema (None for free-form text)
+
+        Returns:
+            (response text, {"input_tokens", "output_tokens"})
+        """
+        parts = [
+            types.Part.from_uri(file_uri=video_file.uri, mime_type=video_file.mime_type)
+            for video_file in video_files
+        ]
+        parts.append(types.Part.from_text(text=prompt))
+        config = None
+        if response_schema is not None:
+            config = types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=response_schema,
+            )
+        async with self.rate_limiter.limit(kind, estimated_tokens) as call:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=[types.Content(role="user", parts=parts)],
+                config=config,
+            )
+            usage_metadata = getattr(response, "usage_metadata", None)
+            usage = {
+                "input_tokens": getattr(usage_metadata, "prompt_token_count", 0) or 0,
+                "output_tokens": getattr(usage_metadata, "candidates_token_count", 0) or 0,
+            }
+            call.actual_tokens = usage["input_tokens"] + usage["output_tokens"]
+        return response.text, usage
+
+    def parse_response(self, response_text: str, usage: dict, structured: bool = False) -> tuple[str, dict]:
+        """
+        Parse the model's JSON, counting the outcome in the parse stats.
 
+        Args:
+            response_text: Raw response text
+            usage: Token usage of the producing call
+            structured: The request used a response schema, so the text is bare JSON
+                (free-form responses may be wrapped in code fences)
+
+        Raises:
+            AnalysisParseError: If the response is not a JSON object
+        """
+        response_text = (response_text or "").strip()
+        if not structured and response_text.startswith("```"):
+            lines = response_text.split("\n")
+            response_text = "\n".join(lines[1:-1])
         try:
-            return dataclass_type(**field_values)
-        except Exception as e:
-            logger.warning(f"Failed to parse {key}: {e}")
-            return dataclass_type()
+            data = json.loads(response_text)
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+        except ValueError as e:
+            self.parse_stats.record(structured, parsed=False)
+            raise AnalysisParseError(f"Failed to parse JSON response: {e}", response_text, usage) from e
+        self.parse_stats.record(structured, parsed=True)
+        return response_text, data
+
+    def _log_failure(self, error: Exception, kind: FailureKind) -> None:
+        error_str = str(error)
+        if kind == FailureKind.QUOTA:
+            logger.warning(f"Gemini quota hit; deferring for retry: {error_str[:200]}")
+        elif "limit: 0" in error_str:
+            logger.error(
+                "Gemini API quota is 0. Your API key doesn't have billing enabled. "
+                "Go to https://console.cloud.google.com to enable billing, or "
+                "create a new API key at https://aistudio.google.com/apikey"
+            )
+        else:
+            logger.error(f"Gemini analysis failed ({kind.value}): {error}")
 
     async def analyze_video(
         self,
         video_path: Path,
         custom_prompt: Optional[str] = None,
+        niche_mode: Optional[str] = None,
     ) -> VideoAnalysis:
         """
         Analyze a video file with comprehensive marketing intelligence extraction.
@@ -543,6 +775,7 @@ class GeminiAnalyzer:
         Args:
             video_path: Path to video file
             custom_prompt: Optional custom prompt (uses default if not provided)
+            niche_mode: Niche mode for this call (defaults to the analyzer's)
 
         Returns:
             VideoAnalysis with comprehensive marketing intelligence
@@ -562,123 +795,173 @@ class GeminiAnalyzer:
                 error=f"Video too large: {file_size_mb:.1f}MB (max 100MB)",
             )
 
-        try:
-            logger.info(f"Analyzing video: {video_path.name}")
-
-            prompt = custom_prompt or self._get_prompt()
-
-            loop = asyncio.get_event_loop()
-
-            def do_analysis():
-                video_file = self.client.files.upload(file=video_path)
-                logger.info(f"Uploaded file: {video_file.name}, state: {video_file.state}")
-
-                max_wait = 120
-                wait_interval = 3
-                waited = 0
-                while video_file.state.name != "ACTIVE" and waited < max_wait:
-                    logger.info(f"Waiting for file to process... ({waited}s)")
-                    time.sleep(wait_interval)
-                    waited += wait_interval
-                    video_file = self.client.files.get(name=video_file.name)
-
-                if video_file.state.name != "ACTIVE":
-                    raise RuntimeError(f"File did not become ACTIVE after {max_wait}s. State: {video_file.state.name}")
-
-                logger.info(f"File ready: {video_file.name}")
-
-                response = self.client.models.generate_content(
-                    model=self.model,
-                    contents=[
-                        types.Content(
-                            role="user",
-                            parts=[
-                                types.Part.from_uri(
-                                    file_uri=video_file.uri,
-                                    mime_type=video_file.mime_type,
-                                ),
-                                types.Part.from_text(text=prompt),
-                            ],
-                        ),
-                    ],
-                )
+        logger.info(f"Analyzing video: {video_path.name}")
+        niche_mode = niche_mode or self.niche_mode
+        prompt = custom_prompt or self._get_prompt(niche_mode)
+        # A custom prompt may ask for a different shape than the niche mode's schema
+        schema = None if custom_prompt else self.response_schema(niche_mode)
 
+        cache_key = None
+        if self.cache:
+            try:
+                # Hashing reads the whole file; keep it off the event loop
+                cache_key = await asyncio.to_thread(
+                    self.cache.key_for, video_path, prompt, self.model, niche_mode
+                )
+                cached = self.cache.get(cache_key, video_path)
+                if cached:
+                    return cached
+            except Exception as e:
+                logger.warning(f"Analysis cache lookup failed for {video_path.name}: {e}")
+
+        policy = self.retry_policy
+        total_usage = {"input_tokens": 0, "output_tokens": 0}
+        attempt = 0
+        parse_failures = 0
+        while True:
+            attempt += 1
+            try:
+                # The upload outlives this call: other prompts, retries and
+                # quota-deferred reruns reuse it until it goes idle
+                video_file = await self.uploads.acquire(video_path, verify=attempt > 1)
                 try:
-                    self.client.files.delete(name=video_file.name)
-                except Exception:
-                    pass
-
-                return response.text
-
-            response_text = await loop.run_in_executor(None, do_analysis)
-
-            # Clean up JSON
-            response_text = response_text.strip()
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
+                    response_text, usage = await self._generate([video_file], prompt, response_schema=schema)
+                finally:
+                    await self.uploads.release(video_file)
+                for k in total_usage:
+                    total_usage[k] += usage.get(k, 0)
+                response_text, data = self.parse_response(response_text, usage, structured=schema is not None)
+                break
+            except Exception as e:
+                kind = classify_failure(e)
+
+                if kind == FailureKind.PARSE:
+                    parse_failures += 1
+                    if parse_failures <= policy.parse_retries:
+                        logger.warning(f"{e}; regenerating {video_path.name} from the same upload")
+                        continue
+                    # Out of regenerations: a failure, with the raw text kept for inspection
+                    logger.warning(str(e))
+                    return self.unparsed_analysis(video_path, e.response_text, total_usage, attempt)
+
+                if kind == FailureKind.TRANSIENT and attempt < policy.max_attempts:
+                    delay = policy.delay(attempt)
+                    logger.warning(
+                        f"Transient Gemini failure on {video_path.name} "
+                        f"(attempt {attempt}/{policy.max_attempts}), retrying in {delay:.1f}s: {e}"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
 
-            try:
-                data = json.loads(response_text)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse JSON response: {e}")
+                # A quota failure leaves the upload in place for the deferred retry
+                self._log_failure(e, kind)
                 return VideoAnalysis(
-                    success=True,
+                    success=False,
                     video_path=str(video_path),
-                    description=response_text[:500],
-                    raw_response=response_text,
+                    error=str(e),
+                    usage=total_usage,
+                    cost_usd=estimate_cost(total_usage),
+                    failure_kind=kind.value,
+                    attempts=attempt,
                 )
 
-            # Validate and auto-correct scores
-            data = self._validate_and_correct_scores(data)
+        analysis = self.build_analysis(video_path, data, response_text, total_usage, attempt)
+        if cache_key and analysis.success:
+            try:
+                self.cache.put(cache_key, analysis, self.model, niche_mode)
+            except Exception as e:
+                logger.warning(f"Failed to cache analysis for {video_path.name}: {e}")
+        return analysis
 
-            logger.info(f"Analysis complete: {video_path.name}")
+    def unparsed_analysis(
+        self,
+        video_path: Path,
+        response_text: str,
+        usage: dict,
+        attempts: int = 1,
+        cost_usd: Optional[float] = None,
+    ) -> VideoAnalysis:
+        """
+        Failed result for a response that never parsed as JSON.
 
+        Not a success, so it is neither cached nor stored as an analysis; the
+        raw text is kept in raw_response for inspection.
+        """
+        return VideoAnalysis(
+            success=False,
+            video_path=str(video_path),
+            error="Response was not valid JSON",
+            raw_response=response_text,
+            usage=usage,
+            cost_usd=estimate_cost(usage) if cost_usd is None else cost_usd,
+            failure_kind=FailureKind.PARSE.value,
+            attempts=attempts,
+        )
+
+    def build_analysis(
+        self,
+        video_path: Path,
+        data: dict,
+        response_text: str,
+        usage: dict,
+        attempts: int = 1,
+        cost_usd: Optional[float] = None,
+    ) -> VideoAnalysis:
+        """
+        Validate parsed model output and build the VideoAnalysis for it.
+
+        Args:
+            video_path: Video the response is about
+            data: Parsed JSON response
+            response_text: Raw response text
+            usage: Token usage of the producing call(s)
+            attempts: Gemini attempts made
+            cost_usd: Cost override (e.g. discounted batch pricing)
+        """
+        cost_usd = estimate_cost(usage) if cost_usd is None else cost_usd
+        try:
+            # Validate and auto-correct scores
+            data = self._validate_and_correct_scores(data)
             # Build comprehensive analysis
+            analysis = VideoAnalysis.from_dict(data, video_path=str(video_path), raw_response=response_text)
+        except Exception as e:
+            logger.error(f"Gemini analysis failed ({FailureKind.PARSE.value}): {e}")
             return VideoAnalysis(
-                success=True,
+                success=False,
                 video_path=str(video_path),
-                description=data.get("description", ""),
-                hook=self._parse_nested_dataclass(data, "hook", HookAnalysis),
-                audio=self._parse_nested_dataclass(data, "audio", AudioAnalysis),
-                visual=self._parse_nested_dataclass(data, "visual", VisualAnalysis),
-                structure=self._parse_nested_dataclass(data, "structure", ContentStructure),
-                engagement=self._parse_nested_dataclass(data, "engagement", EngagementMechanics),
-                trends=self._parse_nested_dataclass(data, "trends", TrendSignals),
-                emotion=self._parse_nested_dataclass(data, "emotion", EmotionalAnalysis),
-                niche=self._parse_nested_dataclass(data, "niche", NicheAnalysis),
-                production=self._parse_nested_dataclass(data, "production", ProductionAnalysis),
-                replicability=self._parse_nested_dataclass(data, "replicability", ReplicabilityAnalysis),
-                educational=self._parse_nested_dataclass(data, "educational", EducationalAnalysis),
-                data_engineering=self._parse_nested_dataclass(data, "data_engineering", DataEngineeringContext),
-                technical=self._parse_nested_dataclass(data, "technical", TechnicalSpecs),
-                brand_safety=self._parse_nested_dataclass(data, "brand_safety", BrandSafety),
-                why_it_works=data.get("why_it_works", ""),
-                competitive_advantage=data.get("competitive_advantage", ""),
-                improvement_opportunities=data.get("improvement_opportunities", []),
+                error=str(e),
                 raw_response=response_text,
+                usage=usage,
+                cost_usd=cost_usd,
+                failure_kind=FailureKind.PARSE.value,
+                attempts=attempts,
             )
 
-        except Exception as e:
-            error_str = str(e)
-
-            if "RESOURCE_EXHAUSTED" in error_str or "429" in error_str:
-                if "limit: 0" in error_str:
-                    logger.error(
-                        "Gemini API quota is 0. Your API key doesn't have billing enabled. "
-                        "Go to https://console.cloud.google.com to enable billing, or "
-                        "create a new API key at https://aistudio.google.com/apikey"
-                    )
-                else:
-                    logger.error(f"Gemini rate limit hit. Try again in a few seconds.")
-            else:
-                logger.error(f"Gemini analysis failed: {e}")
+        logger.info(f"Analysis complete: {video_path.name}")
+        analysis.usage = usage
+        analysis.cost_usd = cost_usd
+        analysis.attempts = attempts
+        return analysis
 
-            return VideoAnalysis(
-                success=False,
-                video_path=str(video_path),
-                error=error_str,
-            )
+    async def analyze_video_modes(
+        self,
+        video_path: Path,
+        niche_modes: tuple[str, ...] = ("entertainment", "data_engineering", "both"),
+    ) -> dict[str, VideoAnalysis]:
+        """
+        Run several niche-mode prompts against a single upload of a video.
+
+        Args:
+            video_path: Path to video file
+            niche_modes: Niche modes to analyze the video under
+
+        Returns:
+            Mapping of niche mode to its VideoAnalysis
+        """
+        results = await asyncio.gather(
+            *(self.analyze_video(video_path, niche_mode=mode) for mode in niche_modes)
+        )
+        return dict(zip(niche_modes, results))
 
     async def analyze_batch(
         self,
@@ -690,18 +973,204 @@ class GeminiAnalyzer:
 
         Args:
             video_paths: List of video file paths
-            max_concurrent: Max concurrent analyses
+            max_concurrent: Max concurrent analyses (each is a coroutine on this
+                event loop; no thread is held while a file processes)
 
         Returns:
             List of VideoAnalysis results
         """
         semaphore = asyncio.Semaphore(max_concurrent)
 
-        async def analyze_with_semaphore(path: Path) -> VideoAnalysis:
+        ahead = settings.gemini_prefetch_ahead
+
+        async def analyze_with_semaphore(path: Path, index: int) -> VideoAnalysis:
+            # Pacing is left to the shared rate limiter
             async with semaphore:
-                result = await self.analyze_video(path)
-                await asyncio.sleep(3)  # Rate limit buffer
-                return result
+                # Upload the next few videos while this one is generating
+                self.uploads.prefetch(video_paths[index + 1:index + 1 + ahead])
+                return await self.analyze_video(path)
+
+        tasks = [analyze_with_semaphore(path, i) for i, path in enumerate(video_paths)]
+        results = list(await asyncio.gather(*tasks))
+        await self._retry_quota_failures(results, lambda index: analyze_with_semaphore(video_paths[index], index))
+        return results
+
+    async def _retry_quota_failures(self, results: list[VideoAnalysis], rerun) -> None:
+        """Re-run quota-failed results in rounds (via QuotaRetryQueue), replacing them in place."""
+        queue: QuotaRetryQueue[int] = QuotaRetryQueue()
+        for index, result in enumerate(results):
+            if result.failure_kind == FailureKind.QUOTA.value:
+                queue.defer(index)
+        if len(queue):
+            def store(index: int, result: VideoAnalysis) -> None:
+                results[index] = result
+
+            await queue.drain(rerun, store)
+
+    async def _analyze_group(
+        self,
+        video_paths: list[Path],
+        durations: list[float],
+        prompt: str,
+        niche_mode: Optional[str] = None,
+    ) -> list[Optional[VideoAnalysis]]:
+        """
+        Analyze a group of videos in one request.
+
+        Returns:
+            One entry per video; None where the response had no usable analysis
+            (or the whole request failed), for the caller to retry singly
+        """
+        uploads = await asyncio.gather(*(self.uploads.acquire(p) for p in video_paths), return_exceptions=True)
+        ready = [(i, f) for i, f in enumerate(uploads) if not isinstance(f, BaseException)]
+        results: list[Optional[VideoAnalysis]] = [None] * len(video_paths)
+        if len(ready) < 2:
+            # Not worth a multi-video request; single analysis handles these
+            for _, video_file in ready:
+                await self.uploads.release(video_file)
+            return results
+
+        paths = [video_paths[i] for i, _ in ready]
+        video_tokens = [estimate_video_tokens(durations[i]) for i, _ in ready]
+        estimated = sum(video_tokens) + OUTPUT_TOKENS_PER_VIDEO * len(ready)
+        multi_prompt = build_multi_prompt(prompt, len(ready))
+        schema = self.response_schema(niche_mode, count=len(ready))
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    response_text, usage = await self._generate(
+                        [f for _, f in ready], multi_prompt, kind="multi_video", estimated_tokens=estimated,
+                        response_schema=schema,
+                    )
+                    break
+                except Exception as e:
+                    kind = classify_failure(e)
+                    if kind == FailureKind.TRANSIENT and attempt < self.retry_policy.max_attempts:
+                        await asyncio.sleep(self.retry_policy.delay(attempt))
+                        continue
+                    logger.warning(
+                        f"Multi-video request for {len(ready)} videos failed ({kind.value}); "
+                        f"falling back to single analysis: {e}"
+                    )
+                    return results
+        finally:
+            for _, video_file in ready:
+                await self.uploads.release(video_file)
+
+        # Split usage across the group: input by video length, output evenly
+        total_video_tokens = sum(video_tokens) or 1
+        parsed = parse_multi_response(response_text, len(ready))
+        found = sum(1 for data in parsed if data is not None)
+        self.parse_stats.record(schema is not None, parsed=True, responses=found)
+        self.parse_stats.record(schema is not None, parsed=False, responses=len(ready) - found)
+        for (i, _), path, tokens, data in zip(ready, paths, video_tokens, parsed):
+            if data is None:
+                continue
+            share = {
+                "input_tokens": round(usage["input_tokens"] * tokens / total_video_tokens),
+                "output_tokens": round(usage["output_tokens"] / len(ready)),
+            }
+            analysis = self.build_analysis(path, data, json.dumps(data), share, attempts=attempt)
+            results[i] = analysis if analysis.success else None
+        found = sum(1 for r in results if r)
+        logger.info(f"Multi-video request: {found}/{len(ready)} analyses parsed")
+        return results
+
+    async def analyze_multi(
+        self,
+        video_paths: list[Path],
+        group_size: Optional[int] = None,
+        durations: Optional[list[Optional[float]]] = None,
+        max_concurrent: int = 2,
+        niche_mode: Optional[str] = None,
+    ) -> list[VideoAnalysis]:
+        """
+        Analyze videos several to a request, falling back to single analysis per missing result.
 
-        tasks = [analyze_with_semaphore(path) for path in video_paths]
-        return await asyncio.gather(*tasks)
+        Args:
+            video_paths: List of video file paths
+            group_size: Most videos per request (default settings.gemini_multi_group_size)
+            durations: Known durations in seconds, aligned with video_paths
+                (missing ones are probed from .info.json or file size)
+            max_concurrent: Max group requests in flight
+            niche_mode: Niche mode for the prompt (defaults to the analyzer's)
+
+        Returns:
+            List of VideoAnalysis results, aligned with video_paths
+        """
+        group_size = group_size or settings.gemini_multi_group_size
+        niche_mode = niche_mode or self.niche_mode
+        prompt = self._get_prompt(niche_mode)
+        results: list[Optional[VideoAnalysis]] = [None] * len(video_paths)
+
+        # Cache hits, missing and oversized files are settled by the single-video path
+        candidates: list[int] = []
+        cache_keys: dict[int, str] = {}
+        for index, path in enumerate(video_paths):
+            if not path.exists() or path.stat().st_size > 100 * 1024 * 1024:
+                continue
+            if self.cache:
+                try:
+                    cache_keys[index] = await asyncio.to_thread(
+                        self.cache.key_for, path, prompt, self.model, niche_mode
+                    )
+                    cached = self.cache.get(cache_keys[index], path)
+                    if cached:
+                        results[index] = cached
+                        continue
+                except Exception as e:
+                    logger.warning(f"Analysis cache lookup failed for {path.name}: {e}")
+            candidates.append(index)
+
+        known = durations or [None] * len(video_paths)
+        candidate_durations = [
+            known[i] if known[i] else await asyncio.to_thread(probe_duration, video_paths[i])
+            for i in candidates
+        ]
+        groups = [
+            [candidates[j] for j in group]
+            for group in group_by_budget(candidate_durations, group_size)
+        ]
+        duration_of = dict(zip(candidates, candidate_durations))
+        logger.info(
+            f"Analyzing {len(candidates)} videos in {len(groups)} requests "
+            f"(up to {group_size} per request, {len(video_paths) - len(candidates)} settled without one)"
+        )
+
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def run_group(position: int, group: list[int]) -> None:
+            async with semaphore:
+                if position + 1 < len(groups):
+                    # Upload the next group while this one is generating
+                    self.uploads.prefetch(video_paths[i] for i in groups[position + 1])
+                if len(group) < 2:
+                    return
+                analyses = await self._analyze_group(
+                    [video_paths[i] for i in group], [duration_of[i] for i in group], prompt, niche_mode
+                )
+                for index, analysis in zip(group, analyses):
+                    if analysis is None:
+                        continue
+                    results[index] = analysis
+                    if index in cache_keys:
+                        try:
+                            self.cache.put(cache_keys[index], analysis, self.model, niche_mode)
+                        except Exception as e:
+                            logger.warning(f"Failed to cache analysis for {video_paths[index].name}: {e}")
+
+        await asyncio.gather(*(run_group(position, group) for position, group in enumerate(groups)))
+
+        async def analyze_single(index: int) -> VideoAnalysis:
+            async with semaphore:
+                return await self.analyze_video(video_paths[index], niche_mode=niche_mode)
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            logger.info(f"Falling back to single analysis for {len(missing)} videos")
+            for index, analysis in zip(missing, await asyncio.gather(*(analyze_single(i) for i in missing))):
+                results[index] = analysis
+        await self._retry_quota_failures(results, analyze_single)
+        return results
@@ -0,0 +1,195 @@
+"""
+Helpers for analyzing several videos in one Gemini request.
+
+Packing videos into one generate_content call saves per-request overhead.
+The catch is that one response must carry one analysis per video. Groups
+are sized against the model's limits:
+
+- at most `group_size` videos per request
+- estimated input tokens (video duration x VIDEO_TOKENS_PER_SECOND) within
+  settings.gemini_multi_max_input_tokens
+- expected output (OUTPUT_TOKENS_PER_VIDEO each) within
+  settings.gemini_multi_max_output_tokens, so the JSON array is not
+  truncated
+
+Responses are parsed leniently. Each object carries a video_index. Complete
+objects are salvaged from a truncated array. A video with no usable object
+(none, or one whose video_index is missing or claimed twice) is reported as
+None, and GeminiAnalyzer.analyze_multi falls back to a single-video analysis
+for it.
+"""
+
+import json
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+VIDEO_TOKENS_PER_SECOND = 300  # ~258 frame + 32 audio tokens per second at default resolution
+OUTPUT_TOKENS_PER_VIDEO = 4000  # Typical size of one analysis JSON object
+DEFAULT_DURATION_SECONDS = 60.0  # Assumed when neither metadata nor size gives a duration
+ASSUMED_BITRATE_BPS = 1_000_000  # For estimating duration from file size
+
+MULTI_VIDEO_PROMPT = """You are analyzing {count} videos. Analyze each video SEPARATELY and return a JSON array with {count} objects.
+
+Each object in the array should follow this exact structure for the corresponding video:
+{base_prompt}
+
+IMPORTANT:
+- Return a JSON array with exactly {count} objects
+- Add a "video_index" field to each object: 1 for Video 1, 2 for Video 2, etc.
+- Each object should have the complete analysis structure
+- Return ONLY the JSON array, no other text
+
+Videos are provided in order: Video 1, Video 2, ... Video {count}
+"""
+
+
+def build_multi_prompt(base_prompt: str, count: int) -> str:
+    return MULTI_VIDEO_PROMPT.format(count=count, base_prompt=base_prompt)
+
+
+def probe_duration(video_path: Path) -> float:
+    """
+    Video duration in seconds, from the yt-dlp .info.json next to it, else estimated from size.
+    """
+    info_file = video_path.with_suffix(".info.json")
+    if info_file.exists():
+        try:
+            duration = float(json.loads(info_file.read_text(encoding="utf-8")).get("duration") or 0)
+            if duration > 0:
+                return duration
+        except Exception:
+            pass
+    try:
+        return max(video_path.stat().st_size * 8 / ASSUMED_BITRATE_BPS, 1.0)
+    except OSError:
+        return DEFAULT_DURATION_SECONDS
+
+
+def estimate_video_tokens(duration_seconds: float) -> int:
+    return int(duration_seconds * VIDEO_TOKENS_PER_SECOND)
+
+
+def group_by_budget(
+    durations: list[float],
+    group_size: int,
+    max_input_tokens: Optional[int] = None,
+    max_output_tokens: Optional[int] = None,
+) -> list[list[int]]:
+    """
+    Pack videos into request groups (first-fit decreasing by duration).
+
+    Args:
+        durations: Duration in seconds of each video
+        group_size: Most videos per group
+        max_input_tokens: Estimated video tokens allowed per group
+        max_output_tokens: Expected output tokens allowed per group
+
+    Returns:
+        Groups of indices into `durations`; a video too long for any group is alone in its own
+    """
+    max_input_tokens = max_input_tokens or settings.gemini_multi_max_input_tokens
+    max_output_tokens = max_output_tokens or settings.gemini_multi_max_output_tokens
+    group_size = max(1, min(group_size, max_output_tokens // OUTPUT_TOKENS_PER_VIDEO))
+
+    groups: list[list[int]] = []
+    loads: list[int] = []
+    for index in sorted(range(len(durations)), key=lambda i: durations[i], reverse=True):
+        tokens = estimate_video_tokens(durations[index])
+        for g, group in enumerate(groups):
+            if len(group) < group_size and loads[g] + tokens <= max_input_tokens:
+                group.append(index)
+                loads[g] += tokens
+                break
+        else:
+            groups.append([index])
+            loads.append(tokens)
+    return groups
+
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        lines = text.split("\n")
+        text = "\n".join(lines[1:-1] if lines[-1].strip().startswith("```") else lines[1:])
+    return text.strip()
+
+
+def _salvage_objects(text: str) -> list:
+    """Complete JSON objects from a (possibly truncated) JSON array."""
+    decoder = json.JSONDecoder()
+    objects = []
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            obj, end = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            break
+        objects.append(obj)
+        pos = text.find("{", end)
+    return objects
+
+
+def parse_multi_response(text: str, count: int) -> list[Optional[dict]]:
+    """
+    Split a multi-video response into one analysis dict per video.
+
+    Objects are placed by their video_index. If any object carries a valid
+    one, objects without a valid index, or sharing one with another object,
+    are dropped; only when none does (including a lone analysis) are slots
+    filled by position. Slots left None are analyzed individually by the
+    caller rather than risk attributing an analysis to the wrong video.
+
+    Args:
+        text: Raw response text
+        count: Number of videos in the request
+
+    Returns:
+        A list of `count` entries; None where no analysis was found
+    """
+    text = _strip_fences(text)
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = _salvage_objects(text)
+        logger.warning(f"Multi-video response was not valid JSON; salvaged {len(parsed)}/{count} analyses")
+
+    if isinstance(parsed, dict):
+        # {"videos": [...]}, {"Video 1": {...}, ...} or a lone analysis
+        lists = [v for v in parsed.values() if isinstance(v, list) and all(isinstance(x, dict) for x in v)]
+        if lists:
+            parsed = lists[0]
+        elif parsed and all(isinstance(v, dict) for v in parsed.values()):
+            parsed = list(parsed.values())
+        else:
+            parsed = [parsed]
+
+    indexed: list[tuple[Optional[int], dict]] = []
+    for obj in parsed if isinstance(parsed, list) else []:
+        if not isinstance(obj, dict):
+            continue
+        try:
+            index = int(obj.pop("video_index", 0)) - 1
+        except (TypeError, ValueError):
+            index = -1
+        indexed.append((index if 0 <= index < count else None, obj))
+
+    results: list[Optional[dict]] = [None] * count
+    if not any(index is not None for index, _ in indexed):
+        for slot, (_, obj) in enumerate(indexed[:count]):
+            results[slot] = obj
+        return results
+
+    claims = Counter(index for index, _ in indexed if index is not None)
+    for index, obj in indexed:
+        if index is not None and claims[index] == 1:
+            results[index] = obj
+    dropped = len(indexed) - sum(1 for r in results if r is not None)
+    if dropped:
+        logger.warning(f"Dropped {dropped} multi-video analyses with a missing or duplicate video_index")
+    return results
@@ -0,0 +1,239 @@
+"""
+Process-wide adaptive rate limiter for Gemini calls.
+
+Every generate_content call in the process (video analysis, hashtag
+generation, multi-video batches) goes through one AdaptiveRateLimiter. It
+holds two token buckets: requests per minute and tokens per minute. Token
+cost is estimated up front from a running average for the kind of call, and
+corrected with the real usage once the response arrives.
+
+The rate adapts with AIMD. A 429/RESOURCE_EXHAUSTED halves the current rate
+(at most once per DECREASE_GUARD_SECONDS, since many in-flight calls fail
+together) and pauses new calls for the server's retry delay or an escalating
+cooldown. Each success adds settings.gemini_rate_increase RPM back, up to the
+configured ceiling. This lets callers run at the quota ceiling without
+hand-tuned sleeps.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BURST_SECONDS = 5.0  # Bucket capacity, in seconds of the current rate
+DECREASE_GUARD_SECONDS = 10.0  # 429s within this window of a decrease don't decrease again
+BASE_COOLDOWN_SECONDS = 2.0
+MAX_COOLDOWN_SECONDS = 60.0
+DEFAULT_TOKEN_ESTIMATE = 10000  # Tokens assumed for a call kind before any usage is seen
+TOKEN_ESTIMATE_SMOOTHING = 0.2
+
+_RETRY_DELAY_RE = re.compile(r"retry[_ ]?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE)
+# A standalone 429, so IDs, sizes or paths that merely contain the digits don't match
+_STATUS_429_RE = re.compile(r"\b429\b")
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True for Gemini quota/rate errors (HTTP 429, RESOURCE_EXHAUSTED)."""
+    if getattr(exc, "code", None) == 429 or getattr(exc, "status_code", None) == 429:
+        return True
+    if getattr(exc, "status", None) == "RESOURCE_EXHAUSTED":
+        return True
+    message = str(exc)
+    return "RESOURCE_EXHAUSTED" in message or bool(_STATUS_429_RE.search(message))
+
+
+def retry_delay_from(exc: BaseException) -> Optional[float]:
+    """Server-suggested retry delay in seconds, if the error carries one."""
+    match = _RETRY_DELAY_RE.search(str(exc))
+    return float(match.group(1)) if match else None
+
+
+class LimitedCall:
+    """Handle for one admitted call; set actual_tokens from the response usage."""
+
+    def __init__(self, kind: str, estimated_tokens: int):
+        self.kind = kind
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+
+
+class AdaptiveRateLimiter:
+    """RPM and TPM token buckets whose rate adapts with AIMD."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        min_requests_per_minute: Optional[float] = None,
+        decrease_factor: Optional[float] = None,
+        increase_per_success: Optional[float] = None,
+    ):
+        """
+        Args:
+            requests_per_minute: RPM ceiling (the quota)
+            tokens_per_minute: TPM ceiling (the quota)
+            min_requests_per_minute: Floor the rate never drops below
+            decrease_factor: Multiplier applied to the rate on a 429
+            increase_per_success: RPM added back per successful call
+        """
+        self.max_rpm = float(requests_per_minute or settings.gemini_rpm)
+        self.max_tpm = float(tokens_per_minute or settings.gemini_tpm)
+        self.min_rpm = float(min_requests_per_minute or settings.gemini_min_rpm)
+        self.decrease_factor = decrease_factor or settings.gemini_rate_backoff
+        self.increase_per_success = (
+            settings.gemini_rate_increase if increase_per_success is None else increase_per_success
+        )
+
+        self.rpm = self.max_rpm
+        self._lock = threading.Lock()
+        self._request_bucket = 1.0
+        self._token_bucket = self.tpm * BURST_SECONDS / 60
+        self._last_refill = time.monotonic()
+        self._cooldown_until = 0.0
+        self._last_decrease = 0.0
+        self._consecutive_limits = 0
+        self._token_estimates: dict[str, float] = {}
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.tokens_used = 0
+
+    @property
+    def tpm(self) -> float:
+        """Current tokens/minute, scaled with the adaptive request rate."""
+        return self.max_tpm * self.rpm / self.max_rpm
+
+    def estimate_tokens(self, kind: str) -> int:
+        return int(self._token_estimates.get(kind, DEFAULT_TOKEN_ESTIMATE))
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_bucket = min(
+            self._request_bucket + elapsed * self.rpm / 60,
+            max(1.0, self.rpm * BURST_SECONDS / 60),
+        )
+        self._token_bucket = min(
+            self._token_bucket + elapsed * self.tpm / 60,
+            self.tpm * BURST_SECONDS / 60,
+        )
+
+    def _try_reserve(self, tokens: int) -> float:
+        """Reserve one request and `tokens`; return 0 on success, else seconds to wait."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._cooldown_until:
+            return self._cooldown_until - now
+        if self._request_bucket < 1:
+            return (1 - self._request_bucket) * 60 / self.rpm
+        # The token bucket may go into debt for one large call; later calls wait it out
+        if tokens and self._token_bucket <= 0:
+            return (1 - self._token_bucket) * 60 / self.tpm
+        self._request_bucket -= 1
+        self._token_bucket -= tokens
+        self.requests += 1
+        return 0.0
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request and `tokens` fit in the current rate."""
+        while True:
+            with self._lock:
+                wait = self._try_reserve(tokens)
+            if wait <= 0:
+                return
+            # Re-check periodically: the rate can change while we wait
+            await asyncio.sleep(min(wait, 5.0))
+
+    def record_success(self, kind: str, estimated_tokens: int, actual_tokens: Optional[int] = None) -> None:
+        """Additive increase, and settle the token estimate against real usage."""
+        with self._lock:
+            if actual_tokens is not None:
+                self._token_bucket -= actual_tokens - estimated_tokens
+                self.tokens_used += actual_tokens
+                previous = self._token_estimates.get(kind)
+                self._token_estimates[kind] = (
+                    actual_tokens if previous is None
+                    else TOKEN_ESTIMATE_SMOOTHING * actual_tokens + (1 - TOKEN_ESTIMATE_SMOOTHING) * previous
+                )
+            self._consecutive_limits = 0
+            self.rpm = min(self.max_rpm, self.rpm + self.increase_per_success)
+
+    def record_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease and a pause before the next call."""
+        with self._lock:
+            now = time.monotonic()
+            self.rate_limited += 1
+            self._consecutive_limits += 1
+            if now - self._last_decrease >= DECREASE_GUARD_SECONDS:
+                self.rpm = max(self.min_rpm, self.rpm * self.decrease_factor)
+                self._last_decrease = now
+            cooldown = retry_after or min(
+                BASE_COOLDOWN_SECONDS * 2 ** (self._consecutive_limits - 1), MAX_COOLDOWN_SECONDS
+            )
+            self._cooldown_until = max(self._cooldown_until, now + cooldown)
+            self._request_bucket = min(self._request_bucket, 0.0)  # No burst after a limit
+            logger.warning(
+                f"Gemini rate limited: rate now {self.rpm:.1f} RPM, pausing {cooldown:.0f}s"
+            )
+
+    @asynccontextmanager
+    async def limit(self, kind: str = "default", estimated_tokens: Optional[int] = None) -> AsyncIterator[LimitedCall]:
+        """
+        Admit one Gemini call and feed its outcome back into the rate.
+
+        Usage:
+            async with limiter.limit("video_analysis") as call:
+                response = await client.aio.models.generate_content(...)
+                call.actual_tokens = response.usage_metadata.total_token_count
+
+        Args:
+            kind: Call category, used to learn typical token cost
+            estimated_tokens: Token cost to reserve (defaults to the learned estimate)
+        """
+        call = LimitedCall(kind, self.estimate_tokens(kind) if estimated_tokens is None else estimated_tokens)
+        await self.acquire(call.estimated_tokens)
+        try:
+            yield call
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.record_rate_limited(retry_delay_from(e))
+            raise
+        self.record_success(kind, call.estimated_tokens, call.actual_tokens)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "current_rpm": round(self.rpm, 2),
+                "max_rpm": self.max_rpm,
+                "current_tpm": round(self.tpm),
+                "max_tpm": self.max_tpm,
+                "available_requests": round(self._request_bucket, 2),
+                "available_tokens": round(self._token_bucket),
+                "backing_off": now < self._cooldown_until,
+                "cooldown_remaining_seconds": round(max(self._cooldown_until - now, 0.0), 1),
+                "consecutive_rate_limits": self._consecutive_limits,
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "tokens_used": self.tokens_used,
+                "token_estimates": {k: round(v) for k, v in self._token_estimates.items()},
+            }
+
+
+_rate_limiter: Optional[AdaptiveRateLimiter] = None
+
+
+def get_gemini_rate_limiter() -> AdaptiveRateLimiter:
+    """Get the process-wide Gemini rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = AdaptiveRateLimiter()
+    return _rate_limiter
@@ -0,0 +1,168 @@
+"""
+Failure classification and retry policy for Gemini analysis.
+
+Failures are sorted into four kinds:
+- transient: 5xx, timeouts, dropped connections, a file stuck in PROCESSING.
+  Retried in place with jittered exponential backoff.
+- quota: 429/RESOURCE_EXHAUSTED. Not retried in place and not counted as an
+  attempt. The video goes to a QuotaRetryQueue, which re-runs it after the
+  shared rate limiter's cooldown.
+- permanent: bad requests, missing permissions, files that failed processing,
+  keys without billing. Returned as failures immediately.
+- parse: the model answered but not with valid JSON. Regenerated against the
+  same uploaded file a limited number of times.
+"""
+
+import asyncio
+import logging
+import random
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Awaitable, Callable, Generic, Optional, TypeVar
+
+from config.settings import settings
+from .rate_limiter import get_gemini_rate_limiter, is_rate_limit_error
+
+if TYPE_CHECKING:
+    from .gemini import VideoAnalysis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TRANSIENT_STATUS_CODES = (408, 500, 502, 503, 504)
+TRANSIENT_MARKERS = ("UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED", "timed out", "Timeout", "Connection")
+# API errors render as "<code> <STATUS>. ..."; elsewhere only a standalone code
+# counts, so sizes or IDs containing the digits don't
+_LEADING_STATUS_RE = re.compile(r"^\s*(\d{3})\b")
+_TRANSIENT_STATUS_RE = re.compile(r"\b(?:" + "|".join(str(c) for c in TRANSIENT_STATUS_CODES) + r")\b")
+
+
+class FailureKind(str, Enum):
+    TRANSIENT = "transient"
+    QUOTA = "quota"
+    PERMANENT = "permanent"
+    PARSE = "parse"
+
+
+class FileProcessingTimeout(RuntimeError):
+    """An uploaded file did not become ACTIVE in time (usually succeeds on re-upload)."""
+
+
+class FileProcessingFailed(RuntimeError):
+    """Gemini could not process an uploaded file."""
+
+
+class AnalysisParseError(ValueError):
+    """The model response was not valid JSON."""
+
+    def __init__(self, message: str, response_text: str, usage: dict):
+        super().__init__(message)
+        self.response_text = response_text
+        self.usage = usage
+
+
+def classify_failure(exc: BaseException) -> FailureKind:
+    """Classify an exception raised while analyzing a video."""
+    if isinstance(exc, AnalysisParseError):
+        return FailureKind.PARSE
+    if isinstance(exc, FileProcessingTimeout):
+        return FailureKind.TRANSIENT
+    if isinstance(exc, FileProcessingFailed):
+        return FailureKind.PERMANENT
+    if is_rate_limit_error(exc):
+        # "limit: 0" means the key has no quota at all (billing disabled)
+        return FailureKind.PERMANENT if "limit: 0" in str(exc) else FailureKind.QUOTA
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError, TimeoutError)):
+        return FailureKind.TRANSIENT
+
+    message = str(exc)
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if code is None:
+        leading = _LEADING_STATUS_RE.match(message)
+        code = int(leading.group(1)) if leading else None
+    if code in TRANSIENT_STATUS_CODES:
+        return FailureKind.TRANSIENT
+    if isinstance(code, int) and 400 <= code < 500:
+        return FailureKind.PERMANENT
+
+    if any(marker in message for marker in TRANSIENT_MARKERS) or _TRANSIENT_STATUS_RE.search(message):
+        return FailureKind.TRANSIENT
+    return FailureKind.PERMANENT
+
+
+@dataclass
+class RetryPolicy:
+    """In-place retry limits for transient and parse failures."""
+    max_attempts: int = 0
+    base_delay: float = 0.0
+    max_delay: float = 0.0
+    parse_retries: int = -1
+
+    def __post_init__(self):
+        self.max_attempts = self.max_attempts or settings.gemini_max_attempts
+        self.base_delay = self.base_delay or settings.gemini_retry_base_delay
+        self.max_delay = self.max_delay or settings.gemini_retry_max_delay
+        if self.parse_retries < 0:
+            self.parse_retries = settings.gemini_parse_retries
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class QuotaRetryQueue(Generic[T]):
+    """
+    Items whose analysis hit quota, re-run in rounds once the limiter allows.
+
+    Quota deferrals don't count as attempts; an item is given up on only
+    after settings.gemini_quota_max_deferrals rounds.
+    """
+
+    def __init__(self, max_rounds: Optional[int] = None):
+        self.max_rounds = max_rounds or settings.gemini_quota_max_deferrals
+        self._items: list[T] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def defer(self, item: T) -> None:
+        self._items.append(item)
+
+    async def drain(
+        self,
+        analyze: Callable[[T], Awaitable["VideoAnalysis"]],
+        on_result: Callable[[T, "VideoAnalysis"], None],
+    ) -> int:
+        """
+        Retry deferred items until they stop hitting quota or rounds run out.
+
+        Args:
+            analyze: Runs the analysis for one item
+            on_result: Receives every final result, including items still
+                failing on quota after the last round
+
+        Returns:
+            Number of items that succeeded on a deferred retry
+        """
+        recovered = 0
+        limiter = get_gemini_rate_limiter()
+        for round_num in range(1, self.max_rounds + 1):
+            if not self._items:
+                break
+            batch, self._items = self._items, []
+            cooldown = limiter.get_status()["cooldown_remaining_seconds"]
+            logger.info(
+                f"Retrying {len(batch)} quota-deferred analyses "
+                f"(round {round_num}/{self.max_rounds}, cooldown {cooldown:.0f}s)"
+            )
+            # The limiter holds each call until its cooldown ends
+            results = await asyncio.gather(*(analyze(item) for item in batch))
+            for item, result in zip(batch, results):
+                if result.failure_kind == FailureKind.QUOTA.value and round_num < self.max_rounds:
+                    self._items.append(item)
+                else:
+                    recovered += int(result.success)
+                    on_result(item, result)
+        return recovered
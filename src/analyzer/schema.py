@@ -0,0 +1,131 @@
+"""
+Response schemas for structured Gemini output, and parse-failure accounting.
+
+With settings.gemini_structured_output on, analysis requests set
+response_mime_type="application/json" and a response_schema. The schema is
+generated from the analysis dataclasses, so the model is constrained to emit
+exactly the fields VideoAnalysis reads, with the right types. That leaves
+only truncated responses (output token limit) as a source of invalid JSON.
+
+The schema uses the OpenAPI subset Gemini accepts:
+- str, int, float, bool -> STRING, INTEGER, NUMBER, BOOLEAN
+- list[X] -> ARRAY of X
+- nested dataclass -> OBJECT with every field required, in declaration order
+- list[dict] -> ARRAY of OBJECT. The item fields come from the dataclass
+  field's metadata["items"] ({name: type}), since Gemini rejects objects
+  without properties.
+
+ParseStats counts responses and parse failures separately for structured
+and free-form requests, so the failure rate can be compared before and after
+switching (see GET /gemini/parse-stats and scripts/benchmark_structured_output.py).
+"""
+
+import threading
+import typing
+from dataclasses import fields, is_dataclass
+from typing import Any, Iterable, Optional
+
+_SCALAR_TYPES = {str: "STRING", int: "INTEGER", float: "NUMBER", bool: "BOOLEAN"}
+
+
+def object_schema(properties: dict[str, dict]) -> dict:
+    """OBJECT schema requiring every property, ordered as given."""
+    return {
+        "type": "OBJECT",
+        "properties": properties,
+        "required": list(properties),
+        "property_ordering": list(properties),
+    }
+
+
+def type_schema(tp: Any, items: Optional[dict[str, Any]] = None) -> dict:
+    """
+    Schema for one annotated type.
+
+    Args:
+        tp: Field type (a scalar, list[...], dict or dataclass)
+        items: Item fields ({name: type}) for list[dict] / dict types
+
+    Raises:
+        TypeError: For a type the schema cannot express
+    """
+    if tp in _SCALAR_TYPES:
+        return {"type": _SCALAR_TYPES[tp]}
+    if is_dataclass(tp):
+        return dataclass_schema(tp)
+    origin = typing.get_origin(tp)
+    if origin is list:
+        (item_type,) = typing.get_args(tp) or (str,)
+        return {"type": "ARRAY", "items": type_schema(item_type, items)}
+    if (tp is dict or origin is dict) and items:
+        return object_schema({name: type_schema(t) for name, t in items.items()})
+    raise TypeError(f"No response schema for type {tp!r}")
+
+
+def dataclass_schema(cls: type, only: Optional[Iterable[str]] = None) -> dict:
+    """
+    OBJECT schema for a dataclass.
+
+    Args:
+        cls: Dataclass to describe
+        only: Fields to include, in this order (defaults to all fields, in declaration order)
+    """
+    hints = typing.get_type_hints(cls)
+    by_name = {f.name: f for f in fields(cls)}
+    names = list(only) if only is not None else list(by_name)
+    return object_schema({
+        name: type_schema(hints[name], by_name[name].metadata.get("items"))
+        for name in names
+    })
+
+
+class ParseStats:
+    """Responses and JSON parse failures, split by structured vs free-form requests."""
+
+    MODES = ("structured", "freeform")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {mode: {"responses": 0, "parse_failures": 0} for mode in self.MODES}
+
+    def record(self, structured: bool, parsed: bool, responses: int = 1) -> None:
+        """
+        Count responses and whether they parsed.
+
+        Args:
+            structured: The request used a response schema
+            parsed: The response parsed as JSON
+            responses: Analyses the response carried (several for multi-video requests)
+        """
+        counts = self._counts["structured" if structured else "freeform"]
+        with self._lock:
+            counts["responses"] += responses
+            if not parsed:
+                counts["parse_failures"] += responses
+
+    def reset(self) -> None:
+        with self._lock:
+            for counts in self._counts.values():
+                counts["responses"] = counts["parse_failures"] = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                mode: {
+                    **counts,
+                    "failure_rate": round(counts["parse_failures"] / counts["responses"], 4)
+                    if counts["responses"] else None,
+                }
+                for mode, counts in self._counts.items()
+            }
+
+
+_parse_stats: Optional[ParseStats] = None
+
+
+def get_parse_stats() -> ParseStats:
+    """Get the process-wide parse-failure counters."""
+    global _parse_stats
+    if _parse_stats is None:
+        _parse_stats = ParseStats()
+    return _parse_stats
@@ -0,0 +1,314 @@
+"""
+Shared Gemini Files API uploads.
+
+The UploadManager keeps one remote file per distinct video (keyed by the
+sha256 of its bytes) for as long as it is useful:
+
+- Several prompts can run against one upload. Examples are the
+  entertainment, educational and combined niche modes, a rerun with a
+  different prompt, or a quota-deferred retry. Concurrent acquires of the
+  same video share a single in-flight upload.
+- Uploads can be prefetched a few videos ahead of generation. Upload and
+  processing latency then overlaps with the generate_content calls of
+  earlier videos.
+- Files are not deleted when an analysis finishes. Once no caller holds
+  them and they have been idle for settings.gemini_upload_idle_minutes,
+  they are deleted in batches. Handles close to Gemini's 48h expiry are
+  replaced rather than reused. Runs call flush() when they finish, and the
+  API server sweeps every settings.gemini_upload_sweep_minutes so a
+  partial batch is not left behind.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from google import genai
+
+from config.settings import settings
+from src.downloader.cache import file_sha256
+from .retry import FileProcessingFailed, FileProcessingTimeout
+
+logger = logging.getLogger(__name__)
+
+FILE_POLL_INITIAL = 1.0  # Seconds before the first state poll
+FILE_POLL_MAX = 10.0  # Poll interval cap
+FILE_ACTIVE_TIMEOUT = 120.0  # Give up on a file that is not ACTIVE after this long
+FILE_TTL = timedelta(hours=48)  # Files API retention, when the file carries no expiration_time
+EXPIRY_MARGIN = timedelta(hours=1)  # Don't hand out files expiring sooner than this
+
+
+@dataclass
+class RemoteFile:
+    """An uploaded, ACTIVE file and who is using it."""
+    content_hash: str
+    file: Any  # google.genai File
+    expires_at: datetime
+    refs: int = 0
+    last_used: float = 0.0  # time.monotonic() of the last acquire/release
+    uses: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.file.name
+
+    def is_expiring(self, now: Optional[datetime] = None) -> bool:
+        return (now or datetime.now(timezone.utc)) + EXPIRY_MARGIN >= self.expires_at
+
+
+class UploadManager:
+    """Deduplicated, prefetchable Files API uploads with lazy batched deletion."""
+
+    def __init__(
+        self,
+        client: Optional[genai.Client] = None,
+        max_concurrent_uploads: Optional[int] = None,
+        idle_minutes: Optional[float] = None,
+        delete_batch_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            client: genai client to upload with (defaults to one for settings.gemini_api_key)
+            max_concurrent_uploads: Uploads (including processing waits) in flight at once
+            idle_minutes: Unused files older than this are deleted
+            delete_batch_size: Pending deletions issued together
+        """
+        self.client = client or genai.Client(api_key=settings.gemini_api_key)
+        self.idle_seconds = (idle_minutes or settings.gemini_upload_idle_minutes) * 60
+        self.delete_batch_size = delete_batch_size or settings.gemini_delete_batch_size
+        self._upload_slots = asyncio.Semaphore(max_concurrent_uploads or settings.gemini_upload_concurrency)
+
+        self._files: dict[str, RemoteFile] = {}  # content hash -> remote file
+        self._by_name: dict[str, str] = {}  # remote file name -> content hash
+        self._retired: dict[str, RemoteFile] = {}  # discarded while still held, by name
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._prefetches: set[asyncio.Task] = set()
+        self._pending_deletes: list[str] = []
+        self._hash_memo: dict[tuple[str, int, int], str] = {}
+
+        self.uploads = 0
+        self.reuses = 0
+        self.deletes = 0
+        self.prefetched = 0
+
+    # ==================== Uploading ====================
+
+    def _content_hash(self, video_path: Path) -> str:
+        stat = video_path.stat()
+        memo_key = (str(video_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            digest = file_sha256(video_path)
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    async def _wait_until_active(self, video_file, max_wait: float = FILE_ACTIVE_TIMEOUT):
+        """
+        Poll an uploaded file until Gemini has processed it, backing off between polls.
+
+        Raises:
+            FileProcessingFailed: If Gemini could not process the file
+            FileProcessingTimeout: If the file is not ACTIVE within max_wait seconds
+        """
+        delay = FILE_POLL_INITIAL
+        waited = 0.0
+        while video_file.state.name != "ACTIVE":
+            if video_file.state.name == "FAILED":
+                raise FileProcessingFailed(f"File processing failed: {video_file.name}")
+            if waited >= max_wait:
+                raise FileProcessingTimeout(
+                    f"File did not become ACTIVE after {max_wait:.0f}s. State: {video_file.state.name}"
+                )
+            logger.debug(f"Waiting for {video_file.name} to process... ({waited:.0f}s)")
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, FILE_POLL_MAX)
+            video_file = await self.client.aio.files.get(name=video_file.name)
+
+        logger.info(f"File ready: {video_file.name}")
+        return video_file
+
+    async def _upload(self, video_path: Path, content_hash: str) -> RemoteFile:
+        """Upload a video and wait until it is ACTIVE; failed uploads are deleted."""
+        async with self._upload_slots:
+            video_file = await self.client.aio.files.upload(file=video_path)
+            self.uploads += 1
+            logger.info(f"Uploaded file: {video_file.name}, state: {video_file.state}")
+            try:
+                video_file = await self._wait_until_active(video_file)
+            except Exception:
+                await self._delete(video_file.name)
+                raise
+
+        expires_at = getattr(video_file, "expiration_time", None)
+        if not isinstance(expires_at, datetime):
+            expires_at = datetime.now(timezone.utc) + FILE_TTL
+        elif expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        remote = RemoteFile(content_hash, video_file, expires_at, last_used=time.monotonic())
+        self._files[content_hash] = remote
+        self._by_name[remote.name] = content_hash
+        return remote
+
+    async def _get_or_upload(self, video_path: Path, content_hash: str) -> RemoteFile:
+        remote = self._files.get(content_hash)
+        if remote and not remote.is_expiring():
+            return remote
+        if remote:
+            self._forget(remote)
+        task = self._in_flight.get(content_hash)
+        if task is None:
+            task = asyncio.create_task(self._upload(video_path, content_hash))
+            self._in_flight[content_hash] = task
+            task.add_done_callback(lambda _, key=content_hash: self._in_flight.pop(key, None))
+        # Shielded so one cancelled waiter doesn't cancel the upload for the others
+        return await asyncio.shield(task)
+
+    async def acquire(self, video_path: Path, verify: bool = False):
+        """
+        Get an ACTIVE remote file for a video, uploading only if no usable one exists.
+
+        Every acquire must be paired with a release().
+
+        Args:
+            video_path: Local video
+            verify: Re-check the file's state with the API before reusing it
+                (used on retries, when the file may have been lost)
+
+        Returns:
+            The google.genai File handle
+        """
+        content_hash = await asyncio.to_thread(self._content_hash, video_path)
+        remote = await self._get_or_upload(video_path, content_hash)
+
+        if verify:
+            try:
+                current = await self.client.aio.files.get(name=remote.name)
+                active = current.state.name == "ACTIVE"
+            except Exception:
+                active = False
+            if not active:
+                logger.info(f"Uploaded file {remote.name} is no longer usable; re-uploading")
+                self.discard(remote.file)
+                remote = await self._get_or_upload(video_path, content_hash)
+
+        if remote.uses:
+            self.reuses += 1
+            logger.info(f"Reusing uploaded file {remote.name} for {video_path.name}")
+        remote.uses += 1
+        remote.refs += 1
+        remote.last_used = time.monotonic()
+        return remote.file
+
+    def prefetch(self, video_paths: Iterable[Path]) -> None:
+        """Start uploading videos in the background so a later acquire() finds them ready."""
+        for video_path in video_paths:
+            task = asyncio.create_task(self._prefetch_one(Path(video_path)))
+            self._prefetches.add(task)
+            task.add_done_callback(self._prefetches.discard)
+
+    async def _prefetch_one(self, video_path: Path) -> None:
+        try:
+            content_hash = await asyncio.to_thread(self._content_hash, video_path)
+            if content_hash in self._files or content_hash in self._in_flight:
+                return
+            await self._get_or_upload(video_path, content_hash)
+            self.prefetched += 1
+        except Exception as e:
+            # acquire() uploads again and surfaces the error to the analysis
+            logger.debug(f"Prefetch of {video_path.name} failed: {e}")
+
+    # ==================== Releasing and deleting ====================
+
+    def _forget(self, remote: RemoteFile) -> None:
+        """Stop handing out a file and queue it for deletion once nobody holds it."""
+        if self._files.get(remote.content_hash) is remote:
+            del self._files[remote.content_hash]
+        self._by_name.pop(remote.name, None)
+        if remote.refs > 0:
+            self._retired[remote.name] = remote
+        else:
+            self._pending_deletes.append(remote.name)
+
+    def _remote_for(self, video_file) -> Optional[RemoteFile]:
+        content_hash = self._by_name.get(video_file.name)
+        return self._files.get(content_hash) if content_hash else self._retired.get(video_file.name)
+
+    def discard(self, video_file) -> None:
+        """Mark a file as unusable (expired, FAILED, lost); it is deleted once released."""
+        remote = self._remote_for(video_file)
+        if remote and remote.name not in self._retired:
+            self._forget(remote)
+
+    async def release(self, video_file) -> None:
+        """Return a file from acquire(); it stays available until idle, then is deleted lazily."""
+        remote = self._remote_for(video_file)
+        if remote is not None:
+            remote.refs -= 1
+            remote.last_used = time.monotonic()
+            if remote.refs <= 0 and self._retired.pop(remote.name, None):
+                self._pending_deletes.append(remote.name)
+        await self.sweep()
+
+    async def sweep(self, force: bool = False) -> int:
+        """
+        Queue idle or expiring files for deletion and issue a batch when enough are pending.
+
+        Args:
+            force: Delete everything pending now, regardless of batch size
+
+        Returns:
+            Number of files deleted
+        """
+        now = time.monotonic()
+        for remote in list(self._files.values()):
+            if remote.refs <= 0 and (now - remote.last_used >= self.idle_seconds or remote.is_expiring()):
+                self._forget(remote)
+        if not self._pending_deletes or (not force and len(self._pending_deletes) < self.delete_batch_size):
+            return 0
+
+        names, self._pending_deletes = self._pending_deletes, []
+        await asyncio.gather(*(self._delete(name) for name in names))
+        logger.info(f"Deleted {len(names)} uploaded files")
+        return len(names)
+
+    async def flush(self) -> int:
+        """Delete every file no caller is holding (e.g. at the end of a run)."""
+        for remote in list(self._files.values()):
+            if remote.refs <= 0:
+                self._forget(remote)
+        return await self.sweep(force=True)
+
+    async def _delete(self, name: str) -> None:
+        try:
+            await self.client.aio.files.delete(name=name)
+            self.deletes += 1
+        except Exception:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            "active_files": len(self._files),
+            "in_use": sum(1 for remote in self._files.values() if remote.refs > 0),
+            "in_flight": len(self._in_flight),
+            "pending_deletes": len(self._pending_deletes),
+            "uploads": self.uploads,
+            "reuses": self.reuses,
+            "prefetched": self.prefetched,
+            "deletes": self.deletes,
+        }
+
+
+_upload_manager: Optional[UploadManager] = None
+
+
+def get_upload_manager() -> UploadManager:
+    """Get the process-wide upload manager (for the default API key)."""
+    global _upload_manager
+    if _upload_manager is None:
+        _upload_manager = UploadManager()
+    return _upload_manager
@@ -209,6 +209,50 @@ async def get_metric_trends(days: int = 7):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/velocity/accelerating")
+async def get_accelerating_posts(
+    niche: Optional[str] = None,
+    niche_mode: Optional[str] = None,
+    platform: Optional[str] = None,
+    limit: int = 20,
+):
+    """
+    Get the posts whose views are accelerating fastest.
+
+    Acceleration is the 6h views/hour minus the 24h views/hour, computed
+    from post_metrics snapshots as they are written.
+    """
+    storage = get_storage()
+    if not storage:
+        raise HTTPException(status_code=503, detail="Supabase not configured")
+
+    try:
+        posts = storage.get_accelerating_posts(
+            niche=niche, niche_mode=niche_mode, platform=platform, limit=limit
+        )
+        return {"posts": posts, "count": len(posts), "niche": niche}
+    except Exception as e:
+        logger.error(f"Failed to get accelerating posts: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/velocity/posts/{post_id}")
+async def get_post_metrics(post_id: str, limit: int = 500):
+    """
+    Get the engagement snapshot history for one post, newest first.
+    """
+    storage = get_storage()
+    if not storage:
+        raise HTTPException(status_code=503, detail="Supabase not configured")
+
+    try:
+        snapshots = storage.get_post_metrics(post_id, limit=limit)
+        return {"post_id": post_id, "snapshots": snapshots, "count": len(snapshots)}
+    except Exception as e:
+        logger.error(f"Failed to get post metrics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ==================== Format & Niche Analytics ====================
 
 
@@ -12,10 +12,11 @@ Endpoints:
 
 import asyncio
 import sys
+import time
 import uuid
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Optional, Union
 from pathlib import Path
 import logging
 
@@ -30,12 +31,17 @@ from pydantic import BaseModel, Field
 
 from src.extractor import HashtagExtractor, Platform, ExtractionResult, VideoInfo
 from src.extractor import ProfileExtractor, ProfileInfo, ProfileExtractionResult
-from src.extractor import InstagramExtractor
+from src.extractor import InstagramExtractor, InstagramClientPool
 from src.extractor.youtube_shorts import YouTubeShortsExtractor
+from src.extractor.youtube_client import get_youtube_client
 from src.extractor.substack import SubstackExtractor
-from src.downloader import VideoDownloader, DownloadResult
-from src.analyzer import GeminiAnalyzer, VideoAnalysis, AccountComparer
+from src.downloader import VideoDownloader, DownloadResult, get_ytdlp_pool
+from src.analyzer import GeminiAnalyzer, VideoAnalysis, AccountComparer, get_analysis_cache, summarize_analysis_costs
+from src.analyzer.rate_limiter import get_gemini_rate_limiter
+from src.analyzer.uploads import get_upload_manager
+from src.analyzer.schema import get_parse_stats
 from src.storage import SupabaseStorage
+from src.proxy_pool import get_proxy_pool
 from src.generator import HashtagGenerator
 from src.api.routes import analytics_router
 from config.settings import settings
@@ -64,17 +70,21 @@ app.include_router(analytics_router, prefix="/analytics", tags=["analytics"])
 # Global instances (lazy initialized)
 _extractor: Optional[HashtagExtractor] = None
 _profile_extractor: Optional[ProfileExtractor] = None
-_instagram_extractor: Optional[InstagramExtractor] = None
+_instagram_extractor: Optional[Union[InstagramExtractor, InstagramClientPool]] = None
 _downloader: Optional[VideoDownloader] = None
 _analyzer: Optional[GeminiAnalyzer] = None
 _comparer: Optional[AccountComparer] = None
 _storage: Optional[SupabaseStorage] = None
 _generator: Optional[HashtagGenerator] = None
+_upload_sweeper: Optional[asyncio.Task] = None
+_resumed_batches: set[asyncio.Task] = set()
 
 # Job storage
 jobs: dict[str, dict] = {}
 batch_jobs: dict[str, dict] = {}
 account_jobs: dict[str, dict] = {}
+refresh_jobs: dict[str, dict] = {}
+comment_jobs: dict[str, dict] = {}
 
 
 class JobStatus(str, Enum):
@@ -134,6 +144,9 @@ class PipelineRequest(BaseModel):
         default=None,
         description="Analysis mode: 'entertainment', 'data_engineering', or 'both'. Defaults to global setting."
     )
+    multi_video_group_size: int = Field(
+        default=0, ge=0, le=10, description="Pack up to this many videos per Gemini request (0 or 1: one per video)"
+    )
 
 
 class JobResponse(BaseModel):
@@ -168,6 +181,7 @@ class PipelineResult(BaseModel):
     extraction: Optional[dict] = None
     downloads: Optional[list[dict]] = None
     analyses: Optional[list[dict]] = None
+    timings: Optional[dict] = None
     error: Optional[str] = None
 
 
@@ -200,6 +214,9 @@ class BatchPipelineRequest(BaseModel):
     skip_analysis: bool = False
     store_to_supabase: bool = True
     delay_between_hashtags: Optional[int] = None  # Uses settings default if not specified
+    multi_video_group_size: int = Field(
+        default=0, ge=0, le=10, description="Pack up to this many videos per Gemini request (0 or 1: one per video)"
+    )
 
 
 class BatchJobResponse(BaseModel):
@@ -302,15 +319,23 @@ def get_comparer() -> AccountComparer:
     return _comparer
 
 
-def get_instagram_extractor() -> InstagramExtractor:
-    """Get or create the Instagram extractor."""
+def get_instagram_extractor() -> Union[InstagramExtractor, InstagramClientPool]:
+    """
+    Get or create the Instagram extractor.
+
+    Returns a multi-session InstagramClientPool when INSTAGRAM_ACCOUNTS is
+    configured, otherwise a single-session InstagramExtractor.
+    """
     global _instagram_extractor
     if _instagram_extractor is None:
-        proxy = settings.instagram_proxy if settings.instagram_proxy else None
-        _instagram_extractor = InstagramExtractor(
-            session_path=str(settings.session_dir / "instagram_session.json"),
-            proxy=proxy
-        )
+        if settings.instagram_accounts:
+            _instagram_extractor = InstagramClientPool(accounts=settings.instagram_accounts)
+        else:
+            proxy = settings.instagram_proxy if settings.instagram_proxy else None
+            _instagram_extractor = InstagramExtractor(
+                session_path=str(settings.session_dir / "instagram_session.json"),
+                proxy=proxy
+            )
     return _instagram_extractor
 
 
@@ -339,10 +364,38 @@ async def health_check():
         "gemini_configured": bool(settings.gemini_api_key),
         "supabase_configured": bool(settings.supabase_url and settings.supabase_key),
         "storage": disk_storage,
+        "analysis_cache": get_analysis_cache().get_stats() if settings.analysis_cache_enabled else None,
         "active_jobs": len([j for j in jobs.values() if j["status"] not in [JobStatus.COMPLETED, JobStatus.FAILED]]),
     }
 
 
+@app.get("/proxies")
+async def proxy_pool_status():
+    """Get per-proxy health scores, load and quarantine state."""
+    return get_proxy_pool().get_status()
+
+
+@app.get("/gemini/rate-limit")
+async def gemini_rate_limit_status():
+    """Get the shared Gemini limiter's current rate, budget and backoff state."""
+    return get_gemini_rate_limiter().get_status()
+
+
+@app.get("/gemini/uploads")
+async def gemini_upload_status():
+    """Get the shared Files API upload manager's reuse, prefetch and deletion counts."""
+    return get_analyzer().uploads.get_stats()
+
+
+@app.get("/gemini/parse-stats")
+async def gemini_parse_stats():
+    """Get analysis responses and JSON parse failures, for schema-constrained vs free-form requests."""
+    return {
+        "structured_output": settings.gemini_structured_output,
+        **get_parse_stats().get_stats(),
+    }
+
+
 @app.post("/extract", response_model=ExtractResponse)
 async def extract_videos(request: ExtractRequest):
     """
@@ -407,10 +460,12 @@ async def analyze_videos(request: AnalyzeRequest):
     analyzer = GeminiAnalyzer(api_key=settings.gemini_api_key, niche_mode=niche_mode)
 
     paths = [Path(p) for p in request.video_paths]
-    results = await analyzer.analyze_batch(
-        video_paths=paths,
-        max_concurrent=settings.max_concurrent_analyses,
-    )
+    # Keep cached videos from being evicted while they are analyzed
+    with get_downloader().cache.pinned(paths):
+        results = await analyzer.analyze_batch(
+            video_paths=paths,
+            max_concurrent=settings.max_concurrent_analyses,
+        )
 
     successful = [r for r in results if r.success]
 
@@ -440,6 +495,7 @@ async def run_pipeline(
         "extraction": None,
         "downloads": None,
         "analyses": None,
+        "timings": None,
         "error": None,
         "started_at": None,
         "completed_at": None,
@@ -457,6 +513,8 @@ async def run_pipeline(
 async def run_pipeline_job(job_id: str, request: PipelineRequest) -> None:
     """Background task to run full pipeline."""
     jobs[job_id]["started_at"] = datetime.utcnow().isoformat()
+    timings = jobs[job_id]["timings"] = {}
+    step_started = time.perf_counter()
 
     try:
         # Step 1: Extract
@@ -479,8 +537,10 @@ async def run_pipeline_job(job_id: str, request: PipelineRequest) -> None:
 
         if not extraction.success or not extraction.videos:
             raise Exception(f"Extraction failed: {extraction.error or 'No videos found'}")
+        timings["extract_seconds"] = round(time.perf_counter() - step_started, 2)
 
         # Step 2: Download
+        step_started = time.perf_counter()
         jobs[job_id]["status"] = JobStatus.DOWNLOADING
         logger.info(f"[{job_id}] Downloading {len(extraction.videos)} videos")
 
@@ -491,9 +551,13 @@ async def run_pipeline_job(job_id: str, request: PipelineRequest) -> None:
             urls=urls,
             platform=request.platform.value,
             max_concurrent=settings.max_concurrent_downloads,
+            awaiting_analysis=not request.skip_analysis,
+            purpose="archive" if request.skip_analysis else "analysis",
         )
 
         jobs[job_id]["downloads"] = [d.to_dict() for d in downloads]
+        timings["download_seconds"] = round(time.perf_counter() - step_started, 2)
+        timings["bytes_saved"] = sum(d.bytes_saved for d in downloads)
 
         successful_downloads = [d for d in downloads if d.success and d.file_path]
 
@@ -501,6 +565,7 @@ async def run_pipeline_job(job_id: str, request: PipelineRequest) -> None:
             raise Exception("No videos downloaded successfully")
 
         # Step 3: Analyze (optional)
+        step_started = time.perf_counter()
         if not request.skip_analysis:
             jobs[job_id]["status"] = JobStatus.ANALYZING
             logger.info(f"[{job_id}] Analyzing {len(successful_downloads)} videos")
@@ -510,10 +575,21 @@ async def run_pipeline_job(job_id: str, request: PipelineRequest) -> None:
             analyzer = GeminiAnalyzer(api_key=settings.gemini_api_key, niche_mode=niche_mode)
             paths = [d.file_path for d in successful_downloads]
 
-            analyses = await analyzer.analyze_batch(
-                video_paths=paths,
-                max_concurrent=settings.max_concurrent_analyses,
-            )
+            if request.multi_video_group_size > 1:
+                analyses = await analyzer.analyze_multi(
+                    paths,
+                    group_size=request.multi_video_group_size,
+                    durations=[d.duration_seconds for d in successful_downloads],
+                    max_concurrent=settings.max_concurrent_analyses,
+                )
+            else:
+                analyses = await analyzer.analyze_batch(
+                    video_paths=paths,
+                    max_concurrent=settings.max_concurrent_analyses,
+                )
+            downloader.cache.mark_analyzed(paths)
+            timings["analysis_seconds"] = round(time.perf_counter() - step_started, 2)
+            timings.update(summarize_analysis_costs(analyses))
 
             jobs[job_id]["analyses"] = [a.to_dict() for a in analyses]
 
@@ -560,6 +636,7 @@ async def get_pipeline_status(job_id: str):
         extraction=job["extraction"],
         downloads=job["downloads"],
         analyses=job["analyses"],
+        timings=job.get("timings"),
         error=job["error"],
     )
 
@@ -596,7 +673,7 @@ async def delete_job(job_id: str):
 
 @app.post("/cleanup")
 async def cleanup_old_videos(max_age_hours: int = 24):
-    """Delete videos older than max_age_hours."""
+    """Delete cached videos not used for max_age_hours (pinned and awaiting-analysis videos are kept)."""
     downloader = get_downloader()
     deleted = downloader.cleanup_old_videos(max_age_hours=max_age_hours)
     return {"deleted": deleted}
@@ -682,6 +759,7 @@ async def process_single_hashtag(
     store_to_supabase: bool,
     niche: Optional[str] = None,
     niche_mode: Optional[str] = None,
+    multi_video_group_size: int = 0,
 ) -> dict:
     """
     Process a single hashtag through the full pipeline.
@@ -689,6 +767,7 @@ async def process_single_hashtag(
     Args:
         niche: Business vertical for grouping (e.g., 'dj_nightlife')
         niche_mode: Analysis mode ('entertainment', 'data_engineering', 'both')
+        multi_video_group_size: Videos per Gemini request (<= 1 analyzes one per request)
 
     Returns dict with extraction, download, and analysis results.
     """
@@ -719,10 +798,15 @@ async def process_single_hashtag(
         urls=urls,
         platform=platform.value,
         max_concurrent=settings.max_concurrent_downloads,
+        awaiting_analysis=not skip_analysis,
+        purpose="archive" if skip_analysis else "analysis",
     )
 
     successful_downloads = [d for d in downloads if d.success and d.file_path]
     result["videos_downloaded"] = len(successful_downloads)
+    result["bytes_saved"] = sum(d.bytes_saved for d in downloads)
+    result["cache_hits"] = sum(1 for d in downloads if d.cached)
+    result["cache_misses"] = len(downloads) - result["cache_hits"]
 
     if not successful_downloads:
         raise Exception("No videos downloaded successfully")
@@ -735,11 +819,21 @@ async def process_single_hashtag(
         analyzer = GeminiAnalyzer(api_key=settings.gemini_api_key, niche_mode=effective_niche_mode)
         paths = [d.file_path for d in successful_downloads]
 
-        analyses = await analyzer.analyze_batch(
-            video_paths=paths,
-            max_concurrent=settings.max_concurrent_analyses,
-        )
+        if multi_video_group_size > 1:
+            analyses = await analyzer.analyze_multi(
+                paths,
+                group_size=multi_video_group_size,
+                durations=[d.duration_seconds for d in successful_downloads],
+                max_concurrent=settings.max_concurrent_analyses,
+            )
+        else:
+            analyses = await analyzer.analyze_batch(
+                video_paths=paths,
+                max_concurrent=settings.max_concurrent_analyses,
+            )
+        downloader.cache.mark_analyzed(paths)
         result["videos_analyzed"] = len([a for a in analyses if a.success])
+        result.update(summarize_analysis_costs(analyses))
 
     # Step 4: Store to Supabase (optional)
     if store_to_supabase:
@@ -794,6 +888,8 @@ async def run_batch_pipeline_job(batch_id: str, request: BatchPipelineRequest) -
                 "status": HashtagStatus.PENDING.value,
                 "videos_found": 0,
                 "videos_downloaded": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
                 "videos_analyzed": 0,
                 "error": None,
                 "attempt": 1,
@@ -818,6 +914,7 @@ async def run_batch_pipeline_job(batch_id: str, request: BatchPipelineRequest) -
                     store_to_supabase=request.store_to_supabase,
                     niche=request.niche,
                     niche_mode=request.niche_mode,
+                    multi_video_group_size=request.multi_video_group_size,
                 )
 
                 batch_jobs[batch_id]["results"][hashtag].update(result)
@@ -862,6 +959,7 @@ async def run_batch_pipeline_job(batch_id: str, request: BatchPipelineRequest) -
                         niche=request.niche,
                         niche_mode=request.niche_mode,
                         store_to_supabase=request.store_to_supabase,
+                        multi_video_group_size=request.multi_video_group_size,
                     )
 
                     batch_jobs[batch_id]["results"][hashtag].update(result)
@@ -939,9 +1037,17 @@ class YouTubeShortsRequest(BaseModel):
     order: str = Field(default="relevance", description="Sort order: relevance, date, viewCount")
 
 
+class YouTubeChannelsRequest(BaseModel):
+    channel_ids: list[str] = Field(..., min_length=1, description="YouTube channel IDs (UC...)")
+    count: int = Field(default=30, ge=1, le=200, description="Max Shorts per channel")
+    incremental: bool = Field(default=True, description="Only fetch uploads newer than each channel's last run")
+
+
 class SubstackRequest(BaseModel):
     publication: str = Field(..., description="Publication subdomain (e.g., 'engdata' for engdata.substack.com)")
-    count: int = Field(default=30, ge=1, le=100, description="Number of posts to extract")
+    count: int = Field(default=30, ge=1, le=1000, description="Number of posts to extract (RSS mode returns at most the feed window)")
+    archive: bool = Field(default=False, description="Page the archive API instead of the RSS feed")
+    since: Optional[datetime] = Field(default=None, description="Archive mode: stop at posts published on/before this time")
 
 
 class MultiSubstackRequest(BaseModel):
@@ -983,19 +1089,82 @@ async def extract_youtube_shorts(request: YouTubeShortsRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/extract/youtube-shorts/channels")
+async def extract_youtube_channels(request: YouTubeChannelsRequest):
+    """
+    Extract Shorts from tracked YouTube channels via their uploads playlists.
+
+    Costs about 2 quota units per 50 uploads, versus 100 per search page.
+    With incremental=true only uploads newer than the previous run are returned.
+    """
+    if not settings.youtube_api_key:
+        raise HTTPException(
+            status_code=503,
+            detail="YouTube API key not configured. Set YOUTUBE_API_KEY in .env"
+        )
+
+    try:
+        extractor = YouTubeShortsExtractor(api_key=settings.youtube_api_key)
+        results = await extractor.get_channels_shorts_many(
+            channel_ids=request.channel_ids,
+            count_per_channel=request.count,
+            incremental=request.incremental,
+        )
+
+        return {
+            "channels": {
+                channel_id: {
+                    "success": result.success,
+                    "videos_found": result.videos_found,
+                    "videos": [v.to_dict() for v in result.videos],
+                    "error": result.error,
+                }
+                for channel_id, result in results.items()
+            },
+            "quota": extractor.client.quota.to_dict(),
+        }
+    except Exception as e:
+        logger.error(f"YouTube channel extraction failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/extract/youtube-shorts/quota")
+async def youtube_quota_status():
+    """
+    Get today's YouTube Data API quota usage and response cache counters.
+    """
+    if not settings.youtube_api_key:
+        raise HTTPException(
+            status_code=503,
+            detail="YouTube API key not configured. Set YOUTUBE_API_KEY in .env"
+        )
+    return get_youtube_client(settings.youtube_api_key).get_status()
+
+
 @app.post("/extract/substack")
 async def extract_substack(request: SubstackRequest):
     """
     Extract posts and embedded videos from a Substack publication.
 
     Parses the RSS feed to find posts with embedded videos (YouTube, Loom, etc.).
+    With archive=true, pages the publication archive to reach older posts.
     """
     try:
         extractor = SubstackExtractor()
-        posts, result = await extractor.extract_publication(
-            publication_name=request.publication,
-            count=request.count
-        )
+        if request.archive:
+            posts = [
+                post async for post in extractor.iter_archive(
+                    request.publication,
+                    since=request.since,
+                    max_posts=request.count,
+                )
+            ]
+            result = extractor._build_result(posts, request.count)
+        else:
+            posts, result = await extractor.extract_publication(
+                publication_name=request.publication,
+                count=request.count
+            )
 
         return {
             "success": result.success,
@@ -1062,10 +1231,18 @@ class InstagramUserRequest(BaseModel):
 
 
 class InstagramCommentsRequest(BaseModel):
-    media_id: str = Field(..., description="Instagram media ID (pk)")
+    media_id: str = Field(..., description="Instagram shortcode or media ID (pk)")
     count: int = Field(default=100, ge=1, le=500, description="Number of comments to extract")
 
 
+class InstagramCommentHarvestRequest(BaseModel):
+    media_ids: list[str] = Field(..., min_length=1, description="Instagram shortcodes or media IDs (pk) to harvest")
+    per_post_limit: Optional[int] = Field(default=None, ge=1, description="Max comments per post (None for all)")
+    max_concurrent: int = Field(default=4, ge=1, le=20, description="Posts harvested at the same time")
+    page_size: int = Field(default=50, ge=1, le=200, description="Comments per page request")
+    resume: bool = Field(default=True, description="Resume from stored cursors and skip completed posts")
+
+
 @app.post("/extract/instagram/login")
 async def instagram_login(request: InstagramLoginRequest):
     """
@@ -1098,11 +1275,29 @@ async def instagram_status():
     extractor = get_instagram_extractor()
     return {
         "logged_in": extractor.is_logged_in,
-        "configured": bool(settings.instagram_username and settings.instagram_password),
+        "configured": bool(
+            (settings.instagram_username and settings.instagram_password)
+            or settings.instagram_accounts
+        ),
         "proxy_configured": bool(settings.instagram_proxy),
+        "pool_size": len(settings.instagram_accounts),
     }
 
 
+@app.get("/extract/instagram/pool")
+async def instagram_pool_metrics():
+    """
+    Per-session throughput, error and cooldown metrics for the Instagram session pool.
+    """
+    extractor = get_instagram_extractor()
+    if not isinstance(extractor, InstagramClientPool):
+        raise HTTPException(
+            status_code=400,
+            detail="Instagram session pool not configured. Set INSTAGRAM_ACCOUNTS in .env"
+        )
+    return extractor.get_metrics()
+
+
 @app.post("/extract/instagram/hashtag")
 async def extract_instagram_hashtag(request: InstagramHashtagRequest):
     """
@@ -1213,6 +1408,87 @@ async def extract_instagram_comments(request: InstagramCommentsRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/extract/instagram/comments/harvest")
+async def harvest_instagram_comments(
+    request: InstagramCommentHarvestRequest,
+    background_tasks: BackgroundTasks,
+):
+    """
+    Harvest all comments from many Instagram posts in the background.
+
+    Comments are paged with a cursor, written to the comments table in bulk,
+    and resumable across runs. Returns a job_id to poll.
+    """
+    extractor = get_instagram_extractor()
+
+    if not extractor.is_logged_in:
+        raise HTTPException(
+            status_code=401,
+            detail="Not logged in to Instagram. Call /extract/instagram/login first."
+        )
+
+    storage = get_storage()
+    if not storage:
+        raise HTTPException(status_code=503, detail="Supabase not configured")
+
+    job_id = str(uuid.uuid4())
+    comment_jobs[job_id] = {
+        "job_id": job_id,
+        "status": JobStatus.QUEUED,
+        "media_ids": request.media_ids,
+        "summary": None,
+        "error": None,
+        "started_at": None,
+        "completed_at": None,
+    }
+
+    background_tasks.add_task(run_comment_harvest_job, job_id, request)
+
+    return {
+        "job_id": job_id,
+        "status": JobStatus.QUEUED,
+        "message": f"Comment harvest queued for {len(request.media_ids)} posts",
+    }
+
+
+async def run_comment_harvest_job(job_id: str, request: InstagramCommentHarvestRequest) -> None:
+    """Background task to harvest comments for a list of posts."""
+    comment_jobs[job_id]["started_at"] = datetime.utcnow().isoformat()
+    comment_jobs[job_id]["status"] = JobStatus.EXTRACTING
+
+    try:
+        summary = await get_instagram_extractor().harvest_comments(
+            media_ids=request.media_ids,
+            storage=get_storage(),
+            max_concurrent=request.max_concurrent,
+            per_post_limit=request.per_post_limit,
+            page_size=request.page_size,
+            resume=request.resume,
+        )
+        comment_jobs[job_id]["summary"] = summary
+        comment_jobs[job_id]["status"] = JobStatus.COMPLETED
+        logger.info(f"[{job_id}] Comment harvest completed")
+
+    except Exception as e:
+        logger.error(f"[{job_id}] Comment harvest failed: {e}")
+        comment_jobs[job_id]["status"] = JobStatus.FAILED
+        comment_jobs[job_id]["error"] = str(e)
+
+    finally:
+        comment_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+
+
+@app.get("/extract/instagram/comments/harvest/{job_id}")
+async def get_comment_harvest_status(job_id: str):
+    """
+    Get status of a comment harvest job.
+    """
+    if job_id not in comment_jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return comment_jobs[job_id]
+
+
 @app.post("/extract/instagram/logout")
 async def instagram_logout():
     """
@@ -1301,6 +1577,155 @@ async def list_accounts():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class RefreshAccountsRequest(BaseModel):
+    platform: Optional[Platform] = Field(default=None, description="Only refresh accounts on this platform")
+    video_count: int = Field(default=30, ge=1, le=100, description="Videos to collect per profile")
+    max_concurrent_pages: Optional[int] = Field(default=None, ge=1, le=10, description="Concurrent pages per browser")
+    profile_timeout: Optional[int] = Field(default=None, ge=10, le=300, description="Per-profile timeout in seconds")
+
+
+@app.post("/accounts/refresh")
+async def refresh_accounts(
+    background_tasks: BackgroundTasks,
+    request: Optional[RefreshAccountsRequest] = None,
+):
+    """
+    Refresh profile metadata for every tracked account.
+
+    Profiles are extracted in batches (one warm browser per platform) instead
+    of launching a browser per account. Returns a job_id to poll.
+    """
+    storage = get_storage()
+    if not storage:
+        raise HTTPException(status_code=503, detail="Supabase not configured")
+
+    request = request or RefreshAccountsRequest()
+
+    accounts = storage.list_accounts()
+    if request.platform:
+        accounts = [a for a in accounts if a.get("platform") == request.platform.value]
+
+    if not accounts:
+        raise HTTPException(status_code=400, detail="No tracked accounts to refresh")
+
+    job_id = str(uuid.uuid4())
+
+    refresh_jobs[job_id] = {
+        "job_id": job_id,
+        "status": AccountJobStatus.QUEUED,
+        "progress": {
+            "total": len(accounts),
+            "refreshed": 0,
+            "failed": 0,
+        },
+        "results": {},
+        "error": None,
+        "started_at": None,
+        "completed_at": None,
+    }
+
+    background_tasks.add_task(run_accounts_refresh_job, job_id, accounts, request)
+
+    return {
+        "job_id": job_id,
+        "status": AccountJobStatus.QUEUED,
+        "message": f"Refresh queued for {len(accounts)} accounts",
+    }
+
+
+async def run_accounts_refresh_job(
+    job_id: str,
+    accounts: list[dict],
+    request: RefreshAccountsRequest,
+) -> None:
+    """Background task to refresh all tracked accounts with batched profile extraction."""
+    refresh_jobs[job_id]["started_at"] = datetime.utcnow().isoformat()
+    refresh_jobs[job_id]["status"] = AccountJobStatus.SCRAPING
+    storage = get_storage()
+    profile_extractor = get_profile_extractor()
+
+    try:
+        by_platform: dict[str, list[dict]] = {}
+        for account in accounts:
+            by_platform.setdefault(account["platform"], []).append(account)
+
+        for platform_value, platform_accounts in by_platform.items():
+            try:
+                platform = Platform(platform_value)
+            except ValueError:
+                # One bad account row shouldn't fail the whole refresh
+                logger.warning(f"[{job_id}] Skipping {len(platform_accounts)} accounts with unknown platform: {platform_value}")
+                for account in platform_accounts:
+                    error = f"Unknown platform: {platform_value}"
+                    storage.update_account(account["id"], status="error", scrape_error=error)
+                    refresh_jobs[job_id]["results"][f"{platform_value}/{account['username']}"] = {
+                        "status": "failed", "error": error,
+                    }
+                    refresh_jobs[job_id]["progress"]["failed"] += 1
+                continue
+            logger.info(f"[{job_id}] Refreshing {len(platform_accounts)} {platform_value} accounts")
+
+            extractions = await profile_extractor.extract_profiles_batch(
+                platform=platform,
+                usernames=[a["username"] for a in platform_accounts],
+                video_count=request.video_count,
+                max_concurrent_pages=request.max_concurrent_pages,
+                profile_timeout=request.profile_timeout,
+            )
+
+            for account in platform_accounts:
+                extraction = extractions.get(account["username"].lstrip("@"))
+                key = f"{platform_value}/{account['username']}"
+
+                if extraction and extraction.success and extraction.profile_info:
+                    pi = extraction.profile_info
+                    storage.update_account(
+                        account["id"],
+                        display_name=pi.display_name,
+                        bio=pi.bio,
+                        profile_picture_url=pi.profile_picture_url,
+                        follower_count=pi.follower_count,
+                        following_count=pi.following_count,
+                        post_count=pi.post_count,
+                        is_verified=pi.is_verified,
+                        is_private=pi.is_private,
+                        status="active",
+                    )
+                    refresh_jobs[job_id]["results"][key] = {
+                        "status": "refreshed",
+                        "follower_count": pi.follower_count,
+                        "videos_found": extraction.videos_found,
+                    }
+                    refresh_jobs[job_id]["progress"]["refreshed"] += 1
+                else:
+                    error = extraction.error if extraction else "No result returned"
+                    storage.update_account(account["id"], status="error", scrape_error=error)
+                    refresh_jobs[job_id]["results"][key] = {"status": "failed", "error": error}
+                    refresh_jobs[job_id]["progress"]["failed"] += 1
+
+        refresh_jobs[job_id]["status"] = AccountJobStatus.COMPLETED
+        logger.info(f"[{job_id}] Account refresh completed")
+
+    except Exception as e:
+        logger.error(f"[{job_id}] Account refresh failed: {e}")
+        refresh_jobs[job_id]["status"] = AccountJobStatus.FAILED
+        refresh_jobs[job_id]["error"] = str(e)
+
+    finally:
+        refresh_jobs[job_id]["completed_at"] = datetime.utcnow().isoformat()
+
+
+@app.get("/accounts/refresh/{job_id}")
+async def get_accounts_refresh_status(job_id: str):
+    """
+    Get status of an account refresh job.
+    """
+    if job_id not in refresh_jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return refresh_jobs[job_id]
+
+
 @app.get("/accounts/{account_id}")
 async def get_account(account_id: str):
     """
@@ -1461,6 +1886,8 @@ async def run_account_analysis_job(
             urls=urls,
             platform=platform.value,
             max_concurrent=settings.max_concurrent_downloads,
+            awaiting_analysis=True,
+            purpose="analysis",
         )
 
         successful_downloads = [d for d in downloads if d.success and d.file_path]
@@ -1480,9 +1907,11 @@ async def run_account_analysis_job(
             video_paths=paths,
             max_concurrent=settings.max_concurrent_analyses,
         )
+        downloader.cache.mark_analyzed(paths)
 
         successful_analyses = [a for a in analyses if a.success]
         account_jobs[job_id]["progress"]["videos_analyzed"] = len(successful_analyses)
+        account_jobs[job_id]["progress"].update(summarize_analysis_costs(analyses))
 
         # Step 4: Store posts linked to account
         stored = storage.store_batch(
@@ -1688,6 +2117,14 @@ class BatchProcessRequest(BaseModel):
     max_concurrent_downloads: int = Field(default=5, ge=1, le=10)
     max_concurrent_analyses: int = Field(default=3, ge=1, le=5)
     store_to_supabase: bool = Field(default=True)
+    mode: str = Field(
+        default="concurrent",
+        description=(
+            "'concurrent' (one Gemini call per video), 'multi' (several videos per call) "
+            "or 'batch' (one discounted Gemini batch job, may take hours)"
+        ),
+    )
+    group_size: Optional[int] = Field(default=None, ge=2, le=10, description="Videos per request in 'multi' mode")
 
 
 # In-memory batch job storage
@@ -1771,61 +2208,86 @@ async def get_batch_collect_status(batch_id: str):
     return batch_collect_jobs[batch_id]
 
 
-@app.post("/batch/process/{batch_id}")
-async def batch_process(batch_id: str, request: BatchProcessRequest, background_tasks: BackgroundTasks):
-    """
-    Process a collected batch: download all videos and analyze with Gemini.
-
-    This runs the full pipeline on previously collected URLs.
-    """
-    from src.batch import BatchProcessor
-    from src.batch.analyzer import BatchAnalyzer
-
-    # Check if collection exists
-    if batch_id not in batch_collect_jobs:
-        raise HTTPException(status_code=404, detail="Batch not found. Run /batch/collect first.")
-
-    if batch_collect_jobs[batch_id]["status"] != "completed":
-        raise HTTPException(status_code=400, detail=f"Batch not ready. Status: {batch_collect_jobs[batch_id]['status']}")
-
+def register_batch_process_job(batch_id: str, request: BatchProcessRequest) -> str:
+    """Create the status entry for processing a collected batch and return its process ID."""
     process_job_id = f"{batch_id}_process"
     batch_collect_jobs[process_job_id] = {
         "batch_id": batch_id,
         "process_id": process_job_id,
         "status": "downloading",
+        "mode": request.mode,
         "started_at": datetime.utcnow().isoformat(),
         "progress": {
             "downloaded": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
             "analyzed": 0,
             "stored": 0,
             "total": 0,
         },
         "error": None,
     }
+    return process_job_id
 
-    async def run_processing():
-        try:
-            processor = BatchProcessor()
-            analyzer = BatchAnalyzer(requests_per_minute=30)
-
-            # Load collected items
-            items = processor.load_collection(batch_id)
-            batch_collect_jobs[process_job_id]["progress"]["total"] = len(items)
-
-            # Download all
-            logger.info(f"Downloading {len(items)} items...")
-            batch_collect_jobs[process_job_id]["status"] = "downloading"
-            downloaded_items = await processor.download_batch(
-                items=items,
-                max_concurrent=request.max_concurrent_downloads,
-            )
 
-            downloaded_count = sum(1 for i in downloaded_items if i.get("download_success"))
-            batch_collect_jobs[process_job_id]["progress"]["downloaded"] = downloaded_count
+async def run_batch_process_job(batch_id: str, request: BatchProcessRequest) -> None:
+    """Background task to download, analyze and store a collected batch."""
+    from src.batch import BatchProcessor
+    from src.batch.analyzer import BatchAnalyzer
+
+    process_job_id = f"{batch_id}_process"
+    try:
+        processor = BatchProcessor()
+        analyzer = BatchAnalyzer()
+
+        # Load collected items
+        items = processor.load_collection(batch_id)
+        batch_collect_jobs[process_job_id]["progress"]["total"] = len(items)
+
+        # Download all
+        logger.info(f"Downloading {len(items)} items...")
+        batch_collect_jobs[process_job_id]["status"] = "downloading"
+        downloaded_items = await processor.download_batch(
+            items=items,
+            max_concurrent=request.max_concurrent_downloads,
+        )
+
+        downloaded_count = sum(1 for i in downloaded_items if i.get("download_success"))
+        batch_collect_jobs[process_job_id]["progress"]["downloaded"] = downloaded_count
+        video_items = [i for i in downloaded_items if i.get("content_type") != "article"]
+        cache_hits = sum(1 for i in video_items if i.get("cache_hit"))
+        batch_collect_jobs[process_job_id]["progress"]["cache_hits"] = cache_hits
+        batch_collect_jobs[process_job_id]["progress"]["cache_misses"] = len(video_items) - cache_hits
+        batch_collect_jobs[process_job_id]["progress"]["bytes_saved"] = sum(
+            i.get("bytes_saved", 0) for i in video_items
+        )
+
+        # Analyze all
+        logger.info(f"Analyzing {downloaded_count} videos...")
+        batch_collect_jobs[process_job_id]["status"] = "analyzing"
+        if request.mode == "batch":
+            # Resumes the persisted batch job if this batch was submitted before
+            # (startup_event also does this on its own after a restart)
+            def on_state(state: str) -> None:
+                batch_collect_jobs[process_job_id]["gemini_batch_state"] = state
 
-            # Analyze all
-            logger.info(f"Analyzing {downloaded_count} videos...")
-            batch_collect_jobs[process_job_id]["status"] = "analyzing"
+            analysis_result = await analyzer.analyze_with_batch_api(
+                items=downloaded_items,
+                batch_id=batch_id,
+                niche_mode=request.niche_mode,
+                on_state=on_state,
+                metadata={"request": request.model_dump()},
+            )
+            batch_collect_jobs[process_job_id]["gemini_batch_job"] = analysis_result.job_name
+        elif request.mode == "multi":
+            analysis_result = await analyzer.analyze_multi_video(
+                items=downloaded_items,
+                batch_id=batch_id,
+                group_size=request.group_size,
+                max_concurrent=request.max_concurrent_analyses,
+                niche_mode=request.niche_mode,
+            )
+        else:
             analysis_result = await analyzer.analyze_with_concurrency(
                 items=downloaded_items,
                 batch_id=batch_id,
@@ -1833,59 +2295,90 @@ async def batch_process(batch_id: str, request: BatchProcessRequest, background_
                 niche_mode=request.niche_mode,
             )
 
-            batch_collect_jobs[process_job_id]["progress"]["analyzed"] = analysis_result.analyzed
-
-            # Store to Supabase
-            if request.store_to_supabase:
-                batch_collect_jobs[process_job_id]["status"] = "storing"
-                storage = get_storage()
-                if storage:
-                    results = analyzer.load_results(batch_id)
-                    stored = 0
-                    for item in results:
-                        if item.get("analysis"):
-                            try:
-                                from src.extractor import VideoInfo, Platform
-                                video_info = VideoInfo(
-                                    platform=Platform(item["source"]) if item["source"] in ["tiktok", "youtube_shorts"] else Platform.TIKTOK,
-                                    video_url=item["url"],
-                                    video_id=item.get("video_id", ""),
-                                    author_username=item.get("author", ""),
-                                    likes=item.get("likes", 0),
-                                    views=item.get("views", 0),
-                                    caption=item.get("title", ""),
-                                )
-
-                                from src.analyzer import VideoAnalysis
-                                analysis = VideoAnalysis(**item["analysis"]) if isinstance(item["analysis"], dict) else item["analysis"]
-
-                                storage.store_post(
-                                    video_info=video_info,
-                                    analysis=analysis,
-                                    niche=request.niche,
-                                    niche_mode=request.niche_mode,
-                                )
-                                stored += 1
-                            except Exception as e:
-                                logger.warning(f"Failed to store item: {e}")
-
-                    batch_collect_jobs[process_job_id]["progress"]["stored"] = stored
-
-            # Summary
-            summary = analyzer.get_analysis_summary(analyzer.load_results(batch_id))
-
-            batch_collect_jobs[process_job_id]["status"] = "completed"
-            batch_collect_jobs[process_job_id]["completed_at"] = datetime.utcnow().isoformat()
-            batch_collect_jobs[process_job_id]["summary"] = summary
+        batch_collect_jobs[process_job_id]["progress"]["analyzed"] = analysis_result.analyzed
+        processor.mark_analyzed(downloaded_items)
 
-        except Exception as e:
-            logger.error(f"Batch processing failed: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            batch_collect_jobs[process_job_id]["status"] = "failed"
-            batch_collect_jobs[process_job_id]["error"] = str(e)
+        # Store to Supabase
+        if request.store_to_supabase:
+            batch_collect_jobs[process_job_id]["status"] = "storing"
+            storage = get_storage()
+            if storage:
+                results = analyzer.load_results(batch_id)
+                stored = 0
+                for item in results:
+                    if item.get("analysis"):
+                        try:
+                            from src.extractor import VideoInfo, Platform
+                            video_info = VideoInfo(
+                                platform=Platform(item["source"]) if item["source"] in ["tiktok", "youtube_shorts"] else Platform.TIKTOK,
+                                video_url=item["url"],
+                                video_id=item.get("video_id", ""),
+                                author_username=item.get("author", ""),
+                                likes=item.get("likes", 0),
+                                views=item.get("views", 0),
+                                caption=item.get("title", ""),
+                            )
+
+                            from src.analyzer import VideoAnalysis
+                            analysis = VideoAnalysis(**item["analysis"]) if isinstance(item["analysis"], dict) else item["analysis"]
+
+                            storage.store_post(
+                                video_info=video_info,
+                                analysis=analysis,
+                                niche=request.niche,
+                                niche_mode=request.niche_mode,
+                            )
+                            stored += 1
+                        except Exception as e:
+                            logger.warning(f"Failed to store item: {e}")
+
+                batch_collect_jobs[process_job_id]["progress"]["stored"] = stored
+
+        # Summary
+        summary = analyzer.get_analysis_summary(analyzer.load_results(batch_id))
+
+        batch_collect_jobs[process_job_id]["status"] = "completed"
+        batch_collect_jobs[process_job_id]["completed_at"] = datetime.utcnow().isoformat()
+        batch_collect_jobs[process_job_id]["summary"] = summary
+
+    except Exception as e:
+        logger.error(f"Batch processing failed: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        batch_collect_jobs[process_job_id]["status"] = "failed"
+        batch_collect_jobs[process_job_id]["error"] = str(e)
+
+
+@app.post("/batch/process/{batch_id}")
+async def batch_process(batch_id: str, request: BatchProcessRequest, background_tasks: BackgroundTasks):
+    """
+    Process a collected batch: download all videos and analyze with Gemini.
+
+    This runs the full pipeline on previously collected URLs. Collections
+    are saved to disk, so batches collected before a restart can still be
+    processed.
+    """
+    from src.batch import BatchProcessor
+
+    if batch_id in batch_collect_jobs:
+        if batch_collect_jobs[batch_id]["status"] != "completed":
+            raise HTTPException(status_code=400, detail=f"Batch not ready. Status: {batch_collect_jobs[batch_id]['status']}")
+    else:
+        try:
+            BatchProcessor().load_collection(batch_id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Batch not found. Run /batch/collect first.")
 
-    background_tasks.add_task(run_processing)
+    if request.mode not in ("concurrent", "multi", "batch"):
+        raise HTTPException(status_code=400, detail="mode must be 'concurrent', 'multi' or 'batch'")
+
+    # A batch job resumed at startup may already be polling for this batch
+    running = batch_collect_jobs.get(f"{batch_id}_process")
+    if running and running["status"] not in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail=f"Batch already processing. Status: {running['status']}")
+
+    process_job_id = register_batch_process_job(batch_id, request)
+    background_tasks.add_task(run_batch_process_job, batch_id, request)
 
     return {
         "process_id": process_job_id,
@@ -1912,6 +2405,40 @@ async def list_batch_jobs():
     }
 
 
+async def sweep_idle_uploads(interval: float):
+    """Delete idle Gemini uploads periodically, even when fewer than a delete batch are pending."""
+    uploads = get_upload_manager()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await uploads.sweep(force=True)
+        except Exception as e:
+            logger.warning(f"Upload sweep failed: {e}")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background maintenance tasks and resume pending Gemini batch jobs."""
+    global _upload_sweeper
+
+    if settings.gemini_api_key and settings.gemini_upload_sweep_minutes > 0:
+        _upload_sweeper = asyncio.create_task(sweep_idle_uploads(settings.gemini_upload_sweep_minutes * 60))
+
+    # Gemini batch jobs keep running while the server is down; collect the ones submitted before a restart
+    from src.batch.analyzer import BatchAnalyzer
+
+    for batch_id, state in BatchAnalyzer().pending_batch_jobs().items():
+        saved = state.get("metadata", {}).get("request")
+        request = BatchProcessRequest(**saved) if saved else BatchProcessRequest(
+            batch_id=batch_id, mode="batch", niche_mode=state.get("niche_mode", "data_engineering")
+        )
+        logger.info(f"Resuming processing of batch {batch_id} after restart")
+        register_batch_process_job(batch_id, request)
+        task = asyncio.create_task(run_batch_process_job(batch_id, request))
+        _resumed_batches.add(task)
+        task.add_done_callback(_resumed_batches.discard)
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
@@ -1920,6 +2447,15 @@ async def shutdown_event():
     if _extractor:
         await _extractor.close()
 
+    if _upload_sweeper:
+        _upload_sweeper.cancel()
+    if settings.gemini_api_key:
+        # Upload handles only live in memory, so nothing could reuse them after exit
+        await get_upload_manager().flush()
+
+    if _downloader and _downloader.engine == "pool":
+        get_ytdlp_pool().shutdown(wait=False)
+
 
 # Mount dashboard static files (must be after all API routes)
 # This serves index.html at "/" and other static assets
@@ -1,6 +1,7 @@
 """Batch processing module for large-scale content collection and analysis."""
 
 from .processor import BatchProcessor, BatchJob, BatchStatus, ContentSource, CollectionConfig
+from .refresh_scheduler import EngagementRefreshScheduler
 
 __all__ = [
     "BatchProcessor",
@@ -8,4 +9,5 @@ __all__ = [
     "BatchStatus",
     "ContentSource",
     "CollectionConfig",
+    "EngagementRefreshScheduler",
 ]
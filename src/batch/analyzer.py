@@ -1,8 +1,10 @@
 """
 Batch analyzer for processing many videos with Gemini.
 
-Implements rate-limited batch analysis to handle large volumes efficiently.
-For true 50% cost savings, would need Vertex AI Batch Prediction API.
+Pacing comes from the process-wide Gemini rate limiter
+(src.analyzer.rate_limiter), shared with every other Gemini caller.
+analyze_with_batch_api() instead submits one discounted Gemini batch job
+(see src.batch.gemini_batch).
 """
 
 import asyncio
@@ -11,9 +13,10 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from config.settings import settings
+from src.analyzer.retry import FailureKind, QuotaRetryQueue, classify_failure
 
 logger = logging.getLogger(__name__)
 
@@ -27,29 +30,40 @@ class BatchAnalysisResult:
     failed: int
     results_file: Optional[Path] = None
     error: Optional[str] = None
+    job_name: Optional[str] = None  # Gemini batch job, in batch mode
 
 
 class BatchAnalyzer:
     """
-    Analyzes videos in batches with rate limiting.
+    Analyzes videos in batches.
 
-    Rate limits for Gemini 2.0 Flash:
-    - 10 RPM (requests per minute) for free tier
-    - 1000 RPM for paid tier
-
-    We use conservative rate limiting to avoid quota errors.
+    Requests are paced by the shared adaptive Gemini rate limiter
+    (settings.gemini_rpm / gemini_tpm), which backs off on 429s and ramps
+    back up on success, so no fixed delays are needed here.
     """
 
     def __init__(
         self,
-        requests_per_minute: int = 30,
         output_dir: Optional[Path] = None,
     ):
-        self.rpm = requests_per_minute
-        self.delay_between_requests = 60.0 / requests_per_minute
         self.output_dir = output_dir or Path(settings.cache_dir) / "batch"
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+    @staticmethod
+    def _apply_analysis(item: dict, analysis) -> bool:
+        """Copy an analysis result onto its batch item; returns success."""
+        item["analysis_cache_hit"] = analysis.cache_hit
+        item["analysis_cost_usd"] = analysis.cost_usd
+        item["analysis_failure_kind"] = analysis.failure_kind
+        item["analysis_attempts"] = analysis.attempts
+        if analysis.success:
+            item["analysis"] = analysis.to_dict()
+            item["analysis_error"] = None
+            return True
+        item["analysis"] = None
+        item["analysis_error"] = analysis.error
+        return False
+
     async def analyze_batch(
         self,
         items: list[dict],
@@ -84,12 +98,25 @@ class BatchAnalyzer:
         ]
 
         total = len(video_items)
-        logger.info(f"Starting batch analysis of {total} videos (rate: {self.rpm} RPM)")
+        logger.info(
+            f"Starting batch analysis of {total} videos "
+            f"(rate: {analyzer.rate_limiter.rpm:.0f} RPM)"
+        )
 
         results_file = self.output_dir / f"{batch_id}_results.jsonl"
+        quota_queue: QuotaRetryQueue[dict] = QuotaRetryQueue()
 
+        def record(item: dict) -> None:
+            results.append(item)
+            if save_incrementally:
+                with open(results_file, "a") as f:
+                    f.write(json.dumps(item) + "\n")
+
+        ahead = settings.gemini_prefetch_ahead
         for i, item in enumerate(video_items):
             file_path = Path(item["file_path"])
+            # Upload the next few videos while this one is generating
+            analyzer.uploads.prefetch(Path(next_item["file_path"]) for next_item in video_items[i + 1:i + 1 + ahead])
 
             if not file_path.exists():
                 logger.warning(f"File not found: {file_path}")
@@ -102,14 +129,13 @@ class BatchAnalyzer:
                 logger.info(f"Analyzing {i+1}/{total}: {file_path.name}")
 
                 analysis = await analyzer.analyze_video(file_path)
-
-                if analysis.success:
-                    item["analysis"] = analysis.to_dict()
-                    item["analysis_error"] = None
+                if analysis.failure_kind == FailureKind.QUOTA.value:
+                    # Retried after the rest of the batch, once the quota window resets
+                    quota_queue.defer(item)
+                    continue
+                if self._apply_analysis(item, analysis):
                     analyzed += 1
                 else:
-                    item["analysis"] = None
-                    item["analysis_error"] = analysis.error
                     failed += 1
 
             except Exception as e:
@@ -118,21 +144,28 @@ class BatchAnalyzer:
                 item["analysis_error"] = str(e)
                 failed += 1
 
-            results.append(item)
-
-            # Save incrementally
-            if save_incrementally:
-                with open(results_file, "a") as f:
-                    f.write(json.dumps(item) + "\n")
-
-            # Rate limiting
-            if i < total - 1:  # Don't delay after last item
-                await asyncio.sleep(self.delay_between_requests)
+            record(item)
 
             # Progress update every 10 items
             if (i + 1) % 10 == 0:
                 logger.info(f"Progress: {i+1}/{total} ({analyzed} analyzed, {failed} failed)")
 
+        if len(quota_queue):
+            def record_deferred(item: dict, analysis) -> None:
+                nonlocal analyzed, failed
+                if self._apply_analysis(item, analysis):
+                    analyzed += 1
+                else:
+                    failed += 1
+                record(item)
+
+            await quota_queue.drain(
+                lambda item: analyzer.analyze_video(Path(item["file_path"])), record_deferred
+            )
+
+        # Uploads are kept around for reuse during the batch; delete them now
+        await analyzer.uploads.flush()
+
         logger.info(f"Batch analysis complete: {analyzed}/{total} analyzed, {failed} failed")
 
         return BatchAnalysisResult(
@@ -153,7 +186,7 @@ class BatchAnalyzer:
         """
         Analyze videos with controlled concurrency.
 
-        Faster than sequential but respects rate limits.
+        Faster than sequential; the shared rate limiter keeps it within quota.
         """
         from src.analyzer.gemini import GeminiAnalyzer
 
@@ -171,6 +204,12 @@ class BatchAnalyzer:
 
         results_file = self.output_dir / f"{batch_id}_results.jsonl"
         results_lock = asyncio.Lock()
+        quota_queue: QuotaRetryQueue[dict] = QuotaRetryQueue()
+
+        async def save(item: dict) -> None:
+            async with results_lock:
+                with open(results_file, "a") as f:
+                    f.write(json.dumps(item) + "\n")
 
         async def analyze_one(item: dict, index: int) -> dict:
             nonlocal analyzed, failed
@@ -184,18 +223,22 @@ class BatchAnalyzer:
                     failed += 1
                     return item
 
+                analyzer.uploads.prefetch(
+                    Path(next_item["file_path"])
+                    for next_item in video_items[index + 1:index + 1 + settings.gemini_prefetch_ahead]
+                )
+
                 try:
                     logger.info(f"Analyzing {index+1}/{total}: {file_path.name}")
 
                     analysis = await analyzer.analyze_video(file_path)
-
-                    if analysis.success:
-                        item["analysis"] = analysis.to_dict()
-                        item["analysis_error"] = None
+                    if analysis.failure_kind == FailureKind.QUOTA.value:
+                        # Retried after the rest of the batch, once the quota window resets
+                        quota_queue.defer(item)
+                        return item
+                    if self._apply_analysis(item, analysis):
                         analyzed += 1
                     else:
-                        item["analysis"] = None
-                        item["analysis_error"] = analysis.error
                         failed += 1
 
                 except Exception as e:
@@ -204,16 +247,13 @@ class BatchAnalyzer:
                     item["analysis_error"] = str(e)
                     failed += 1
 
-                # Save result
-                async with results_lock:
-                    with open(results_file, "a") as f:
-                        f.write(json.dumps(item) + "\n")
-
-                # Rate limit delay
-                await asyncio.sleep(self.delay_between_requests)
-
+                await save(item)
                 return item
 
+        async def retry_deferred(item: dict):
+            async with semaphore:
+                return await analyzer.analyze_video(Path(item["file_path"]))
+
         logger.info(f"Starting concurrent batch analysis of {total} videos")
 
         results = await asyncio.gather(
@@ -226,6 +266,299 @@ class BatchAnalyzer:
             if isinstance(r, Exception):
                 failed += 1
 
+        if len(quota_queue):
+            deferred: list[dict] = []
+
+            def record_deferred(item: dict, analysis) -> None:
+                nonlocal analyzed, failed
+                if self._apply_analysis(item, analysis):
+                    analyzed += 1
+                else:
+                    failed += 1
+                deferred.append(item)
+
+            await quota_queue.drain(retry_deferred, record_deferred)
+            for item in deferred:
+                await save(item)
+
+        # Uploads are kept around for reuse during the batch; delete them now
+        await analyzer.uploads.flush()
+
+        logger.info(f"Batch analysis complete: {analyzed}/{total} analyzed, {failed} failed")
+
+        return BatchAnalysisResult(
+            batch_id=batch_id,
+            total=total,
+            analyzed=analyzed,
+            failed=failed,
+            results_file=results_file,
+        )
+
+    async def analyze_multi_video(
+        self,
+        items: list[dict],
+        batch_id: str,
+        group_size: Optional[int] = None,
+        max_concurrent: int = 3,
+        niche_mode: str = "data_engineering",
+    ) -> BatchAnalysisResult:
+        """
+        Analyze videos several to a Gemini request (GeminiAnalyzer.analyze_multi).
+
+        Videos are grouped by duration (the item's "duration", when known) and
+        token budget; any video missing from a group's response is analyzed
+        on its own.
+        """
+        from src.analyzer.gemini import GeminiAnalyzer
+
+        analyzer = GeminiAnalyzer(niche_mode=niche_mode)
+
+        video_items = [
+            item for item in items
+            if item.get("file_path") and item.get("download_success")
+        ]
+        total = len(video_items)
+        analyzed = 0
+        failed = 0
+        results_file = self.output_dir / f"{batch_id}_results.jsonl"
+
+        logger.info(f"Starting multi-video batch analysis of {total} videos")
+        analyses = await analyzer.analyze_multi(
+            [Path(item["file_path"]) for item in video_items],
+            group_size=group_size,
+            durations=[item.get("duration") for item in video_items],
+            max_concurrent=max_concurrent,
+        )
+
+        with open(results_file, "a") as f:
+            for item, analysis in zip(video_items, analyses):
+                if self._apply_analysis(item, analysis):
+                    analyzed += 1
+                else:
+                    failed += 1
+                f.write(json.dumps(item) + "\n")
+
+        # Uploads are kept around for reuse during the batch; delete them now
+        await analyzer.uploads.flush()
+
+        logger.info(f"Batch analysis complete: {analyzed}/{total} analyzed, {failed} failed")
+
+        return BatchAnalysisResult(
+            batch_id=batch_id,
+            total=total,
+            analyzed=analyzed,
+            failed=failed,
+            results_file=results_file,
+        )
+
+    async def analyze_with_batch_api(
+        self,
+        items: list[dict],
+        batch_id: str,
+        niche_mode: str = "data_engineering",
+        service=None,
+        poll_seconds: Optional[float] = None,
+        on_state: Optional[Callable[[str], None]] = None,
+        metadata: Optional[dict] = None,
+    ) -> BatchAnalysisResult:
+        """
+        Analyze videos with a single Gemini batch job.
+
+        If a job for this batch_id was already submitted (e.g. before a
+        restart), polling resumes on it instead of submitting again.
+
+        Args:
+            items: List of items with file_path for videos
+            batch_id: Unique batch identifier
+            niche_mode: Niche for analysis prompt
+            service: Batch backend (defaults to settings.gemini_batch_service)
+            poll_seconds: Interval between job state checks
+            on_state: Called with the job state after every check
+            metadata: JSON data saved with the job state, returned by pending_batch_jobs()
+
+        Returns:
+            BatchAnalysisResult with summary, results file path and job name
+        """
+        from src.analyzer.cache import estimate_cost
+        from src.analyzer.gemini import GeminiAnalyzer, VideoAnalysis
+        from src.analyzer.retry import AnalysisParseError
+        from .gemini_batch import JOB_SUCCEEDED, TERMINAL_STATES, BatchResponse, build_request, get_batch_service
+
+        service = service or get_batch_service()
+        poll_seconds = poll_seconds or settings.gemini_batch_poll_seconds
+        # The local stand-in never calls Gemini, so it can run without a key
+        api_key = settings.gemini_api_key or (None if service.requires_api_key else "offline")
+        analyzer = GeminiAnalyzer(api_key=api_key, niche_mode=niche_mode)
+        prompt = analyzer._get_prompt()
+        response_schema = analyzer.response_schema()
+
+        video_items = [
+            item for item in items
+            if item.get("file_path") and item.get("download_success")
+        ]
+        by_path = {item["file_path"]: item for item in video_items}
+        total = len(video_items)
+        analyzed = 0
+        failed = 0
+
+        results_file = self.output_dir / f"{batch_id}_results.jsonl"
+        state_file = self.output_dir / f"{batch_id}_gemini_batch.json"
+
+        def record(item: dict, analysis: Optional[VideoAnalysis] = None, error: Optional[str] = None) -> None:
+            nonlocal analyzed, failed
+            if analysis and self._apply_analysis(item, analysis):
+                analyzed += 1
+            else:
+                if not analysis:
+                    item["analysis"] = None
+                    item["analysis_error"] = error
+                failed += 1
+            with open(results_file, "a") as f:
+                f.write(json.dumps(item) + "\n")
+
+        state = json.loads(state_file.read_text()) if state_file.exists() else None
+        if state and state.get("service") != service.kind:
+            logger.warning(f"Ignoring {state['service']} batch job {state['job_name']} (using {service.kind})")
+            state = None
+
+        if state:
+            logger.info(f"Resuming Gemini batch job {state['job_name']} for batch {batch_id}")
+            # Cache hits and missing files were settled (and written) before the restart
+            submitted = {r["file_path"] for r in state["requests"]}
+            if results_file.exists():
+                for settled in self.load_results(batch_id):
+                    if settled.get("file_path") in submitted:
+                        continue
+                    if settled.get("analysis"):
+                        analyzed += 1
+                    else:
+                        failed += 1
+        else:
+            # Cache hits and missing files are settled without the batch
+            pending: list[tuple[dict, Optional[str]]] = []
+            for item in video_items:
+                file_path = Path(item["file_path"])
+                if not file_path.exists():
+                    record(item, error="File not found")
+                    continue
+                cache_key = None
+                if analyzer.cache:
+                    cache_key = await asyncio.to_thread(
+                        analyzer.cache.key_for, file_path, prompt, analyzer.model, niche_mode
+                    )
+                    cached = analyzer.cache.get(cache_key, file_path)
+                    if cached:
+                        record(item, cached)
+                        continue
+                pending.append((item, cache_key))
+
+            uploads = await asyncio.gather(
+                *(service.upload(Path(item["file_path"])) for item, _ in pending),
+                return_exceptions=True,
+            )
+            requests = []
+            for (item, cache_key), upload in zip(pending, uploads):
+                if isinstance(upload, Exception):
+                    logger.error(f"Upload failed for {item['file_path']}: {upload}")
+                    record(item, error=str(upload))
+                    continue
+                requests.append({
+                    "file_path": item["file_path"],
+                    "file_name": upload.name,
+                    "cache_key": cache_key,
+                    "request": build_request(upload, prompt, response_schema),
+                })
+
+            if not requests:
+                await analyzer.uploads.flush()
+                logger.info(f"Batch analysis complete: {analyzed}/{total} analyzed, {failed} failed (no batch job needed)")
+                return BatchAnalysisResult(batch_id, total, analyzed, failed, results_file=results_file)
+
+            job_name = await service.submit(
+                analyzer.model,
+                [r.pop("request") for r in requests],
+                display_name=f"batch-{batch_id}",
+            )
+            state = {
+                "service": service.kind,
+                "job_name": job_name,
+                "model": analyzer.model,
+                "niche_mode": niche_mode,
+                "structured_output": response_schema is not None,
+                "submitted_at": datetime.utcnow().isoformat(),
+                "requests": requests,
+                "metadata": metadata or {},
+            }
+            tmp = state_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(state, indent=2))
+            tmp.replace(state_file)
+            logger.info(f"Submitted Gemini batch job {job_name} with {len(requests)} requests")
+
+        # A job that can't be polled (deleted, expired, bad credentials) is given
+        # up, so its requests are recorded as failed instead of polling forever
+        job_state = None
+        poll_error = None
+        poll_failures = 0
+        max_poll_failures = settings.gemini_batch_max_poll_failures
+        while job_state not in TERMINAL_STATES:
+            if job_state is not None or poll_failures:
+                await asyncio.sleep(poll_seconds)
+            try:
+                job_state = await service.get_state(state["job_name"])
+            except Exception as e:
+                poll_failures += 1
+                if classify_failure(e) == FailureKind.PERMANENT or poll_failures >= max_poll_failures:
+                    logger.error(f"Giving up on batch job {state['job_name']} after {poll_failures} failed polls: {e}")
+                    poll_error = f"Batch job {state['job_name']} could not be polled: {e}"
+                    break
+                logger.warning(
+                    f"Failed to poll batch job {state['job_name']} ({poll_failures}/{max_poll_failures}): {e}"
+                )
+                continue
+            poll_failures = 0
+            if on_state:
+                on_state(job_state)
+        if not poll_error:
+            logger.info(f"Gemini batch job {state['job_name']} finished: {job_state}")
+
+        requests = state["requests"]
+        if job_state == JOB_SUCCEEDED and not poll_error:
+            responses = await service.get_responses(state["job_name"])
+        else:
+            responses = []
+        # Responses come back in request order; anything missing counts as failed
+        missing_error = poll_error or f"No response (job {job_state})"
+        responses += [BatchResponse(error=missing_error)] * (len(requests) - len(responses))
+
+        for request, response in zip(requests, responses):
+            file_path = Path(request["file_path"])
+            item = by_path.get(request["file_path"], {"file_path": request["file_path"]})
+            if response.error:
+                record(item, VideoAnalysis(success=False, video_path=str(file_path), error=response.error))
+                continue
+
+            cost_usd = estimate_cost(response.usage) * settings.gemini_batch_discount
+            try:
+                response_text, data = analyzer.parse_response(
+                    response.text, response.usage, structured=state.get("structured_output", False)
+                )
+            except AnalysisParseError as e:
+                record(item, analyzer.unparsed_analysis(file_path, e.response_text, response.usage, cost_usd=cost_usd))
+                continue
+            analysis = analyzer.build_analysis(file_path, data, response_text, response.usage, cost_usd=cost_usd)
+            if analysis.success and request.get("cache_key"):
+                try:
+                    analyzer.cache.put(request["cache_key"], analysis, analyzer.model, niche_mode)
+                except Exception as e:
+                    logger.warning(f"Failed to cache analysis for {file_path.name}: {e}")
+            record(item, analysis)
+
+        await service.release([r["file_name"] for r in requests])
+        state_file.unlink(missing_ok=True)
+
+        # Uploads are kept around for reuse during the batch; delete them now
+        await analyzer.uploads.flush()
+
         logger.info(f"Batch analysis complete: {analyzed}/{total} analyzed, {failed} failed")
 
         return BatchAnalysisResult(
@@ -234,8 +567,19 @@ class BatchAnalyzer:
             analyzed=analyzed,
             failed=failed,
             results_file=results_file,
+            job_name=state["job_name"],
         )
 
+    def pending_batch_jobs(self) -> dict[str, dict]:
+        """Persisted Gemini batch jobs whose results were not collected yet, by batch_id."""
+        pending = {}
+        for state_file in self.output_dir.glob("*_gemini_batch.json"):
+            try:
+                pending[state_file.name.removesuffix("_gemini_batch.json")] = json.loads(state_file.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable batch state {state_file.name}: {e}")
+        return pending
+
     def load_results(self, batch_id: str) -> list[dict]:
         """Load results from a batch analysis."""
         results_file = self.output_dir / f"{batch_id}_results.jsonl"
@@ -282,10 +626,22 @@ class BatchAnalyzer:
                 if analysis.get("brand_safety", {}).get("brand_safety_score"):
                     brand_safety_scores.append(analysis["brand_safety"]["brand_safety_score"])
 
+        # Analysis cache effectiveness and spend
+        analyzed_results = [r for r in results if r.get("analysis")]
+        cache_hits = sum(1 for r in analyzed_results if r.get("analysis_cache_hit"))
+
         return {
             "total": total,
             "analyzed": analyzed,
             "failed": failed,
+            "analysis_cache_hits": cache_hits,
+            "analysis_cache_hit_rate": round(cache_hits / analyzed, 3) if analyzed else 0.0,
+            "analysis_cost_usd": round(sum(
+                r.get("analysis_cost_usd", 0.0) for r in analyzed_results if not r.get("analysis_cache_hit")
+            ), 4),
+            "dollars_saved": round(sum(
+                r.get("analysis_cost_usd", 0.0) for r in analyzed_results if r.get("analysis_cache_hit")
+            ), 4),
             "by_source": by_source,
             "avg_hook_strength": sum(hook_strengths) / len(hook_strengths) if hook_strengths else 0,
             "avg_educational_value": sum(educational_values) / len(educational_values) if educational_values else 0,
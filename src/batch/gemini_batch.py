@@ -0,0 +1,238 @@
+"""
+Gemini Batch API analysis.
+
+Batch mode submits one Gemini batch job per collected batch instead of one
+generate_content call per video. Batch requests are billed at a discount
+(settings.gemini_batch_discount of the interactive price). They complete
+asynchronously, normally within hours and at most 24h.
+
+The flow, driven by BatchAnalyzer.analyze_with_batch_api():
+1. Look up every video in the analysis cache. Hits skip the batch.
+2. Upload the remaining videos and build one request per video.
+3. Submit the job and persist its name and the request -> item mapping to
+   {output_dir}/{batch_id}_gemini_batch.json.
+4. Poll until the job reaches a terminal state. A restarted process finds
+   the persisted job and resumes polling instead of resubmitting. A job that
+   cannot be polled (a permanent error, or
+   settings.gemini_batch_max_poll_failures in a row) is given up and its
+   requests are recorded as failed.
+5. Map responses back to items, in request order. Parse and validate them
+   like interactive responses, then cache them and write the results file.
+
+GeminiBatchService talks to the real API. LocalBatchService is an offline
+stand-in that keeps jobs on disk and "completes" them after a delay, so the
+whole flow can be exercised without network access or spend
+(settings.gemini_batch_service = "local").
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from google import genai
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "JOB_STATE_PENDING"
+JOB_RUNNING = "JOB_STATE_RUNNING"
+JOB_SUCCEEDED = "JOB_STATE_SUCCEEDED"
+TERMINAL_STATES = {JOB_SUCCEEDED, "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+
+@dataclass
+class BatchFile:
+    """An uploaded video as referenced from a batch request."""
+    name: str
+    uri: str
+    mime_type: str = "video/mp4"
+
+
+@dataclass
+class BatchResponse:
+    """One response of a finished batch job, in request order."""
+    text: Optional[str] = None
+    usage: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def build_request(video_file, prompt: str, response_schema: Optional[dict] = None) -> dict:
+    """
+    Batch request (GenerateContentRequest as a dict) for one video and prompt.
+
+    Args:
+        video_file: Uploaded video (anything with uri and mime_type)
+        prompt: Analysis prompt
+        response_schema: Constrain the response to this JSON schema (None for free-form text)
+    """
+    request = {
+        "contents": [
+            {
+                "role": "user",
+                "parts": [
+                    {"file_data": {"file_uri": video_file.uri, "mime_type": video_file.mime_type}},
+                    {"text": prompt},
+                ],
+            }
+        ],
+    }
+    if response_schema is not None:
+        request["config"] = {"response_mime_type": "application/json", "response_schema": response_schema}
+    return request
+
+
+def _usage_of(response) -> dict:
+    usage_metadata = getattr(response, "usage_metadata", None)
+    return {
+        "input_tokens": getattr(usage_metadata, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage_metadata, "candidates_token_count", 0) or 0,
+    }
+
+
+class GeminiBatchService:
+    """Batch jobs on the Gemini Batch API, with uploads through the shared UploadManager."""
+
+    kind = "gemini"
+    requires_api_key = True
+
+    def __init__(self, client: Optional[genai.Client] = None, uploads=None):
+        """
+        Args:
+            client: genai client (defaults to one for settings.gemini_api_key)
+            uploads: UploadManager used for the videos (defaults to the shared one)
+        """
+        from src.analyzer.uploads import get_upload_manager
+
+        self.uploads = uploads or get_upload_manager()
+        self.client = client or self.uploads.client
+        self._held: dict[str, list] = {}  # file name -> acquired handles not yet released
+
+    async def upload(self, video_path: Path) -> BatchFile:
+        # Held until release(), so idle sweeps can't delete it while the job runs
+        video_file = await self.uploads.acquire(video_path)
+        self._held.setdefault(video_file.name, []).append(video_file)
+        return BatchFile(video_file.name, video_file.uri, video_file.mime_type)
+
+    async def release(self, names: list[str]) -> None:
+        """Give back the job's uploads once its results are in."""
+        for name in names:
+            handles = self._held.get(name)
+            if handles:
+                await self.uploads.release(handles.pop())
+                continue
+            # Uploaded before a restart, so unknown to the manager: delete directly
+            try:
+                await self.client.aio.files.delete(name=name)
+            except Exception:
+                pass
+
+    async def submit(self, model: str, requests: list[dict], display_name: str) -> str:
+        job = await self.client.aio.batches.create(
+            model=model,
+            src=requests,
+            config={"display_name": display_name},
+        )
+        return job.name
+
+    async def get_state(self, job_name: str) -> str:
+        job = await self.client.aio.batches.get(name=job_name)
+        return job.state.name
+
+    async def get_responses(self, job_name: str) -> list[BatchResponse]:
+        job = await self.client.aio.batches.get(name=job_name)
+        responses = []
+        for inlined in job.dest.inlined_responses or []:
+            if inlined.error or not inlined.response:
+                responses.append(BatchResponse(error=str(inlined.error or "Empty response")))
+            else:
+                responses.append(BatchResponse(text=inlined.response.text, usage=_usage_of(inlined.response)))
+        return responses
+
+
+class LocalBatchService:
+    """
+    Offline stand-in for the Gemini Batch API.
+
+    Jobs are JSON files under {directory}. A job is PENDING, then RUNNING, then
+    SUCCEEDED once `latency_seconds` have passed since submission. Every
+    request gets the response produced by `responder`. Because state is on
+    disk, submit/restart/resume can be exercised across processes.
+    """
+
+    kind = "local"
+    requires_api_key = False
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        latency_seconds: float = 0.0,
+        responder: Optional[Callable[[dict], str]] = None,
+    ):
+        """
+        Args:
+            directory: Where jobs are kept (defaults to settings.cache_dir/local_batches)
+            latency_seconds: Time from submission to completion
+            responder: Maps a request dict to response text (defaults to an empty analysis)
+        """
+        self.directory = Path(directory or Path(settings.cache_dir) / "local_batches")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.latency_seconds = latency_seconds
+        self.responder = responder or (lambda request: json.dumps({"description": "Local batch stand-in"}))
+
+    def _path(self, job_name: str) -> Path:
+        return self.directory / f"{job_name.rsplit('/', 1)[-1]}.json"
+
+    async def upload(self, video_path: Path) -> BatchFile:
+        digest = hashlib.sha256(str(video_path.resolve()).encode("utf-8")).hexdigest()[:16]
+        return BatchFile(f"local-files/{digest}", video_path.resolve().as_uri())
+
+    async def release(self, names: list[str]) -> None:
+        pass
+
+    async def submit(self, model: str, requests: list[dict], display_name: str) -> str:
+        job_name = f"local-batches/{uuid.uuid4().hex[:12]}"
+        self._path(job_name).write_text(json.dumps({
+            "name": job_name,
+            "model": model,
+            "display_name": display_name,
+            "requests": requests,
+            "created_at": time.time(),
+        }))
+        return job_name
+
+    async def get_state(self, job_name: str) -> str:
+        job = json.loads(self._path(job_name).read_text())
+        elapsed = time.time() - job["created_at"]
+        if elapsed >= self.latency_seconds:
+            return JOB_SUCCEEDED
+        return JOB_RUNNING if elapsed >= self.latency_seconds / 2 else JOB_PENDING
+
+    async def get_responses(self, job_name: str) -> list[BatchResponse]:
+        job = json.loads(self._path(job_name).read_text())
+        responses = []
+        for request in job["requests"]:
+            try:
+                text = self.responder(request)
+            except Exception as e:
+                responses.append(BatchResponse(error=str(e)))
+                continue
+            prompt = request["contents"][0]["parts"][-1]["text"]
+            # Rough token counts so cost reporting has something to show
+            responses.append(BatchResponse(
+                text=text,
+                usage={"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+            ))
+        return responses
+
+
+def get_batch_service() -> GeminiBatchService | LocalBatchService:
+    """Batch service selected by settings.gemini_batch_service ("gemini" or "local")."""
+    if settings.gemini_batch_service == "local":
+        return LocalBatchService()
+    return GeminiBatchService()
@@ -15,6 +15,7 @@ from typing import Optional
 from enum import Enum
 
 from config.settings import settings
+from src.extractor.canonical import canonical_id
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +102,7 @@ class BatchProcessor:
         self.jobs: dict[str, BatchJob] = {}
         self.output_dir = Path(settings.cache_dir) / "batch"
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.video_cache = None  # Set by download_batch
 
     async def collect_youtube_shorts(
         self,
@@ -117,33 +119,30 @@ class BatchProcessor:
         extractor = YouTubeShortsExtractor(api_key=settings.youtube_api_key)
         all_videos = []
 
-        for query in queries:
-            try:
-                logger.info(f"Collecting YouTube Shorts for: {query}")
-                result = await extractor.search_shorts(
-                    query=query,
-                    count=count_per_query,
-                )
-
-                if result.success:
-                    for video in result.videos:
-                        all_videos.append({
-                            "source": ContentSource.YOUTUBE_SHORTS.value,
-                            "url": video.video_url,
-                            "video_id": video.video_id,
-                            "author": video.author_username,
-                            "title": video.caption,
-                            "views": video.views,
-                            "likes": video.likes,
-                            "query": query,
-                        })
-                    logger.info(f"Found {len(result.videos)} shorts for '{query}'")
-                else:
-                    logger.warning(f"YouTube search failed for '{query}': {result.error}")
+        logger.info(f"Collecting YouTube Shorts for {len(queries)} queries")
+        results = await extractor.search_shorts_many(
+            queries=queries,
+            count_per_query=count_per_query,
+        )
 
-            except Exception as e:
-                logger.error(f"Error collecting YouTube Shorts for '{query}': {e}")
+        for query, result in results.items():
+            if result.success:
+                for video in result.videos:
+                    all_videos.append({
+                        "source": ContentSource.YOUTUBE_SHORTS.value,
+                        "url": video.video_url,
+                        "video_id": video.video_id,
+                        "author": video.author_username,
+                        "title": video.caption,
+                        "views": video.views,
+                        "likes": video.likes,
+                        "query": query,
+                    })
+                logger.info(f"Found {len(result.videos)} shorts for '{query}'")
+            else:
+                logger.warning(f"YouTube search failed for '{query}': {result.error}")
 
+        logger.info(f"YouTube quota: {extractor.client.quota.remaining} units remaining today")
         return all_videos
 
     async def collect_tiktok(
@@ -193,49 +192,47 @@ class BatchProcessor:
         count_per_pub: int = 20,
     ) -> list[dict]:
         """Collect Substack articles with embedded videos."""
-        from src.extractor.substack import SubstackExtractor
+        from src.extractor.substack import SubstackExtractor, embed_source
 
-        extractor = SubstackExtractor()
+        # Only embeds and metadata are collected, so post bodies are not kept
+        extractor = SubstackExtractor(keep_content_html=False)
         all_items = []
 
-        for publication in publications:
-            try:
-                logger.info(f"Collecting Substack: {publication}")
-                posts, result = await extractor.extract_publication(
-                    publication_name=publication,
-                    count=count_per_pub,
-                )
-
-                if result.success:
-                    for post in posts:
-                        # Add article itself
-                        all_items.append({
-                            "source": ContentSource.SUBSTACK.value,
-                            "url": post.url,
-                            "video_id": post.id,
-                            "author": post.author,
-                            "title": post.title,
-                            "content_type": "article",
-                            "publication": publication,
-                        })
-
-                        # Add embedded videos
-                        for video in post.embedded_videos:
-                            all_items.append({
-                                "source": f"substack_embed_{video.platform}",
-                                "url": video.url,
-                                "video_id": video.video_id,
-                                "author": post.author,
-                                "title": f"{post.title} (embedded)",
-                                "content_type": "video",
-                                "publication": publication,
-                            })
-                    logger.info(f"Found {len(posts)} posts from {publication}")
-                else:
-                    logger.warning(f"Substack extraction failed for {publication}: {result.error}")
+        logger.info(f"Collecting {len(publications)} Substack publications")
+        results = await extractor.extract_publications(
+            publication_names=publications,
+            count_per_publication=count_per_pub,
+        )
 
-            except Exception as e:
-                logger.error(f"Error collecting Substack {publication}: {e}")
+        for publication, (posts, result) in results.items():
+            if not result.success:
+                logger.warning(f"Substack extraction failed for {publication}: {result.error}")
+                continue
+
+            for post in posts:
+                # Add article itself
+                all_items.append({
+                    "source": ContentSource.SUBSTACK.value,
+                    "url": post.url,
+                    "video_id": canonical_id(post.url, native_id=post.guid).native_id,
+                    "author": post.author,
+                    "title": post.title,
+                    "content_type": "article",
+                    "publication": publication,
+                })
+
+                # Add embedded videos
+                for video_url in post.embedded_videos:
+                    all_items.append({
+                        "source": f"substack_embed_{embed_source(video_url)}",
+                        "url": video_url,
+                        "video_id": extractor._generate_video_id(video_url),
+                        "author": post.author,
+                        "title": f"{post.title} (embedded)",
+                        "content_type": "video",
+                        "publication": publication,
+                    })
+            logger.info(f"Found {len(posts)} posts from {publication}")
 
         return all_items
 
@@ -285,15 +282,55 @@ class BatchProcessor:
                 return_exceptions=True,
             )
 
+            seen: dict[str, dict] = {}
+            removed = 0
             for (source, _), result in zip(tasks, task_results):
                 if isinstance(result, Exception):
                     logger.error(f"Collection failed for {source}: {result}")
                 else:
-                    results[source] = result
-                    results["total"] += len(result)
+                    unique = self.dedupe_items(result, seen)
+                    removed += len(result) - len(unique)
+                    results[source] = unique
+                    results["total"] += len(unique)
+
+            results["duplicates_removed"] = removed
+            if removed:
+                logger.info(f"Dropped {removed} duplicate items across sources")
 
         return results
 
+    def dedupe_items(self, items: list[dict], seen: Optional[dict[str, dict]] = None) -> list[dict]:
+        """
+        Drop items that point at a video already collected under another URL shape.
+
+        Each item gets "platform" and "canonical_key" from its URL. The first
+        occurrence is kept and lists the other sources in "also_seen_in".
+
+        Args:
+            items: Collected items (must have "url")
+            seen: Shared canonical_key -> kept item map, to dedupe across calls
+
+        Returns:
+            Items not seen before, in order
+        """
+        seen = {} if seen is None else seen
+        unique = []
+        for item in items:
+            canonical = canonical_id(item["url"], native_id=item.get("video_id") or None)
+            item["platform"] = canonical.platform.value
+            item["video_id"] = canonical.native_id
+            item["canonical_key"] = canonical.key
+
+            kept = seen.get(canonical.key)
+            if kept is not None:
+                if item.get("source") != kept.get("source"):
+                    kept.setdefault("also_seen_in", []).append(item.get("source"))
+                continue
+
+            seen[canonical.key] = item
+            unique.append(item)
+        return unique
+
     async def download_batch(
         self,
         items: list[dict],
@@ -307,8 +344,17 @@ class BatchProcessor:
         from src.downloader.video import VideoDownloader
 
         downloader = VideoDownloader()
+        self.video_cache = downloader.cache
         semaphore = asyncio.Semaphore(max_concurrent)
 
+        # Download each canonical video once, even if it was collected twice
+        by_key: dict[str, list[dict]] = {}
+        for item in items:
+            key = item.get("canonical_key") or canonical_id(item["url"]).key
+            by_key.setdefault(key, []).append(item)
+        duplicates = {id(group[0]): group[1:] for group in by_key.values() if len(group) > 1}
+        items = [group[0] for group in by_key.values()]
+
         async def download_one(item: dict) -> dict:
             async with semaphore:
                 if item.get("content_type") == "article":
@@ -322,12 +368,17 @@ class BatchProcessor:
                         url=item["url"],
                         video_id=item.get("video_id", ""),
                         platform=item["source"],
+                        awaiting_analysis=True,
+                        purpose="analysis",
                     )
 
                     item["file_path"] = str(result.file_path) if result.file_path else None
                     item["download_success"] = result.success
                     item["file_size"] = result.file_size_bytes
                     item["duration"] = result.duration_seconds
+                    item["cache_hit"] = result.cached
+                    item["original_file_size"] = result.original_file_size_bytes or result.file_size_bytes
+                    item["bytes_saved"] = result.bytes_saved
 
                     if result.metadata:
                         item["metadata"] = result.metadata
@@ -353,12 +404,30 @@ class BatchProcessor:
                 logger.error(f"Download task failed: {result}")
             else:
                 downloaded.append(result)
+                for duplicate in duplicates.get(id(result), []):
+                    for field_name in (
+                        "file_path", "download_success", "file_size", "original_file_size", "bytes_saved",
+                        "duration", "cache_hit", "metadata", "download_error",
+                    ):
+                        if field_name in result:
+                            duplicate[field_name] = result[field_name]
+                    downloaded.append(duplicate)
 
         success_count = sum(1 for item in downloaded if item.get("download_success"))
-        logger.info(f"Downloaded {success_count}/{len(items)} items")
+        cache_hits = sum(1 for item in items if item.get("cache_hit"))
+        bytes_saved = sum(item.get("bytes_saved", 0) for item in items)
+        logger.info(
+            f"Downloaded {success_count}/{len(items)} items ({cache_hits} from cache, "
+            f"{bytes_saved / 1024 / 1024:.1f}MB saved by transcoding)"
+        )
 
         return downloaded
 
+    def mark_analyzed(self, items: list[dict]) -> None:
+        """Let the video cache evict downloaded items once their analysis is done."""
+        if self.video_cache is not None:
+            self.video_cache.mark_analyzed(i["file_path"] for i in items if i.get("file_path"))
+
     def save_collection(self, batch_id: str, items: list[dict]) -> Path:
         """Save collected items to JSON for batch processing."""
         output_file = self.output_dir / f"{batch_id}_collection.json"
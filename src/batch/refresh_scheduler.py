@@ -0,0 +1,321 @@
+"""
+Velocity-prioritized engagement refresh scheduler.
+
+Each tracked post gets a next-due time from its expected views per hour: it is
+refreshed roughly when settings.refresh_target_views new views should have
+accrued. The interval is clamped to the configured min/max, and to a fraction
+of the post's age so young posts are checked often. A heap ordered by due
+time is drained within a global request budget. Since intervals are sized to
+equal expected change, the most overdue post is also the one expected to
+have changed most. Fast-moving posts are refreshed often and cold ones back
+off, without raising total scraping load.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional
+
+from config.settings import settings
+from src.downloader import VideoDownloader
+
+if TYPE_CHECKING:
+    from src.storage import SupabaseStorage
+
+logger = logging.getLogger(__name__)
+
+YOUNG_AGE_FRACTION = 0.25  # Refresh a post at least once per quarter of its age
+RATE_SMOOTHING = 0.5  # Weight of the newest observed views/hour in the estimate
+FAILURE_BACKOFF = 2.0  # Interval multiplier per consecutive failed refresh
+HOT_AGE_HOURS = 48  # Posts younger than this are reported separately
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Parse a Supabase/ISO timestamp into an aware UTC datetime."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _percentiles(values: list[float], points: tuple[int, ...] = (50, 90, 99)) -> dict:
+    """Nearest-rank percentiles, e.g. {"p50": ..., "p90": ..., "p99": ...}."""
+    if not values:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(values)
+    return {
+        f"p{p}": round(ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))], 2)
+        for p in points
+    }
+
+
+@dataclass
+class RefreshTarget:
+    """A post tracked by the scheduler."""
+    post_id: str
+    video_url: str
+    views: int = 0
+    posted_at: Optional[datetime] = None
+    scraped_at: Optional[datetime] = None
+    refreshed_at: Optional[datetime] = None
+    views_per_hour: Optional[float] = None  # Smoothed estimate; None until known
+    due_at: Optional[datetime] = None
+    failures: int = 0
+
+    def age_hours(self, now: datetime) -> Optional[float]:
+        """Hours since posting (scrape time is a lower bound when posted_at is unknown)."""
+        born = self.posted_at or self.scraped_at
+        if not born:
+            return None
+        return max((now - born).total_seconds() / 3600, 0.0)
+
+    def expected_rate(self, now: datetime) -> float:
+        """Expected views per hour: measured velocity, else lifetime average."""
+        if self.views_per_hour is not None:
+            return max(self.views_per_hour, 0.0)
+        age = self.age_hours(now)
+        return self.views / age if age else 0.0
+
+    def staleness_hours(self, now: datetime) -> float:
+        seen_at = self.refreshed_at or self.scraped_at or now
+        return (now - seen_at).total_seconds() / 3600
+
+
+class EngagementRefreshScheduler:
+    """Refresh post engagement in order of expected change, within a request budget."""
+
+    def __init__(
+        self,
+        storage: "SupabaseStorage",
+        downloader: Optional[VideoDownloader] = None,
+        budget_per_hour: Optional[int] = None,
+        target_views: Optional[int] = None,
+        min_interval_minutes: Optional[int] = None,
+        max_interval_hours: Optional[int] = None,
+        batch_size: int = 50,
+    ):
+        """
+        Args:
+            storage: Supabase storage to read posts from and write engagement to
+            downloader: Downloader used for metadata-only fetches
+            budget_per_hour: Global metadata requests per hour
+            target_views: New views expected between refreshes of a post
+            min_interval_minutes: Shortest refresh interval for any post
+            max_interval_hours: Longest refresh interval for any post
+            batch_size: Most refreshes issued per cycle (also the budget burst)
+        """
+        self.storage = storage
+        self.downloader = downloader or VideoDownloader()
+        self.budget_per_hour = budget_per_hour or settings.refresh_budget_per_hour
+        self.target_views = target_views or settings.refresh_target_views
+        self.min_interval_hours = (min_interval_minutes or settings.refresh_min_interval_minutes) / 60
+        self.max_interval_hours = max_interval_hours or settings.refresh_max_interval_hours
+        self.batch_size = batch_size
+
+        self._targets: dict[str, RefreshTarget] = {}
+        self._heap: list[tuple[float, str]] = []  # (due timestamp, post_id); stale entries skipped
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._completions: deque[tuple[float, int]] = deque()  # (monotonic time, refreshes) for the last hour
+
+        self.started_at = time.monotonic()
+        self.refreshed = 0
+        self.failed = 0
+
+    # ==================== Scheduling ====================
+
+    def interval_hours(self, target: RefreshTarget, now: datetime) -> float:
+        """Hours until a post is worth refreshing again."""
+        if target.refreshed_at is None and target.views_per_hour is None and not target.failures:
+            # Nothing measured yet: one early refresh establishes its velocity
+            return self.min_interval_hours
+        rate = target.expected_rate(now)
+        hours = self.target_views / rate if rate > 0 else self.max_interval_hours
+        age = target.age_hours(now)
+        if age is not None:
+            hours = min(hours, age * YOUNG_AGE_FRACTION)
+        hours = min(max(hours, self.min_interval_hours), self.max_interval_hours)
+        if target.failures:
+            hours = min(hours * FAILURE_BACKOFF ** target.failures, self.max_interval_hours)
+        return hours
+
+    def _schedule(self, target: RefreshTarget, now: datetime, base: Optional[datetime] = None) -> None:
+        base = base or target.refreshed_at or target.scraped_at or now
+        target.due_at = base + timedelta(hours=self.interval_hours(target, now))
+        heapq.heappush(self._heap, (target.due_at.timestamp(), target.post_id))
+
+    def load(self) -> int:
+        """
+        Start tracking posts not yet known to the scheduler.
+
+        Returns:
+            Number of newly tracked posts
+        """
+        now = datetime.now(timezone.utc)
+        added = 0
+        for row in self.storage.get_refresh_candidates():
+            if row["id"] in self._targets or not row.get("video_url"):
+                continue
+            target = RefreshTarget(
+                post_id=row["id"],
+                video_url=row["video_url"],
+                views=row.get("views") or 0,
+                posted_at=_parse_timestamp(row.get("posted_at")),
+                scraped_at=_parse_timestamp(row.get("scraped_at")),
+                refreshed_at=_parse_timestamp(row.get("engagement_refreshed_at")),
+                views_per_hour=row.get("views_per_hour"),
+            )
+            self._targets[target.post_id] = target
+            self._schedule(target, now)
+            added += 1
+        if added:
+            logger.info(f"Refresh scheduler tracking {added} new posts ({len(self._targets)} total)")
+        return added
+
+    def _refill_budget(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._tokens + (now - self._last_refill) * self.budget_per_hour / 3600,
+            float(self.batch_size),
+        )
+        self._last_refill = now
+
+    def pop_due(self, limit: int, now: Optional[datetime] = None) -> list[RefreshTarget]:
+        """Remove and return up to `limit` posts whose refresh is due, most overdue first."""
+        now_ts = (now or datetime.now(timezone.utc)).timestamp()
+        due = []
+        while self._heap and len(due) < limit and self._heap[0][0] <= now_ts:
+            due_ts, post_id = heapq.heappop(self._heap)
+            target = self._targets.get(post_id)
+            if target and target.due_at and target.due_at.timestamp() == due_ts:
+                due.append(target)
+        return due
+
+    # ==================== Refreshing ====================
+
+    def _apply(self, target: RefreshTarget, result, now: datetime) -> None:
+        """Update a target's estimate from a refresh result and reschedule it."""
+        if not result.success:
+            target.failures += 1
+            self._schedule(target, now, base=now)
+            return
+
+        if target.refreshed_at:
+            hours = (now - target.refreshed_at).total_seconds() / 3600
+            if hours >= 1 / 60:
+                observed = max(result.views - target.views, 0) / hours
+                target.views_per_hour = (
+                    observed if target.views_per_hour is None
+                    else RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * target.views_per_hour
+                )
+        if result.posted_at and not target.posted_at:
+            target.posted_at = _parse_timestamp(result.posted_at)
+
+        target.views = result.views
+        target.refreshed_at = now
+        target.failures = 0
+        self._schedule(target, now)
+
+    async def refresh_due(self) -> int:
+        """
+        Refresh the posts that are due, as far as the budget allows.
+
+        Returns:
+            Number of posts refreshed this cycle (successful or not)
+        """
+        self._refill_budget()
+        batch = self.pop_due(min(int(self._tokens), self.batch_size))
+        if not batch:
+            return 0
+        self._tokens -= len(batch)
+
+        by_url: dict[str, list[RefreshTarget]] = {}
+        for target in batch:
+            by_url.setdefault(target.video_url, []).append(target)
+
+        rows = []
+        async for result in self.downloader.fetch_metadata_batch(by_url):
+            now = datetime.now(timezone.utc)
+            for target in by_url[result.video_url]:
+                self._apply(target, result, now)
+                if result.success:
+                    rows.append({"id": target.post_id, **result.engagement()})
+                    self.refreshed += 1
+                else:
+                    self.failed += 1
+
+        if rows:
+            try:
+                await asyncio.to_thread(self.storage.update_post_engagement_bulk, rows)
+            except Exception as e:
+                logger.error(f"Failed to write refreshed engagement: {e}")
+
+        self._completions.append((time.monotonic(), len(batch)))
+        return len(batch)
+
+    async def run(
+        self,
+        stop: Optional[asyncio.Event] = None,
+        tick_seconds: float = 10.0,
+        report_minutes: float = 5.0,
+    ) -> None:
+        """
+        Refresh continuously until `stop` is set.
+
+        Args:
+            stop: Event that ends the loop (runs forever if None)
+            tick_seconds: Sleep between cycles when nothing is due or the budget is spent
+            report_minutes: How often to log stats()
+        """
+        stop = stop or asyncio.Event()
+        reload_every = settings.refresh_reload_minutes * 60
+        last_reload = last_report = 0.0
+
+        while not stop.is_set():
+            now = time.monotonic()
+            if now - last_reload >= reload_every:
+                try:
+                    await asyncio.to_thread(self.load)
+                except Exception as e:
+                    logger.error(f"Failed to load refresh candidates: {e}")
+                last_reload = now
+            if now - last_report >= report_minutes * 60:
+                logger.info(f"Refresh scheduler stats: {self.stats()}")
+                last_report = now
+
+            if await self.refresh_due():
+                continue
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    # ==================== Reporting ====================
+
+    def stats(self) -> dict:
+        """Throughput, backlog and staleness percentiles (hours since last refresh)."""
+        now = datetime.now(timezone.utc)
+        cutoff = time.monotonic() - 3600
+        while self._completions and self._completions[0][0] < cutoff:
+            self._completions.popleft()
+        window_minutes = min(max(time.monotonic() - self.started_at, 60), 3600) / 60
+
+        targets = list(self._targets.values())
+        young = [t for t in targets if (t.age_hours(now) or float("inf")) < HOT_AGE_HOURS]
+        return {
+            "tracked": len(targets),
+            "due": sum(1 for t in targets if t.due_at and t.due_at <= now),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "budget_per_hour": self.budget_per_hour,
+            "throughput_per_minute": round(sum(n for _, n in self._completions) / window_minutes, 2),
+            "staleness_hours": _percentiles([t.staleness_hours(now) for t in targets]),
+            f"staleness_hours_under_{HOT_AGE_HOURS}h": _percentiles([t.staleness_hours(now) for t in young]),
+        }
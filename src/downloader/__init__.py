@@ -1,3 +1,15 @@
 from .video import VideoDownloader, DownloadResult
+from .cache import VideoCache, get_video_cache
+from .transcode import VideoTranscoder, format_for
+from .ytdlp_pool import YtdlpWorkerPool, get_ytdlp_pool
 
-__all__ = ["VideoDownloader", "DownloadResult"]
+__all__ = [
+    "VideoDownloader",
+    "DownloadResult",
+    "VideoCache",
+    "get_video_cache",
+    "VideoTranscoder",
+    "format_for",
+    "YtdlpWorkerPool",
+    "get_ytdlp_pool",
+]
@@ -0,0 +1,423 @@
+"""
+Content-addressed video cache.
+
+Downloads are stored under a deterministic name derived from the video's
+canonical (platform, native_id) key, and recorded in a JSON index with the
+file path, size, format, info JSON path and a sha256 of the content. A video
+that is already cached is returned without touching the network.
+
+Identical content reached through two different keys is hardlinked to one
+copy on disk where the filesystem allows it.
+
+The cache is bounded by a disk budget (settings.video_cache_max_gb). The
+index is kept in memory in least-recently-used order with a running byte
+total, so usage queries are O(1); after each download the least recently used
+videos are evicted until the cache fits. Videos pinned by a running job or
+still awaiting analysis are never evicted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from config.settings import settings
+from src.extractor.canonical import canonical_id, canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "cache_index.json"
+
+
+def cache_key(url: str, video_id: str = "", platform: str = "unknown") -> str:
+    """
+    Cache key for a video: its canonical key when the URL is recognized,
+    else platform:video_id, else a hash of the URL.
+    """
+    resolved = canonicalize_url(url)
+    if resolved:
+        return resolved.key
+    if video_id:
+        return f"{platform}:{video_id}"
+    return canonical_id(url).key
+
+
+def cache_filename(key: str) -> str:
+    """Filesystem-safe file stem for a cache key (e.g. 'tiktok_7301234567890')."""
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", key).strip("_")
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """One cached video."""
+    key: str
+    path: str
+    size_bytes: int
+    format: str = ""
+    info_path: Optional[str] = None
+    content_hash: str = ""
+    video_url: str = ""
+    cached_at: str = ""
+    last_access: float = 0.0  # Epoch seconds, drives LRU order
+    awaiting_analysis: bool = False
+    awaiting_since: float = 0.0
+    original_size_bytes: int = 0  # Size before the analysis transcode (0 = not transcoded)
+
+    def is_valid(self) -> bool:
+        """The file still exists with the recorded size."""
+        try:
+            return Path(self.path).stat().st_size == self.size_bytes
+        except OSError:
+            return False
+
+
+class VideoCache:
+    """JSON-indexed, size-bounded LRU cache of downloaded videos, keyed by canonical video key."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: Optional[int] = None,
+        awaiting_ttl_seconds: Optional[int] = None,
+    ):
+        """
+        Args:
+            directory: Directory holding the video files and the index
+            max_bytes: Disk budget (defaults to settings.video_cache_max_gb)
+            awaiting_ttl_seconds: How long an awaiting-analysis flag protects a
+                video from eviction (defaults to settings)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / INDEX_FILENAME
+        self.max_bytes = max_bytes or int(settings.video_cache_max_gb * 1024 ** 3)
+        self.awaiting_ttl_seconds = (
+            awaiting_ttl_seconds or settings.video_cache_awaiting_ttl_hours * 3600
+        )
+
+        # Oldest access first; the running totals make usage queries O(1)
+        self.entries: OrderedDict[str, CacheEntry] = self._load()
+        self._by_path: dict[str, str] = {e.path: e.key for e in self.entries.values()}
+        self.total_bytes = sum(e.size_bytes for e in self.entries.values())
+        self.awaiting_count = sum(1 for e in self.entries.values() if e.awaiting_analysis)
+        self._pins: dict[str, int] = {}
+        self._dirty = False
+
+        # put() runs in worker threads (hashing), so index updates are locked
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.hardlinked = 0
+        self.bytes_deduplicated = 0
+        self.evicted = 0
+        self.bytes_evicted = 0
+
+    def _load(self) -> "OrderedDict[str, CacheEntry]":
+        if not self.index_path.exists():
+            return OrderedDict()
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            known = {f.name for f in fields(CacheEntry)}
+            entries = [
+                CacheEntry(**{k: v for k, v in entry.items() if k in known})
+                for entry in data.get("entries", {}).values()
+            ]
+            entries.sort(key=lambda e: e.last_access)
+            return OrderedDict((e.key, e) for e in entries)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable video cache index: {e}")
+            return OrderedDict()
+
+    def _save(self) -> None:
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"entries": {k: asdict(e) for k, e in self.entries.items()}}),
+            encoding="utf-8",
+        )
+        tmp.replace(self.index_path)
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Write pending access-time updates to the index."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Look up a cached video, counting the hit or miss and marking it recently used.
+
+        Entries whose file is gone or changed size are dropped.
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and not entry.is_valid():
+                logger.debug(f"Dropping stale cache entry {key}")
+                self._forget(entry)
+                self._save()
+                entry = None
+
+            if entry:
+                self.hits += 1
+                entry.last_access = time.time()
+                self.entries.move_to_end(key)
+                # Access times are persisted with the next put/evict/flush
+                self._dirty = True
+            else:
+                self.misses += 1
+            return entry
+
+    def put(
+        self,
+        key: str,
+        video_file: Path,
+        info_file: Optional[Path] = None,
+        video_url: str = "",
+        metadata: Optional[dict] = None,
+        awaiting_analysis: bool = False,
+        original_size_bytes: int = 0,
+    ) -> CacheEntry:
+        """
+        Record a freshly downloaded video.
+
+        If another entry already holds identical content, the new file is
+        replaced by a hardlink to it.
+        """
+        content_hash = file_sha256(video_file)
+        with self._lock:
+            duplicates = [e for e in self.entries.values() if e.content_hash == content_hash]
+        for other in duplicates:
+            if other.key != key and other.is_valid():
+                if self._hardlink(Path(other.path), video_file):
+                    self.hardlinked += 1
+                    self.bytes_deduplicated += other.size_bytes
+                break
+
+        now = time.time()
+        entry = CacheEntry(
+            key=key,
+            path=str(video_file),
+            size_bytes=video_file.stat().st_size,
+            format=(metadata or {}).get("format_id") or video_file.suffix.lstrip("."),
+            info_path=str(info_file) if info_file else None,
+            content_hash=content_hash,
+            video_url=video_url,
+            cached_at=datetime.utcnow().isoformat(),
+            last_access=now,
+            awaiting_analysis=awaiting_analysis,
+            awaiting_since=now if awaiting_analysis else 0.0,
+            original_size_bytes=original_size_bytes,
+        )
+        with self._lock:
+            if key in self.entries:
+                self._forget(self.entries[key])
+            self.entries[key] = entry
+            self._by_path[entry.path] = key
+            self.total_bytes += entry.size_bytes
+            self.awaiting_count += int(awaiting_analysis)
+            self._save()
+        return entry
+
+    def _forget(self, entry: CacheEntry) -> None:
+        """Drop an entry from the index and running totals (caller holds the lock)."""
+        self.entries.pop(entry.key, None)
+        self._by_path.pop(entry.path, None)
+        self.total_bytes -= entry.size_bytes
+        self.awaiting_count -= int(entry.awaiting_analysis)
+        self._dirty = True
+
+    def _remove(self, entry: CacheEntry) -> None:
+        """Delete an entry's files and forget it (caller holds the lock)."""
+        for path in (entry.path, entry.info_path):
+            if path:
+                Path(path).unlink(missing_ok=True)
+        self._forget(entry)
+
+    @staticmethod
+    def _hardlink(source: Path, target: Path) -> bool:
+        """Replace target with a hardlink to source (False if the filesystem refuses)."""
+        if source.resolve() == target.resolve():
+            return False
+        tmp = target.with_name(target.name + ".link")
+        try:
+            os.link(source, tmp)
+            tmp.replace(target)
+            return True
+        except OSError as e:
+            logger.debug(f"Hardlink {target.name} -> {source.name} failed: {e}")
+            tmp.unlink(missing_ok=True)
+            return False
+
+    def _resolve_keys(self, keys_or_paths: Iterable[Union[str, Path]]) -> list[str]:
+        """Accept cache keys or file paths and return the cache keys."""
+        keys = []
+        for item in keys_or_paths:
+            item = str(item)
+            key = item if item in self.entries else self._by_path.get(item)
+            if key:
+                keys.append(key)
+        return keys
+
+    def pin(self, keys_or_paths: Iterable[Union[str, Path]]) -> list[str]:
+        """Protect videos from eviction until unpin(); pins are reference counted."""
+        with self._lock:
+            keys = self._resolve_keys(keys_or_paths)
+            for key in keys:
+                self._pins[key] = self._pins.get(key, 0) + 1
+            return keys
+
+    def unpin(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                remaining = self._pins.get(key, 0) - 1
+                if remaining > 0:
+                    self._pins[key] = remaining
+                else:
+                    self._pins.pop(key, None)
+
+    @contextmanager
+    def pinned(self, keys_or_paths: Iterable[Union[str, Path]]) -> Iterator[list[str]]:
+        """Pin videos for the duration of a block (e.g. while a job analyzes them)."""
+        keys = self.pin(keys_or_paths)
+        try:
+            yield keys
+        finally:
+            self.unpin(keys)
+
+    def mark_awaiting(self, keys_or_paths: Iterable[Union[str, Path]]) -> None:
+        """Protect videos from eviction until mark_analyzed() (or the awaiting TTL)."""
+        with self._lock:
+            now = time.time()
+            for key in self._resolve_keys(keys_or_paths):
+                entry = self.entries[key]
+                if not entry.awaiting_analysis:
+                    entry.awaiting_analysis = True
+                    self.awaiting_count += 1
+                entry.awaiting_since = now
+                self._dirty = True
+
+    def mark_analyzed(self, keys_or_paths: Iterable[Union[str, Path]]) -> None:
+        """Clear the awaiting-analysis flag so the videos become evictable."""
+        with self._lock:
+            for key in self._resolve_keys(keys_or_paths):
+                entry = self.entries[key]
+                if entry.awaiting_analysis:
+                    entry.awaiting_analysis = False
+                    self.awaiting_count -= 1
+                    self._dirty = True
+            self.flush()
+
+    def _is_protected(self, entry: CacheEntry, now: float) -> bool:
+        if self._pins.get(entry.key):
+            return True
+        return entry.awaiting_analysis and now - entry.awaiting_since < self.awaiting_ttl_seconds
+
+    def evict(self, max_bytes: Optional[int] = None) -> dict:
+        """
+        Evict least recently used videos until the cache fits the budget.
+
+        Pinned and awaiting-analysis videos are skipped.
+
+        Returns:
+            Dict with evicted count and bytes_freed
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        evicted = 0
+        freed = 0
+        with self._lock:
+            if self.total_bytes > budget:
+                now = time.time()
+                for entry in list(self.entries.values()):
+                    if self.total_bytes <= budget:
+                        break
+                    if self._is_protected(entry, now):
+                        continue
+                    self._remove(entry)
+                    evicted += 1
+                    freed += entry.size_bytes
+
+                if self.total_bytes > budget:
+                    logger.warning(
+                        f"Video cache over budget after eviction "
+                        f"({self.total_bytes / 1024 ** 3:.2f}GB, rest pinned or awaiting analysis)"
+                    )
+            self.flush()
+
+        if evicted:
+            self.evicted += evicted
+            self.bytes_evicted += freed
+            logger.info(f"Evicted {evicted} cached videos ({freed / 1024 / 1024:.1f}MB)")
+        return {"evicted": evicted, "bytes_freed": freed}
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """Evict unprotected videos not used for max_idle_seconds. Returns the count."""
+        evicted = 0
+        with self._lock:
+            now = time.time()
+            for entry in list(self.entries.values()):
+                # LRU order: everything after the first recent entry is recent too
+                if now - entry.last_access <= max_idle_seconds:
+                    break
+                if self._is_protected(entry, now):
+                    continue
+                self._remove(entry)
+                evicted += 1
+            self.flush()
+        return evicted
+
+    def tracked_paths(self) -> set[str]:
+        """Paths of every cached video and info JSON."""
+        with self._lock:
+            paths = set(self._by_path)
+            paths.update(e.info_path for e in self.entries.values() if e.info_path)
+            return paths
+
+    def usage(self) -> dict:
+        """Disk usage from the in-memory index (no directory scan)."""
+        return {
+            "file_count": len(self.entries),
+            "total_size_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "pinned": len(self._pins),
+            "awaiting_analysis": self.awaiting_count,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / (self.hits + self.misses), 3) if self.hits + self.misses else 0.0,
+            "hardlinked": self.hardlinked,
+            "bytes_deduplicated": self.bytes_deduplicated,
+            "evicted": self.evicted,
+            "bytes_evicted": self.bytes_evicted,
+        }
+
+
+_video_caches: dict[Path, VideoCache] = {}
+
+
+def get_video_cache(directory: Path) -> VideoCache:
+    """Shared cache for a directory, so every downloader writing there sees one index."""
+    directory = Path(directory).resolve()
+    if directory not in _video_caches:
+        _video_caches[directory] = VideoCache(directory)
+    return _video_caches[directory]
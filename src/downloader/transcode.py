@@ -0,0 +1,152 @@
+"""
+Per-purpose download formats and the analysis transcoding stage.
+
+Gemini samples video frames at a low rate, so full-HD uploads mostly cost
+download bandwidth, upload time and disk. Downloads for analysis request a
+height-capped format, and can be downscaled/re-encoded further with ffmpeg.
+Archive downloads keep the original best mp4.
+
+ffmpeg runs as its own process; VideoTranscoder bounds how many run at once
+(settings.transcode_workers), which makes it the transcoding process pool.
+"""
+
+import asyncio
+import logging
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PURPOSES = ("archive", "analysis")
+
+
+def format_for(purpose: str) -> str:
+    """
+    yt-dlp format selector for a download purpose.
+
+    Args:
+        purpose: "archive" (best mp4) or "analysis" (capped at settings.analysis_max_height)
+    """
+    if purpose == "analysis":
+        h = settings.analysis_max_height
+        # Fall back to the best format when nothing is under the cap; the transcoder shrinks it
+        return f"best[height<={h}][ext=mp4]/best[height<={h}]/best[ext=mp4]/best"
+    return "best[ext=mp4]/best"
+
+
+@dataclass
+class TranscodeResult:
+    """Outcome of one transcode."""
+    file_path: Path
+    original_bytes: int
+    reduced_bytes: int
+    seconds: float = 0.0
+    transcoded: bool = False
+    error: Optional[str] = None
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.reduced_bytes
+
+
+class VideoTranscoder:
+    """Downscale and re-encode videos for analysis with a bounded set of ffmpeg processes."""
+
+    def __init__(
+        self,
+        max_height: Optional[int] = None,
+        crf: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            max_height: Output height cap in pixels
+            crf: x264 constant rate factor (higher = smaller)
+            max_workers: ffmpeg processes allowed at once
+        """
+        self.max_height = max_height or settings.transcode_max_height
+        self.crf = crf or settings.transcode_crf
+        self.ffmpeg_path = shutil.which("ffmpeg")
+        self._semaphore = asyncio.Semaphore(max_workers or settings.transcode_workers)
+
+    @property
+    def available(self) -> bool:
+        return self.ffmpeg_path is not None
+
+    def _command(self, source: Path, target: Path) -> list[str]:
+        return [
+            self.ffmpeg_path,
+            "-y", "-loglevel", "error",
+            "-i", str(source),
+            "-vf", f"scale=-2:'min({self.max_height},ih)'",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", str(self.crf),
+            "-c:a", "aac", "-b:a", "64k",
+            "-movflags", "+faststart",
+            str(target),
+        ]
+
+    async def transcode(self, source: Path, source_height: Optional[int] = None) -> TranscodeResult:
+        """
+        Shrink a video in place (as .mp4) if that makes it smaller.
+
+        Videos already at or under the height cap are left alone, as is the
+        original whenever the re-encode is not smaller or ffmpeg fails.
+
+        Args:
+            source: Downloaded video file
+            source_height: Height from the download metadata, if known
+
+        Returns:
+            TranscodeResult with the path to use and the original/reduced sizes
+        """
+        original_bytes = source.stat().st_size
+        unchanged = TranscodeResult(source, original_bytes, original_bytes)
+        if not self.available or (source_height and source_height <= self.max_height):
+            return unchanged
+
+        target = source.with_name(f"{source.stem}.transcoding.mp4")
+        started = time.perf_counter()
+        async with self._semaphore:
+            try:
+                result = await asyncio.to_thread(
+                    subprocess.run,
+                    self._command(source, target),
+                    capture_output=True,
+                    timeout=300,
+                )
+            except subprocess.TimeoutExpired:
+                target.unlink(missing_ok=True)
+                unchanged.error = "ffmpeg timed out"
+                return unchanged
+        seconds = time.perf_counter() - started
+
+        if result.returncode != 0 or not target.exists():
+            target.unlink(missing_ok=True)
+            error = result.stderr.decode("utf-8", errors="replace")[:500]
+            logger.warning(f"Transcode failed for {source.name}: {error}")
+            unchanged.error = error
+            unchanged.seconds = seconds
+            return unchanged
+
+        reduced_bytes = target.stat().st_size
+        if reduced_bytes >= original_bytes:
+            target.unlink()
+            unchanged.seconds = seconds
+            return unchanged
+
+        final = source.with_suffix(".mp4")
+        target.replace(final)
+        if final != source:
+            source.unlink(missing_ok=True)
+
+        logger.info(
+            f"Transcoded {source.name}: {original_bytes / 1024 / 1024:.1f}MB -> "
+            f"{reduced_bytes / 1024 / 1024:.1f}MB in {seconds:.1f}s"
+        )
+        return TranscodeResult(final, original_bytes, reduced_bytes, seconds, transcoded=True)
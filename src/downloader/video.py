@@ -1,23 +1,111 @@
 """
 Video downloader using yt-dlp.
 
-Downloads videos from TikTok, Instagram, and other platforms.
+Downloads videos from TikTok, Instagram, and other platforms. The default
+"pool" engine runs yt-dlp in long-lived worker processes (see ytdlp_pool);
+the "cli" engine starts one yt-dlp process per video.
+
+Downloads for analysis use a height-capped format and, when ffmpeg is
+available, a downscale/re-encode pass (see transcode); archive downloads
+keep the best mp4.
 """
 
 import asyncio
 import subprocess
 import json
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Iterable, Optional
+from urllib.parse import urlsplit
 from datetime import datetime
 import logging
 import shutil
 
 from config.settings import settings
+from src.downloader.cache import INDEX_FILENAME, CacheEntry, cache_filename, cache_key, get_video_cache
+from src.downloader.transcode import VideoTranscoder, format_for
+from src.downloader.ytdlp_pool import METADATA_FIELDS, YTDLP_AVAILABLE, get_metadata_pool, get_ytdlp_pool
+from src.proxy_pool import get_proxy_pool, proxy_env
 
 logger = logging.getLogger(__name__)
 
+# yt-dlp errors that point at the connection/egress IP rather than the video
+_NETWORK_ERROR_MARKERS = (
+    "timed out",
+    "HTTP Error 403",
+    "HTTP Error 429",
+    "Unable to connect",
+    "Connection refused",
+    "Connection reset",
+    "ProxyError",
+    "Tunnel connection failed",
+    "Too Many Requests",
+)
+
+
+def _is_network_error(error: Optional[str]) -> bool:
+    return bool(error) and any(marker.lower() in error.lower() for marker in _NETWORK_ERROR_MARKERS)
+
+
+class HostRateLimiter:
+    """Space requests to the same host at least 60/requests_per_minute seconds apart."""
+
+    def __init__(self, requests_per_minute: int):
+        self.min_interval = 60.0 / max(requests_per_minute, 1)
+        self._next_at: dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        """Reserve the host's next slot and sleep until it."""
+        host = (urlsplit(url).hostname or "").removeprefix("www.")
+        now = time.monotonic()
+        start_at = max(now, self._next_at.get(host, 0.0))
+        self._next_at[host] = start_at + self.min_interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+
+@dataclass
+class MetadataResult:
+    """Engagement metadata for one URL, fetched without downloading media."""
+    video_url: str
+    success: bool
+    views: int = 0
+    likes: int = 0
+    comments: int = 0
+    shares: int = 0
+    posted_at: Optional[str] = None
+    metadata: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @classmethod
+    def from_info(cls, url: str, info: dict) -> "MetadataResult":
+        return cls(
+            video_url=url,
+            success=True,
+            views=info.get("view_count") or 0,
+            likes=info.get("like_count") or 0,
+            comments=info.get("comment_count") or 0,
+            shares=info.get("repost_count") or 0,
+            posted_at=(
+                datetime.utcfromtimestamp(info["timestamp"]).isoformat()
+                if info.get("timestamp") else None
+            ),
+            metadata=info,
+        )
+
+    def engagement(self) -> dict:
+        """Columns to write back to posts."""
+        data = {
+            "views": self.views,
+            "likes": self.likes,
+            "comments": self.comments,
+            "shares": self.shares,
+        }
+        if self.posted_at:
+            data["posted_at"] = self.posted_at
+        return data
+
 
 @dataclass
 class DownloadResult:
@@ -31,6 +119,17 @@ class DownloadResult:
     author: Optional[str] = None
     error: Optional[str] = None
     metadata: dict = field(default_factory=dict)
+    cached: bool = False  # Served from the video cache without downloading
+    original_file_size_bytes: int = 0  # Size as downloaded, before any transcode
+    download_seconds: float = 0.0
+    transcode_seconds: float = 0.0
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes removed by the analysis transcode."""
+        if not self.original_file_size_bytes:
+            return 0
+        return self.original_file_size_bytes - self.file_size_bytes
 
     def to_dict(self) -> dict:
         return {
@@ -42,20 +141,41 @@ class DownloadResult:
             "title": self.title,
             "author": self.author,
             "error": self.error,
+            "cached": self.cached,
+            "original_file_size_bytes": self.original_file_size_bytes or self.file_size_bytes,
+            "bytes_saved": self.bytes_saved,
+            "download_seconds": round(self.download_seconds, 2),
+            "transcode_seconds": round(self.transcode_seconds, 2),
         }
 
 
 class VideoDownloader:
     """Download videos using yt-dlp."""
 
-    def __init__(self, output_dir: Optional[Path] = None):
+    def __init__(self, output_dir: Optional[Path] = None, engine: Optional[str] = None):
+        """
+        Args:
+            output_dir: Directory for downloaded videos
+            engine: "pool" (in-process yt-dlp workers) or "cli" (one process per
+                video); defaults to settings.download_engine
+        """
         self.output_dir = output_dir or Path(settings.cache_dir) / "videos"
         self.output_dir.mkdir(parents=True, exist_ok=True)
-
-        # Find yt-dlp - check venv first, then system
-        self.ytdlp_path = self._find_ytdlp()
-        if not self.ytdlp_path:
-            raise RuntimeError("yt-dlp is not installed. Run: pip install yt-dlp")
+        self.cache = get_video_cache(self.output_dir)
+        self._key_locks: dict[str, asyncio.Lock] = {}
+        self.transcoder = VideoTranscoder()
+
+        self.engine = engine or settings.download_engine
+        if self.engine == "pool" and not YTDLP_AVAILABLE:
+            logger.warning("yt_dlp module not importable; falling back to the CLI engine")
+            self.engine = "cli"
+
+        self.ytdlp_path = None
+        if self.engine == "cli":
+            # Find yt-dlp - check venv first, then system
+            self.ytdlp_path = self._find_ytdlp()
+            if not self.ytdlp_path:
+                raise RuntimeError("yt-dlp is not installed. Run: pip install yt-dlp")
 
     def _find_ytdlp(self) -> Optional[str]:
         """Find yt-dlp executable."""
@@ -73,10 +193,9 @@ class VideoDownloader:
 
         return None
 
-    def _generate_filename(self, video_id: str, platform: str) -> str:
-        """Generate unique filename for downloaded video."""
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        return f"{platform}_{video_id}_{timestamp}"
+    def _generate_filename(self, key: str) -> str:
+        """Deterministic filename for a video's cache key, so re-crawls hit the cache."""
+        return cache_filename(key)
 
     async def download(
         self,
@@ -84,120 +203,129 @@ class VideoDownloader:
         video_id: str = "",
         platform: str = "unknown",
         max_duration: int = 300,  # 5 minutes max
+        awaiting_analysis: bool = False,
+        purpose: str = "archive",
     ) -> DownloadResult:
         """
-        Download a video from URL.
+        Download a video from URL, or return it from the cache.
+
+        Videos are keyed by canonical (platform, native_id); a valid cached
+        copy is returned immediately with cached=True. Each real download
+        leases a proxy from the shared pool (direct connection when no proxies
+        are configured) and reports network failures back to it. After a new
+        download the cache evicts least recently used videos over its budget.
 
         Args:
             url: Video URL to download
-            video_id: Optional ID for filename
-            platform: Platform name for filename
+            video_id: Optional ID, used for the cache key if the URL is not recognized
+            platform: Platform name, used with video_id for the cache key
             max_duration: Maximum video duration in seconds
+            awaiting_analysis: Keep the video out of eviction until
+                cache.mark_analyzed() is called for it
+            purpose: "archive" (best mp4) or "analysis" (height-capped format,
+                then transcoded if enabled); each purpose is cached separately
 
         Returns:
             DownloadResult with file path and metadata
         """
-        if not video_id:
-            video_id = str(hash(url))[-8:]
-
-        filename = self._generate_filename(video_id, platform)
+        key = cache_key(url, video_id, platform)
+        if purpose != "archive":
+            key = f"{key}@{purpose}"
+        lock = self._key_locks.setdefault(key, asyncio.Lock())
+
+        # One download per key; concurrent requests for it wait and then hit the cache
+        async with lock:
+            entry = self.cache.get(key)
+            if entry:
+                logger.info(f"Cache hit: {key}")
+                if awaiting_analysis:
+                    self.cache.mark_awaiting([key])
+                return self._result_from_cache(url, entry)
+
+            started = time.perf_counter()
+            with get_proxy_pool().lease() as proxy:
+                result = await self._download(url, key, max_duration, proxy.url, format_for(purpose))
+                if not result.success and _is_network_error(result.error):
+                    proxy.fail()
+            result.download_seconds = time.perf_counter() - started
+
+            if result.success and purpose == "analysis" and settings.transcode_for_analysis:
+                transcoded = await self.transcoder.transcode(
+                    result.file_path, result.metadata.get("height")
+                )
+                result.file_path = transcoded.file_path
+                result.file_size_bytes = transcoded.reduced_bytes
+                result.original_file_size_bytes = transcoded.original_bytes
+                result.transcode_seconds = transcoded.seconds
+
+            if result.success:
+                info_file = self.output_dir / f"{self._generate_filename(key)}.info.json"
+                await asyncio.to_thread(
+                    self.cache.put,
+                    key,
+                    result.file_path,
+                    info_file if info_file.exists() else None,
+                    url,
+                    result.metadata,
+                    awaiting_analysis,
+                    result.original_file_size_bytes,
+                )
+                self.cache.evict()
+            return result
+
+    def _result_from_cache(self, url: str, entry: CacheEntry) -> DownloadResult:
+        """Build a DownloadResult for a cached video from its index entry and info JSON."""
+        metadata = {}
+        if entry.info_path and Path(entry.info_path).exists():
+            try:
+                metadata = json.loads(Path(entry.info_path).read_text(encoding='utf-8'))
+            except Exception as e:
+                logger.warning(f"Failed to read cached metadata: {e}")
+
+        return DownloadResult(
+            success=True,
+            video_url=url,
+            file_path=Path(entry.path),
+            file_size_bytes=entry.size_bytes,
+            duration_seconds=float(metadata.get("duration") or 0),
+            title=metadata.get("title"),
+            author=metadata.get("uploader") or metadata.get("channel"),
+            metadata=metadata,
+            cached=True,
+            original_file_size_bytes=entry.original_size_bytes,
+        )
+
+    async def _download(
+        self,
+        url: str,
+        key: str,
+        max_duration: int,
+        proxy: Optional[str] = None,
+        format_selector: str = "best[ext=mp4]/best",
+    ) -> DownloadResult:
+        """Run yt-dlp for one URL with the configured engine, optionally through a proxy."""
+        filename = self._generate_filename(key)
         output_template = str(self.output_dir / f"{filename}.%(ext)s")
 
-        # yt-dlp command
-        cmd = [
-            self.ytdlp_path,
-            "--no-progress",
-            "--js-runtimes", "node",  # Use Node.js for YouTube extraction
-            "--remote-components", "ejs:github",  # Download EJS component for YouTube
-            "-f", "best[ext=mp4]/best",  # Prefer mp4
-            "--max-filesize", "100M",  # Max 100MB
-            "--write-info-json",  # Save metadata
-            "-o", output_template,
-            url,
-        ]
-
         try:
             logger.info(f"Downloading: {url}")
-            logger.debug(f"Command: {' '.join(cmd)}")
-
-            # Run yt-dlp in thread pool to avoid Windows asyncio subprocess issues
-            def run_ytdlp():
-                return subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    timeout=120,
+            if self.engine == "pool":
+                outcome = await get_ytdlp_pool().download(
+                    url, output_template, proxy, format_selector=format_selector
                 )
+                error = outcome.get("error")
+            else:
+                error = await self._run_cli(url, output_template, proxy, format_selector)
 
-            result = await asyncio.wait_for(
-                asyncio.to_thread(run_ytdlp),
-                timeout=130,  # slightly longer than subprocess timeout
-            )
-
-            returncode = result.returncode
-            stdout = result.stdout
-            stderr = result.stderr
-
-            logger.info(f"yt-dlp returncode: {returncode}")
-            if stderr:
-                logger.info(f"yt-dlp stderr: {stderr[:500].decode('utf-8', errors='replace')}")
-
-            if returncode != 0:
-                error_msg = stderr.decode() if stderr else ""
-                stdout_msg = stdout.decode() if stdout else ""
-                full_error = error_msg or stdout_msg or f"yt-dlp exited with code {returncode}"
-                logger.error(f"Download failed (code {returncode}): {full_error}")
+            if error:
+                logger.error(f"Download failed: {error}")
                 return DownloadResult(
                     success=False,
                     video_url=url,
-                    error=full_error,
+                    error=error,
                 )
 
-            # Find the downloaded file
-            video_file = None
-            json_file = None
-
-            for f in self.output_dir.glob(f"{filename}.*"):
-                if f.suffix == ".json":
-                    json_file = f
-                elif f.suffix in [".mp4", ".webm", ".mkv", ".mov"]:
-                    video_file = f
-
-            if not video_file:
-                return DownloadResult(
-                    success=False,
-                    video_url=url,
-                    error="Video file not found after download",
-                )
-
-            # Read metadata
-            metadata = {}
-            title = None
-            author = None
-            duration = 0.0
-
-            if json_file and json_file.exists():
-                try:
-                    metadata = json.loads(json_file.read_text(encoding='utf-8'))
-                    title = metadata.get("title")
-                    author = metadata.get("uploader") or metadata.get("channel")
-                    duration = float(metadata.get("duration", 0))
-                except Exception as e:
-                    logger.warning(f"Failed to read metadata: {e}")
-
-            file_size = video_file.stat().st_size
-
-            logger.info(f"Downloaded: {video_file.name} ({file_size / 1024 / 1024:.1f}MB)")
-
-            return DownloadResult(
-                success=True,
-                video_url=url,
-                file_path=video_file,
-                file_size_bytes=file_size,
-                duration_seconds=duration,
-                title=title,
-                author=author,
-                metadata=metadata,
-            )
+            return self._collect_result(url, filename)
 
         except asyncio.TimeoutError:
             return DownloadResult(
@@ -216,11 +344,197 @@ class VideoDownloader:
                 error=error_msg,
             )
 
+    async def _run_cli(
+        self,
+        url: str,
+        output_template: str,
+        proxy: Optional[str],
+        format_selector: str = "best[ext=mp4]/best",
+    ) -> Optional[str]:
+        """
+        Run one yt-dlp CLI process.
+
+        Returns:
+            Error text, or None on success
+        """
+        # yt-dlp command
+        cmd = [
+            self.ytdlp_path,
+            "--no-progress",
+            "--js-runtimes", "node",  # Use Node.js for YouTube extraction
+            "--remote-components", "ejs:github",  # Download EJS component for YouTube
+            "-f", format_selector,  # Prefer mp4 (height-capped for analysis)
+            "--max-filesize", "100M",  # Max 100MB
+            "--write-info-json",  # Save metadata
+            "-o", output_template,
+            url,
+        ]
+
+        logger.debug(f"Command: {' '.join(cmd)}")
+
+        # Run yt-dlp in thread pool to avoid Windows asyncio subprocess issues.
+        # The proxy goes through the environment, out of the process list.
+        def run_ytdlp():
+            return subprocess.run(
+                cmd,
+                capture_output=True,
+                timeout=120,
+                env=proxy_env(proxy),
+            )
+
+        result = await asyncio.wait_for(
+            asyncio.to_thread(run_ytdlp),
+            timeout=130,  # slightly longer than subprocess timeout
+        )
+
+        returncode = result.returncode
+        stdout = result.stdout
+        stderr = result.stderr
+
+        logger.info(f"yt-dlp returncode: {returncode}")
+        if stderr:
+            logger.info(f"yt-dlp stderr: {stderr[:500].decode('utf-8', errors='replace')}")
+
+        if returncode != 0:
+            error_msg = stderr.decode() if stderr else ""
+            stdout_msg = stdout.decode() if stdout else ""
+            return error_msg or stdout_msg or f"yt-dlp exited with code {returncode}"
+        return None
+
+    def _collect_result(self, url: str, filename: str) -> DownloadResult:
+        """Find the downloaded video and its .info.json and build the result."""
+        # Find the downloaded file
+        video_file = None
+        json_file = None
+
+        for f in self.output_dir.glob(f"{filename}.*"):
+            if f.suffix == ".json":
+                json_file = f
+            elif f.suffix in [".mp4", ".webm", ".mkv", ".mov"]:
+                video_file = f
+
+        if not video_file:
+            return DownloadResult(
+                success=False,
+                video_url=url,
+                error="Video file not found after download",
+            )
+
+        # Read metadata
+        metadata = {}
+        title = None
+        author = None
+        duration = 0.0
+
+        if json_file and json_file.exists():
+            try:
+                metadata = json.loads(json_file.read_text(encoding='utf-8'))
+                title = metadata.get("title")
+                author = metadata.get("uploader") or metadata.get("channel")
+                duration = float(metadata.get("duration", 0))
+            except Exception as e:
+                logger.warning(f"Failed to read metadata: {e}")
+
+        file_size = video_file.stat().st_size
+
+        logger.info(f"Downloaded: {video_file.name} ({file_size / 1024 / 1024:.1f}MB)")
+
+        return DownloadResult(
+            success=True,
+            video_url=url,
+            file_path=video_file,
+            file_size_bytes=file_size,
+            duration_seconds=duration,
+            title=title,
+            author=author,
+            metadata=metadata,
+        )
+
+    async def fetch_metadata_batch(
+        self,
+        urls: Iterable[str],
+        max_concurrent: Optional[int] = None,
+        requests_per_minute_per_host: Optional[int] = None,
+    ) -> AsyncIterator[MetadataResult]:
+        """
+        Fetch engagement metadata for many URLs without downloading media.
+
+        Requests run with bounded concurrency through warm yt-dlp workers (the
+        metadata pool, or one CLI process each with the "cli" engine), spaced
+        per host, each through a leased proxy. Results are yielded as they
+        complete, not in input order.
+
+        Args:
+            urls: Video URLs (any iterable; consumed lazily)
+            max_concurrent: Requests in flight (defaults to settings.metadata_max_concurrent)
+            requests_per_minute_per_host: Per-host rate limit (defaults to settings.metadata_host_rpm)
+
+        Yields:
+            MetadataResult per URL
+        """
+        max_concurrent = max_concurrent or settings.metadata_max_concurrent
+        limiter = HostRateLimiter(requests_per_minute_per_host or settings.metadata_host_rpm)
+
+        async def fetch_one(url: str) -> MetadataResult:
+            await limiter.wait(url)
+            try:
+                with get_proxy_pool().lease() as proxy:
+                    if self.engine == "pool":
+                        outcome = await get_metadata_pool().fetch_metadata(url, proxy.url)
+                    else:
+                        outcome = await self._fetch_metadata_cli(url, proxy.url)
+                    if not outcome["success"] and _is_network_error(outcome.get("error")):
+                        proxy.fail()
+            except asyncio.TimeoutError:
+                outcome = {"success": False, "error": "Metadata fetch timed out"}
+            except Exception as e:
+                outcome = {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+            if not outcome["success"]:
+                return MetadataResult(video_url=url, success=False, error=outcome.get("error"))
+            return MetadataResult.from_info(url, outcome["info"])
+
+        url_iter = iter(urls)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                while len(pending) < max_concurrent:
+                    url = next(url_iter, None)
+                    if url is None:
+                        break
+                    pending.add(asyncio.create_task(fetch_one(url)))
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_metadata_cli(self, url: str, proxy: Optional[str]) -> dict:
+        """Metadata for one URL via a yt-dlp CLI process (--dump-json, no download)."""
+        cmd = [self.ytdlp_path, "--skip-download", "--dump-json", "--no-warnings", url]
+
+        result = await asyncio.wait_for(
+            asyncio.to_thread(subprocess.run, cmd, capture_output=True, timeout=60, env=proxy_env(proxy)),
+            timeout=70,
+        )
+        if result.returncode != 0:
+            error = result.stderr.decode("utf-8", errors="replace") if result.stderr else ""
+            return {"success": False, "error": error or f"yt-dlp exited with code {result.returncode}"}
+
+        info = json.loads(result.stdout)
+        return {"success": True, "info": {k: info.get(k) for k in METADATA_FIELDS}}
+
     async def download_batch(
         self,
         urls: list[str],
         platform: str = "unknown",
         max_concurrent: int = 3,
+        awaiting_analysis: bool = False,
+        purpose: str = "archive",
     ) -> list[DownloadResult]:
         """
         Download multiple videos concurrently.
@@ -229,40 +543,50 @@ class VideoDownloader:
             urls: List of video URLs
             platform: Platform name
             max_concurrent: Max concurrent downloads
+            awaiting_analysis: Protect the videos from eviction until analyzed
+            purpose: "archive" or "analysis" format policy
 
         Returns:
             List of DownloadResults
         """
         semaphore = asyncio.Semaphore(max_concurrent)
 
-        async def download_with_semaphore(url: str, idx: int) -> DownloadResult:
+        async def download_with_semaphore(url: str) -> DownloadResult:
             async with semaphore:
                 return await self.download(
                     url=url,
-                    video_id=str(idx),
                     platform=platform,
+                    awaiting_analysis=awaiting_analysis,
+                    purpose=purpose,
                 )
 
         tasks = [
-            download_with_semaphore(url, idx)
-            for idx, url in enumerate(urls)
+            download_with_semaphore(url)
+            for url in urls
         ]
 
         return await asyncio.gather(*tasks)
 
     def cleanup_old_videos(self, max_age_hours: int = 24) -> int:
         """
-        Delete videos older than max_age_hours.
+        Delete videos not used for max_age_hours.
+
+        Cached videos are evicted by last access (pinned and awaiting-analysis
+        videos are kept); files outside the cache index (older downloads) are
+        deleted by modification time.
 
         Returns number of files deleted.
         """
-        deleted = 0
+        max_age_seconds = max_age_hours * 3600
+        deleted = self.cache.evict_idle(max_age_seconds)
+
         now = datetime.utcnow()
+        tracked = self.cache.tracked_paths()
 
         for f in self.output_dir.glob("*"):
-            if f.is_file():
+            if f.is_file() and f.name != INDEX_FILENAME and str(f) not in tracked:
                 age = now - datetime.fromtimestamp(f.stat().st_mtime)
-                if age.total_seconds() > max_age_hours * 3600:
+                if age.total_seconds() > max_age_seconds:
                     f.unlink()
                     deleted += 1
                     logger.debug(f"Deleted old file: {f.name}")
@@ -273,18 +597,11 @@ class VideoDownloader:
         return deleted
 
     def get_storage_usage(self) -> dict:
-        """Get storage usage stats."""
-        total_size = 0
-        file_count = 0
-
-        for f in self.output_dir.glob("*"):
-            if f.is_file() and f.suffix != ".json":
-                total_size += f.stat().st_size
-                file_count += 1
-
+        """Get storage usage stats from the cache index (no directory scan)."""
+        usage = self.cache.usage()
         return {
-            "file_count": file_count,
-            "total_size_bytes": total_size,
-            "total_size_mb": total_size / 1024 / 1024,
+            **usage,
+            "total_size_mb": usage["total_size_bytes"] / 1024 / 1024,
             "output_dir": str(self.output_dir),
+            "cache": self.cache.get_stats(),
         }
@@ -0,0 +1,324 @@
+"""
+In-process yt-dlp download engine.
+
+Runs the yt_dlp.YoutubeDL Python API inside a small pool of long-lived worker
+processes instead of starting a yt-dlp CLI process per video. Each worker
+imports yt-dlp and its extractor registry once and keeps one YoutubeDL per
+proxy, so HTTP sessions and cookies are reused across downloads.
+
+Workers write the same files the CLI did (<template>.<ext> plus .info.json),
+so VideoDownloader collects results the same way for either engine.
+
+A second pool (get_metadata_pool) runs metadata-only extraction for bulk
+engagement refreshes, returning just the engagement fields of the info dict.
+
+Tasks bound their own run time inside the worker: socket_timeout fails a
+stalled connection, and a download past its deadline is aborted from a
+progress hook and its partial output removed. A worker is never killed from
+outside, since one dead process breaks a ProcessPoolExecutor and every task
+in flight on it.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import yt_dlp  # noqa: F401
+    YTDLP_AVAILABLE = True
+except ImportError:
+    YTDLP_AVAILABLE = False
+
+# Options matching the CLI flags VideoDownloader has always passed
+BASE_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "noprogress": True,
+    "format": "best[ext=mp4]/best",  # Prefer mp4
+    "max_filesize": 100 * 1024 * 1024,  # Max 100MB
+    "writeinfojson": True,  # Save metadata
+    "socket_timeout": 30,
+    "js_runtimes": {"node": {}},  # Use Node.js for YouTube extraction
+    "remote_components": {"ejs:github"},  # Download EJS component for YouTube
+}
+
+# Options for metadata-only extraction (no media download, no files written)
+METADATA_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "socket_timeout": 30,
+    "js_runtimes": {"node": {}},
+    "remote_components": {"ejs:github"},
+}
+
+# Info dict fields returned by metadata extraction (the full dict is large to pickle back)
+METADATA_FIELDS = (
+    "id", "title", "uploader", "channel", "duration", "timestamp", "upload_date",
+    "view_count", "like_count", "comment_count", "repost_count", "webpage_url",
+)
+
+# Extra wait beyond a task's own deadline: a stalled connection takes up to
+# socket_timeout to fail inside the worker
+WORKER_GRACE_SECONDS = BASE_OPTIONS["socket_timeout"] + 10
+
+# Per-worker-process state: one YoutubeDL per (proxy, format) (proxy None = direct)
+_worker_clients: dict = {}
+_metadata_clients: dict = {}
+_download_deadline: Optional[float] = None  # monotonic time the current download must end by
+
+
+class DownloadDeadlineExceeded(Exception):
+    """Raised from the progress hook when a download runs past its deadline."""
+
+
+def _deadline_hook(status: dict) -> None:
+    if _download_deadline is not None and time.monotonic() > _download_deadline:
+        raise DownloadDeadlineExceeded()
+
+
+def _init_worker() -> None:
+    """Import yt-dlp once per worker so the extractor registry is loaded up front."""
+    import yt_dlp  # noqa: F401
+
+
+def _get_worker_client(proxy: Optional[str], format_selector: Optional[str] = None):
+    import yt_dlp
+
+    client_key = (proxy, format_selector)
+    if client_key not in _worker_clients:
+        options = dict(BASE_OPTIONS)
+        if proxy:
+            options["proxy"] = proxy
+        if format_selector:
+            options["format"] = format_selector
+        options["progress_hooks"] = [_deadline_hook]
+        _worker_clients[client_key] = yt_dlp.YoutubeDL(options)
+    return _worker_clients[client_key]
+
+
+def _download_in_worker(
+    url: str,
+    output_template: str,
+    proxy: Optional[str],
+    format_selector: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> dict:
+    """
+    Download one URL with this worker's YoutubeDL (runs in the worker process).
+
+    Args:
+        timeout: Seconds the download may take; past that it is aborted and
+            its partial output removed
+
+    Returns:
+        Dict with "success" and, on failure, "error" (the yt-dlp error text)
+    """
+    global _download_deadline
+    from yt_dlp.utils import DownloadError
+
+    ydl = _get_worker_client(proxy, format_selector)
+    # The output template is the only per-download option
+    ydl.params["outtmpl"] = {"default": output_template}
+    _download_deadline = time.monotonic() + timeout if timeout else None
+    try:
+        info = ydl.extract_info(url, download=True)
+        if not info:
+            return {"success": False, "error": "yt-dlp returned no info"}
+        return {"success": True}
+    except DownloadDeadlineExceeded:
+        _remove_output(output_template)
+        return {"success": False, "error": f"Download timed out after {timeout}s"}
+    except DownloadError as e:
+        # yt-dlp may wrap exceptions raised by hooks
+        if isinstance(e.exc_info[1] if e.exc_info else None, DownloadDeadlineExceeded):
+            _remove_output(output_template)
+            return {"success": False, "error": f"Download timed out after {timeout}s"}
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        return {"success": False, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        _download_deadline = None
+
+
+def _metadata_in_worker(url: str, proxy: Optional[str]) -> dict:
+    """
+    Extract one URL's info dict without downloading media (runs in the worker process).
+
+    Returns:
+        Dict with "success", "info" (METADATA_FIELDS only) and, on failure, "error"
+    """
+    import yt_dlp
+    from yt_dlp.utils import DownloadError
+
+    if proxy not in _metadata_clients:
+        options = dict(METADATA_OPTIONS)
+        if proxy:
+            options["proxy"] = proxy
+        _metadata_clients[proxy] = yt_dlp.YoutubeDL(options)
+    try:
+        info = _metadata_clients[proxy].extract_info(url, download=False)
+        if not info:
+            return {"success": False, "error": "yt-dlp returned no info"}
+        return {"success": True, "info": {k: info.get(k) for k in METADATA_FIELDS}}
+    except DownloadError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        return {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+
+class YtdlpWorkerPool:
+    """Pool of long-lived processes that each run downloads through one YoutubeDL."""
+
+    def __init__(self, max_workers: int = 3):
+        """
+        Args:
+            max_workers: Worker processes (downloads in flight at once)
+        """
+        if not YTDLP_AVAILABLE:
+            raise RuntimeError("yt-dlp is not installed. Run: pip install yt-dlp")
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    async def warm_up(self) -> None:
+        """Start every worker now rather than on the first downloads."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*[
+            loop.run_in_executor(executor, _init_worker) for _ in range(self.max_workers)
+        ])
+
+    async def download(
+        self,
+        url: str,
+        output_template: str,
+        proxy: Optional[str] = None,
+        timeout: float = 130,
+        format_selector: Optional[str] = None,
+    ) -> dict:
+        """
+        Download one URL in a worker process.
+
+        The worker aborts the download after `timeout` and removes its
+        partial output. A crashed worker breaks the executor; it is replaced,
+        the error returned and the partial output removed.
+
+        Args:
+            url: Video URL
+            output_template: yt-dlp output template (path with %(ext)s)
+            proxy: Optional proxy URL
+            timeout: Seconds the download may take
+            format_selector: yt-dlp format selector (defaults to BASE_OPTIONS)
+
+        Returns:
+            Dict with "success" and optional "error"
+        """
+        return await self._run(
+            timeout,
+            _download_in_worker, url, output_template, proxy, format_selector, timeout,
+            cleanup=lambda: _remove_output(output_template),
+        )
+
+    async def fetch_metadata(
+        self,
+        url: str,
+        proxy: Optional[str] = None,
+        timeout: float = 60,
+    ) -> dict:
+        """
+        Extract one URL's metadata (no media) in a worker process.
+
+        Returns:
+            Dict with "success", "info" and optional "error"
+        """
+        return await self._run(timeout, _metadata_in_worker, url, proxy)
+
+    async def _run(
+        self,
+        timeout: float,
+        fn,
+        *args,
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> dict:
+        """
+        Run a worker function.
+
+        Worker functions bound their own run time, so the wait here allows
+        WORKER_GRACE_SECONDS on top of `timeout`. A task still running after
+        that is abandoned, not killed (that would break every task on the
+        pool); `cleanup` runs once it does finish, so it leaves no files
+        behind. A crashed worker breaks the executor, so it is replaced and
+        `cleanup` runs right away.
+        """
+        executor = self._get_executor()
+        future = executor.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout=timeout + WORKER_GRACE_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"yt-dlp worker still busy {timeout + WORKER_GRACE_SECONDS}s in; abandoning its task")
+            if cleanup:
+                future.add_done_callback(lambda _: cleanup())
+            return {"success": False, "error": f"yt-dlp worker timed out after {timeout}s"}
+        except BrokenProcessPool as e:
+            logger.error(f"yt-dlp worker crashed, restarting pool: {e}")
+            if self._executor is executor:
+                self.shutdown(wait=False)
+            if cleanup:
+                cleanup()
+            return {"success": False, "error": f"yt-dlp worker crashed: {e}"}
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+def _remove_output(output_template: str) -> None:
+    """Delete whatever a killed download left for this template (.part, .ytdl, .info.json, ...)."""
+    prefix = Path(output_template.split("%(", 1)[0])
+    for path in prefix.parent.glob(f"{prefix.name}*"):
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.warning(f"Could not remove partial download {path}: {e}")
+
+
+_worker_pool: Optional[YtdlpWorkerPool] = None
+
+
+def get_ytdlp_pool(max_workers: Optional[int] = None) -> YtdlpWorkerPool:
+    """Process-wide yt-dlp worker pool (sized from settings on first use)."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = YtdlpWorkerPool(max_workers or settings.download_workers)
+    return _worker_pool
+
+
+_metadata_pool: Optional[YtdlpWorkerPool] = None
+
+
+def get_metadata_pool(max_workers: Optional[int] = None) -> YtdlpWorkerPool:
+    """Process-wide worker pool for metadata-only extraction (sized separately from downloads)."""
+    global _metadata_pool
+    if _metadata_pool is None:
+        _metadata_pool = YtdlpWorkerPool(max_workers or settings.metadata_max_concurrent)
+    return _metadata_pool
@@ -1,15 +1,22 @@
 from .hashtag import HashtagExtractor, VideoInfo, ExtractionResult, Platform
+from .canonical import CanonicalId, canonical_id, canonicalize_url
 from .profile import ProfileExtractor, ProfileInfo, ProfileExtractionResult
-from .instagram import InstagramExtractor, InstagramComment
+from .instagram import InstagramExtractor, InstagramComment, CommentPage
+from .instagram_pool import InstagramClientPool
 
 __all__ = [
     "HashtagExtractor",
     "VideoInfo",
     "ExtractionResult",
     "Platform",
+    "CanonicalId",
+    "canonical_id",
+    "canonicalize_url",
     "ProfileExtractor",
     "ProfileInfo",
     "ProfileExtractionResult",
     "InstagramExtractor",
     "InstagramComment",
+    "CommentPage",
+    "InstagramClientPool",
 ]
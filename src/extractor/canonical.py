@@ -0,0 +1,173 @@
+"""
+Canonical video identity.
+
+The same video reaches us through different URL shapes (TikTok share links,
+youtube.com/shorts/ID vs youtu.be/ID embeds, Instagram reel vs post URLs).
+This module resolves a URL to a (platform, native_id) pair so every source
+agrees on one key per video:
+
+- TikTok: numeric video ID
+- YouTube (Shorts, watch, embed, youtu.be): 11-character video ID, filed under YOUTUBE_SHORTS
+- Instagram (/p/, /reel/, /reels/, /tv/): shortcode; media pks convert to shortcodes
+- Substack posts: "publication/slug"; Loom and Vimeo embeds: "loom:ID" / "vimeo:ID"
+"""
+
+import hashlib
+import re
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from src.extractor.hashtag import Platform, VideoInfo
+
+# Instagram shortcodes are the media pk in URL-safe base64
+_IG_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+_YOUTUBE_ID = r"([A-Za-z0-9_-]{11})"
+_YOUTUBE_PATH_PATTERNS = [
+    re.compile(rf"^/(?:shorts|embed|live|v|e)/{_YOUTUBE_ID}"),
+]
+_TIKTOK_PATTERNS = [
+    re.compile(r"/video/(\d+)"),
+    re.compile(r"^/v/(\d+)"),
+    re.compile(r"^/embed(?:/v2)?/(\d+)"),
+]
+_INSTAGRAM_PATTERN = re.compile(r"^/(?:[\w.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)")
+_SUBSTACK_POST_PATTERN = re.compile(r"^/p/([\w-]+)")
+_LOOM_PATTERN = re.compile(r"^/(?:share|embed)/([0-9a-f]{32})")
+_VIMEO_PATTERN = re.compile(r"/(?:video/)?(\d{6,})")
+
+
+class CanonicalId(NamedTuple):
+    """A video's platform and platform-native ID."""
+    platform: Platform
+    native_id: str
+
+    @property
+    def key(self) -> str:
+        """Stable string key, e.g. 'youtube_shorts:dQw4w9WgXcQ'."""
+        return f"{self.platform.value}:{self.native_id}"
+
+
+def instagram_pk_to_shortcode(pk: int | str) -> str:
+    """Convert an Instagram media pk (or 'pk_userid' media id) to its shortcode."""
+    value = int(str(pk).split("_")[0])
+    code = ""
+    while value > 0:
+        value, remainder = divmod(value, 64)
+        code = _IG_ALPHABET[remainder] + code
+    return code
+
+
+def instagram_shortcode_to_pk(shortcode: str) -> int:
+    """Convert an Instagram shortcode to its media pk."""
+    value = 0
+    # Codes from private share links carry a suffix after the first 11 chars
+    for char in shortcode[:11]:
+        value = value * 64 + _IG_ALPHABET.index(char)
+    return value
+
+
+def instagram_shortcode(media_id: str) -> str:
+    """Normalize an Instagram media pk, 'pk_userid' id or shortcode to a shortcode."""
+    media_id = str(media_id)
+    if re.fullmatch(r"\d+(?:_\d+)?", media_id):
+        return instagram_pk_to_shortcode(media_id)
+    return media_id
+
+
+def canonicalize_url(url: str) -> Optional[CanonicalId]:
+    """
+    Resolve a video or post URL to (platform, native_id).
+
+    Args:
+        url: Any supported URL shape (query strings and fragments are ignored)
+
+    Returns:
+        CanonicalId, or None if the URL is not recognized (or is an unresolved
+        short link such as vm.tiktok.com/XXXX)
+    """
+    if not url:
+        return None
+    if "://" not in url:
+        url = f"https://{url}"
+
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www.") or host.startswith("m."):
+        host = host.split(".", 1)[1]
+    path = parts.path
+
+    if host in ("youtube.com", "youtube-nocookie.com", "music.youtube.com"):
+        video_id = parse_qs(parts.query).get("v", [None])[0]
+        if video_id and re.fullmatch(_YOUTUBE_ID, video_id):
+            return CanonicalId(Platform.YOUTUBE_SHORTS, video_id)
+        for pattern in _YOUTUBE_PATH_PATTERNS:
+            match = pattern.match(path)
+            if match:
+                return CanonicalId(Platform.YOUTUBE_SHORTS, match.group(1))
+        return None
+
+    if host == "youtu.be":
+        match = re.match(rf"^/{_YOUTUBE_ID}", path)
+        return CanonicalId(Platform.YOUTUBE_SHORTS, match.group(1)) if match else None
+
+    if host.endswith("tiktok.com"):
+        for pattern in _TIKTOK_PATTERNS:
+            match = pattern.search(path)
+            if match:
+                return CanonicalId(Platform.TIKTOK, match.group(1))
+        return None
+
+    if host in ("instagram.com", "instagr.am"):
+        match = _INSTAGRAM_PATTERN.match(path)
+        return CanonicalId(Platform.INSTAGRAM, match.group(1)) if match else None
+
+    if host.endswith("substack.com") and host != "substack.com":
+        match = _SUBSTACK_POST_PATTERN.match(path)
+        if match:
+            return CanonicalId(Platform.SUBSTACK, f"{host.split('.')[0]}/{match.group(1)}")
+        return None
+
+    if host.endswith("loom.com"):
+        match = _LOOM_PATTERN.match(path)
+        return CanonicalId(Platform.SUBSTACK, f"loom:{match.group(1)}") if match else None
+
+    if host.endswith("vimeo.com"):
+        match = _VIMEO_PATTERN.search(path)
+        return CanonicalId(Platform.SUBSTACK, f"vimeo:{match.group(1)}") if match else None
+
+    return None
+
+
+def canonical_id(
+    url: str,
+    platform: Optional[Platform] = None,
+    native_id: Optional[str] = None,
+) -> CanonicalId:
+    """
+    Canonical identity for a URL, falling back to what the source reported.
+
+    Unrecognized URLs keep the given platform and native_id; if there is no
+    native_id either, a hash of the URL without query string is used.
+    """
+    resolved = canonicalize_url(url)
+    if resolved:
+        return resolved
+
+    if platform == Platform.INSTAGRAM and native_id:
+        return CanonicalId(platform, instagram_shortcode(native_id))
+
+    if not native_id:
+        parts = urlsplit(url or "")
+        normalized = f"{(parts.hostname or '').lower()}{parts.path.rstrip('/')}"
+        native_id = hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+    return CanonicalId(platform or Platform.SUBSTACK, native_id)
+
+
+def canonicalize_video(video: VideoInfo) -> VideoInfo:
+    """Rewrite a VideoInfo's platform and video_id to their canonical values (in place)."""
+    resolved = canonical_id(video.video_url, video.platform, video.video_id)
+    video.platform = resolved.platform
+    video.video_id = resolved.native_id
+    return video
@@ -25,6 +25,7 @@ import json
 from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
 
 from config.settings import settings
+from src.proxy_pool import PLAYWRIGHT_PROXY_ENV, get_proxy_pool, playwright_proxy, playwright_proxy_env
 
 logger = logging.getLogger(__name__)
 
@@ -95,6 +96,8 @@ class HashtagExtractor:
             self._playwright = sync_playwright().start()
             self._browser = self._playwright.chromium.launch(
                 headless=True,
+                # Placeholder so contexts can each set their own proxy
+                proxy={"server": "http://per-context"} if len(get_proxy_pool()) else None,
                 args=[
                     "--disable-blink-features=AutomationControlled",
                     "--disable-dev-shm-usage",
@@ -104,37 +107,43 @@ class HashtagExtractor:
         return self._browser
 
     def _get_context_sync(self) -> BrowserContext:
-        """Get or create browser context with stealth settings (sync version)."""
+        """Get or create the shared browser context with stealth settings (sync version)."""
         if self._context is None:
-            browser = self._get_browser_sync()
-
-            # Randomize viewport
-            viewports = [
-                {"width": 1920, "height": 1080},
-                {"width": 1366, "height": 768},
-                {"width": 1536, "height": 864},
-                {"width": 1440, "height": 900},
-            ]
-            viewport = random.choice(viewports)
-
-            self._context = browser.new_context(
-                viewport=viewport,
-                user_agent=self._get_random_user_agent(),
-                locale="en-US",
-                timezone_id="America/New_York",
-            )
+            self._context = self._create_context_sync()
+        return self._context
 
-            # Load cookies if they exist
-            cookies_file = Path(settings.session_dir) / "cookies.json"
-            if cookies_file.exists():
-                try:
-                    cookies = json.loads(cookies_file.read_text())
-                    self._context.add_cookies(cookies)
-                    logger.info("Loaded saved cookies")
-                except Exception as e:
-                    logger.warning(f"Failed to load cookies: {e}")
+    def _create_context_sync(self, proxy: Optional[str] = None) -> BrowserContext:
+        """Create a browser context with stealth settings, optionally through a proxy."""
+        browser = self._get_browser_sync()
 
-        return self._context
+        # Randomize viewport
+        viewports = [
+            {"width": 1920, "height": 1080},
+            {"width": 1366, "height": 768},
+            {"width": 1536, "height": 864},
+            {"width": 1440, "height": 900},
+        ]
+        viewport = random.choice(viewports)
+
+        context = browser.new_context(
+            viewport=viewport,
+            user_agent=self._get_random_user_agent(),
+            locale="en-US",
+            timezone_id="America/New_York",
+            proxy=playwright_proxy(proxy),
+        )
+
+        # Load cookies if they exist
+        cookies_file = Path(settings.session_dir) / "cookies.json"
+        if cookies_file.exists():
+            try:
+                cookies = json.loads(cookies_file.read_text())
+                context.add_cookies(cookies)
+                logger.info("Loaded saved cookies")
+            except Exception as e:
+                logger.warning(f"Failed to load cookies: {e}")
+
+        return context
 
     def _get_random_user_agent(self) -> str:
         """Get a random modern user agent."""
@@ -284,6 +293,8 @@ class HashtagExtractor:
         import subprocess
         import json as json_module
 
+        proxy_lease = get_proxy_pool().lease()
+
         # Create extraction script that runs Playwright synchronously in a fresh Python process
         script = f'''
 import sys
@@ -292,6 +303,7 @@ sys.path.insert(0, r"{Path(__file__).parent.parent.parent}")
 # Import only what we need to avoid triggering the async policy at module level
 from playwright.sync_api import sync_playwright
 import json
+import os
 import re
 import random
 import time
@@ -306,6 +318,7 @@ def extract():
         pw = sync_playwright().start()
         browser = pw.chromium.launch(
             headless=True,
+            proxy=json.loads(os.environ.get("{PLAYWRIGHT_PROXY_ENV}") or "null"),
             args=["--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage", "--no-sandbox"]
         )
         context = browser.new_context(
@@ -396,82 +409,109 @@ def extract():
 extract()
 '''
 
-        try:
-            # Platform-aware venv path
-            base_path = Path(__file__).parent.parent.parent / "venv"
-            if sys.platform == "win32":
-                venv_python = base_path / "Scripts" / "python.exe"
-            else:
-                venv_python = base_path / "bin" / "python"
-
-            # Fallback to system python if venv doesn't exist
-            if not venv_python.exists():
-                venv_python = sys.executable
-
-            result = subprocess.run(
-                [str(venv_python), "-c", script],
-                capture_output=True,
-                text=True,
-                timeout=120,
-                cwd=str(Path(__file__).parent.parent.parent)
-            )
+        with proxy_lease:
+            try:
+                # Platform-aware venv path
+                base_path = Path(__file__).parent.parent.parent / "venv"
+                if sys.platform == "win32":
+                    venv_python = base_path / "Scripts" / "python.exe"
+                else:
+                    venv_python = base_path / "bin" / "python"
+
+                # Fallback to system python if venv doesn't exist
+                if not venv_python.exists():
+                    venv_python = sys.executable
+
+                result = subprocess.run(
+                    [str(venv_python), "-c", script],
+                    capture_output=True,
+                    text=True,
+                    timeout=120,
+                    cwd=str(Path(__file__).parent.parent.parent),
+                    env=playwright_proxy_env(proxy_lease.url),
+                )
+
+                if result.returncode != 0:
+                    proxy_lease.fail()
+                    logger.error(f"Subprocess failed: {result.stderr}")
+                    return ExtractionResult(
+                        success=False,
+                        error=result.stderr,
+                        videos_requested=count,
+                    )
+
+                from src.extractor.canonical import canonicalize_video
+
+                data = json_module.loads(result.stdout)
+                if not data["success"]:
+                    proxy_lease.fail()
+                videos = [canonicalize_video(VideoInfo(
+                    platform=Platform.TIKTOK,
+                    video_url=v["video_url"],
+                    video_id=v["video_id"],
+                    author_username=v["author_username"],
+                    thumbnail_url=v.get("thumbnail_url"),
+                    likes=v.get("likes", 0),
+                    comments=v.get("comments", 0),
+                    views=v.get("views", 0),
+                    shares=v.get("shares", 0),
+                    caption=v.get("caption"),
+                    hashtags=v.get("hashtags", []),
+                    sound_name=v.get("sound_name"),
+                )) for v in data["videos"]]
+
+                return ExtractionResult(
+                    success=data["success"],
+                    videos=videos,
+                    videos_found=data["videos_found"],
+                    videos_requested=data["videos_requested"],
+                    error=data.get("error"),
+                )
 
-            if result.returncode != 0:
-                logger.error(f"Subprocess failed: {result.stderr}")
+            except subprocess.TimeoutExpired:
+                proxy_lease.fail()
                 return ExtractionResult(
                     success=False,
-                    error=result.stderr,
+                    error="Extraction timed out",
+                    videos_requested=count,
+                )
+            except Exception as e:
+                proxy_lease.fail()
+                logger.error(f"Subprocess extraction failed: {e}")
+                return ExtractionResult(
+                    success=False,
+                    error=str(e),
                     videos_requested=count,
                 )
-
-            data = json_module.loads(result.stdout)
-            videos = [VideoInfo(
-                platform=Platform.TIKTOK,
-                video_url=v["video_url"],
-                video_id=v["video_id"],
-                author_username=v["author_username"],
-                thumbnail_url=v.get("thumbnail_url"),
-                likes=v.get("likes", 0),
-                comments=v.get("comments", 0),
-                views=v.get("views", 0),
-                shares=v.get("shares", 0),
-                caption=v.get("caption"),
-                hashtags=v.get("hashtags", []),
-                sound_name=v.get("sound_name"),
-            ) for v in data["videos"]]
-
-            return ExtractionResult(
-                success=data["success"],
-                videos=videos,
-                videos_found=data["videos_found"],
-                videos_requested=data["videos_requested"],
-                error=data.get("error"),
-            )
-
-        except subprocess.TimeoutExpired:
-            return ExtractionResult(
-                success=False,
-                error="Extraction timed out",
-                videos_requested=count,
-            )
-        except Exception as e:
-            logger.error(f"Subprocess extraction failed: {e}")
-            return ExtractionResult(
-                success=False,
-                error=str(e),
-                videos_requested=count,
-            )
 
     def _extract_instagram_hashtag_sync(
         self, hashtag: str, count: int = 30
     ) -> ExtractionResult:
-        """Extract videos/posts from Instagram hashtag page (sync version)."""
+        """Extract videos/posts from Instagram hashtag page (sync version).
+
+        With a proxy pool configured, each extraction gets its own context on
+        a leased proxy; otherwise the shared context is reused.
+        """
+        with get_proxy_pool().lease() as proxy:
+            context = self._create_context_sync(proxy.url) if proxy.url else self._get_context_sync()
+            try:
+                result = self._extract_instagram_hashtag_in_context_sync(context, hashtag, count)
+            finally:
+                if proxy.url:
+                    context.close()
+            if not result.success:
+                proxy.fail()
+            return result
+
+    def _extract_instagram_hashtag_in_context_sync(
+        self, context: BrowserContext, hashtag: str, count: int
+    ) -> ExtractionResult:
+        """Scrape one Instagram hashtag page using the given browser context."""
         hashtag = hashtag.lstrip("#")
         url = f"https://www.instagram.com/explore/tags/{hashtag}/"
         videos = []
 
         try:
-            context = self._get_context_sync()
             page = context.new_page()
 
             logger.info(f"Loading Instagram hashtag page: {url}")
@@ -554,11 +594,15 @@ extract()
         self, hashtag: str, count: int = 30
     ) -> ExtractionResult:
         """Extract videos/posts from Instagram hashtag page (async wrapper)."""
-        return await asyncio.to_thread(
+        from src.extractor.canonical import canonicalize_video
+
+        result = await asyncio.to_thread(
             self._extract_instagram_hashtag_sync,
             hashtag,
             count
         )
+        result.videos = [canonicalize_video(v) for v in result.videos]
+        return result
 
     async def extract_hashtag(
         self, platform: Platform, hashtag: str, count: int = 30
@@ -0,0 +1,330 @@
+"""
+Multi-session Instagram client pool.
+
+Spreads instagrapi requests across several logged-in sessions so hashtag,
+user and comment extraction are no longer serialized through one client.
+Each session keeps its own persisted settings file, optional proxy and
+single-threaded executor (instagrapi clients are not thread-safe).
+
+The dispatcher applies a per-session rate limit, puts sessions that hit
+challenges or throttling into cooldown, and tracks per-session throughput
+and error metrics.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from instagrapi.exceptions import (
+    ChallengeRequired,
+    FeedbackRequired,
+    LoginRequired,
+    PleaseWaitFewMinutes,
+    RateLimitError,
+)
+
+from config.settings import settings
+from src.extractor.hashtag import ExtractionResult, VideoInfo
+from src.extractor.instagram import CommentHarvestMixin, InstagramComment, InstagramExtractor
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean "this session should rest", not "this request is bad"
+COOLDOWN_ERRORS = (ChallengeRequired, FeedbackRequired, PleaseWaitFewMinutes, RateLimitError)
+
+
+def _count_items(result: Any) -> int:
+    """Items returned by a sync extractor call (lists, or (list, cursor) pages)."""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    return 1
+
+
+class NoSessionAvailable(RuntimeError):
+    """Raised when every session is logged out or cooling down."""
+
+
+@dataclass
+class SessionMetrics:
+    """Per-session throughput and error counters."""
+    requests: int = 0
+    errors: int = 0
+    challenges: int = 0
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "challenges": self.challenges,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "items_per_second": round(self.items / self.busy_seconds, 3) if self.busy_seconds else 0.0,
+            "error_rate": round(self.errors / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class InstagramSession:
+    """One logged-in instagrapi client with its own rate limit and cooldown state."""
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        session_path: Path,
+        proxy: Optional[str] = None,
+        requests_per_minute: int = 20,
+    ):
+        self.username = username
+        self.password = password
+        self.proxy = proxy
+        self.extractor = InstagramExtractor(
+            session_path=str(session_path),
+            proxy=proxy,
+            executor=ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ig-{username}"),
+        )
+        self.min_interval = 60.0 / max(requests_per_minute, 1)
+        self.next_request_at = 0.0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.metrics = SessionMetrics()
+
+    @property
+    def is_logged_in(self) -> bool:
+        return self.extractor.is_logged_in
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def start_cooldown(self, seconds: float) -> None:
+        """Rest this session for the given number of seconds."""
+        self.cooldown_until = time.monotonic() + seconds
+        logger.warning(f"Instagram session {self.username} cooling down for {seconds:.0f}s")
+
+    def to_dict(self) -> dict:
+        cooldown_remaining = max(0.0, self.cooldown_until - time.monotonic())
+        return {
+            "username": self.username,
+            "logged_in": self.is_logged_in,
+            "proxy_configured": bool(self.proxy),
+            "cooling_down": cooldown_remaining > 0,
+            "cooldown_remaining_seconds": round(cooldown_remaining),
+            "in_flight": self.in_flight,
+            "metrics": self.metrics.to_dict(),
+        }
+
+
+class InstagramClientPool(CommentHarvestMixin):
+    """
+    Dispatch Instagram requests across a pool of logged-in sessions.
+
+    Exposes the same async interface as InstagramExtractor (login, get_hashtag_posts,
+    get_user_posts, get_post_comments, logout, is_logged_in) so callers can use either.
+    Comment harvesting pages are spread across sessions like any other request.
+    """
+
+    def __init__(
+        self,
+        accounts: list[dict],
+        session_dir: Optional[Path] = None,
+        requests_per_minute: Optional[int] = None,
+        challenge_cooldown: Optional[int] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            accounts: List of {"username", "password", "proxy"} dicts (proxy optional)
+            session_dir: Directory for per-session settings files
+            requests_per_minute: Rate limit applied to each session
+            challenge_cooldown: Seconds a session rests after a challenge or throttle
+        """
+        if not accounts:
+            raise ValueError("At least one Instagram account is required for the pool")
+
+        session_dir = Path(session_dir or settings.session_dir)
+        rpm = requests_per_minute or settings.instagram_session_rpm
+        self.challenge_cooldown = challenge_cooldown or settings.instagram_challenge_cooldown
+
+        self.sessions = [
+            InstagramSession(
+                username=account["username"],
+                password=account["password"],
+                session_path=session_dir / f"instagram_session_{account['username']}.json",
+                proxy=account.get("proxy") or None,
+                requests_per_minute=rpm,
+            )
+            for account in accounts
+        ]
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_logged_in(self) -> bool:
+        """True if at least one session is logged in."""
+        return any(s.is_logged_in for s in self.sessions)
+
+    async def login(self, username: Optional[str] = None, password: Optional[str] = None) -> bool:
+        """
+        Log in every pooled session (or just the one matching username).
+
+        Returns:
+            True if at least one session is logged in afterwards
+        """
+        targets = [s for s in self.sessions if not username or s.username == username]
+        if not targets:
+            raise ValueError(f"No pooled Instagram session for {username}")
+
+        async def login_one(session: InstagramSession) -> None:
+            try:
+                await session.extractor.login(
+                    username=session.username,
+                    password=password or session.password,
+                )
+            except COOLDOWN_ERRORS as e:
+                session.metrics.challenges += 1
+                session.start_cooldown(self.challenge_cooldown)
+                logger.error(f"Instagram session {session.username} login blocked: {e}")
+            except Exception as e:
+                logger.error(f"Instagram session {session.username} login failed: {e}")
+
+        await asyncio.gather(*[login_one(s) for s in targets])
+
+        if not self.is_logged_in:
+            raise LoginRequired("No Instagram session could log in")
+        return True
+
+    async def _acquire(self) -> InstagramSession:
+        """Pick the session that can send soonest and reserve its next rate-limit slot."""
+        async with self._lock:
+            candidates = [s for s in self.sessions if s.is_logged_in and not s.cooling_down]
+            if not candidates:
+                raise NoSessionAvailable("All Instagram sessions are logged out or cooling down")
+
+            session = min(candidates, key=lambda s: (s.next_request_at, s.in_flight))
+            now = time.monotonic()
+            start_at = max(now, session.next_request_at)
+            session.next_request_at = start_at + session.min_interval
+            session.in_flight += 1
+
+        wait = start_at - now
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return session
+
+    async def _dispatch(
+        self,
+        method: Callable[[InstagramExtractor], Callable[..., Any]],
+        *args: Any,
+    ) -> Any:
+        """
+        Run a sync extractor method on the next available session.
+
+        Sessions that hit challenges or throttling are put into cooldown and the
+        request is retried on another session.
+        """
+        attempts = len(self.sessions)
+        last_error: Optional[Exception] = None
+
+        for _ in range(attempts):
+            session = await self._acquire()
+            started = time.monotonic()
+            try:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    session.extractor._executor, method(session.extractor), *args
+                )
+                session.metrics.requests += 1
+                session.metrics.items += _count_items(result)
+                return result
+            except COOLDOWN_ERRORS as e:
+                session.metrics.requests += 1
+                session.metrics.errors += 1
+                session.metrics.challenges += 1
+                session.start_cooldown(self.challenge_cooldown)
+                last_error = e
+            except LoginRequired as e:
+                session.metrics.requests += 1
+                session.metrics.errors += 1
+                session.extractor._logged_in = False
+                logger.warning(f"Instagram session {session.username} lost its login: {e}")
+                last_error = e
+            except Exception:
+                session.metrics.requests += 1
+                session.metrics.errors += 1
+                raise
+            finally:
+                session.metrics.busy_seconds += time.monotonic() - started
+                session.in_flight -= 1
+
+        raise NoSessionAvailable(f"All sessions failed: {last_error}")
+
+    async def get_hashtag_posts(self, hashtag: str, limit: int = 50) -> ExtractionResult:
+        """Get recent posts for a hashtag using the next available session."""
+        try:
+            videos: list[VideoInfo] = await self._dispatch(
+                lambda ex: ex._get_hashtag_posts_sync, hashtag, limit
+            )
+            return ExtractionResult(
+                success=True,
+                videos=videos,
+                videos_requested=limit,
+                videos_found=len(videos),
+            )
+        except Exception as e:
+            logger.error(f"Pooled hashtag extraction failed: {e}")
+            return ExtractionResult(success=False, error=str(e), videos_requested=limit)
+
+    async def get_user_posts(self, username: str, limit: int = 20) -> ExtractionResult:
+        """Get posts from a user using the next available session."""
+        try:
+            videos: list[VideoInfo] = await self._dispatch(
+                lambda ex: ex._get_user_posts_sync, username, limit
+            )
+            return ExtractionResult(
+                success=True,
+                videos=videos,
+                videos_requested=limit,
+                videos_found=len(videos),
+            )
+        except Exception as e:
+            logger.error(f"Pooled user extraction failed: {e}")
+            return ExtractionResult(success=False, error=str(e), videos_requested=limit)
+
+    async def get_post_comments(self, media_id: str, limit: int = 100) -> list[InstagramComment]:
+        """Get comments on a post using the next available session."""
+        return await self._dispatch(lambda ex: ex._get_post_comments_sync, media_id, limit)
+
+    async def _fetch_comment_page(
+        self,
+        media_id: str,
+        page_size: int,
+        cursor: Optional[str],
+    ) -> tuple[list[InstagramComment], Optional[str]]:
+        return await self._dispatch(
+            lambda ex: ex._get_comment_page_sync, media_id, page_size, cursor
+        )
+
+    def logout(self) -> None:
+        """Logout every session and clear their session files."""
+        for session in self.sessions:
+            session.extractor.logout()
+
+    def get_metrics(self) -> dict:
+        """Per-session throughput, error and cooldown state, plus pool totals."""
+        sessions = [s.to_dict() for s in self.sessions]
+        return {
+            "session_count": len(self.sessions),
+            "available": sum(1 for s in self.sessions if s.is_logged_in and not s.cooling_down),
+            "total_requests": sum(s.metrics.requests for s in self.sessions),
+            "total_errors": sum(s.metrics.errors for s in self.sessions),
+            "total_items": sum(s.metrics.items for s in self.sessions),
+            "sessions": sessions,
+        }
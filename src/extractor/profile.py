@@ -3,6 +3,10 @@ Profile extractor for TikTok and Instagram user profiles.
 
 Extracts profile metadata and video URLs from user profile pages.
 Uses subprocess for Windows compatibility (same pattern as hashtag.py).
+
+Single-profile extraction launches a fresh browser per username. For refreshing
+many tracked accounts, use extract_profiles_batch(), which runs every username
+through one warm browser with a bounded number of concurrent pages.
 """
 
 import asyncio
@@ -17,11 +21,266 @@ from typing import Optional
 from pathlib import Path
 import logging
 
+from config.settings import settings
 from src.extractor.hashtag import Platform, VideoInfo
+from src.extractor.canonical import canonicalize_video
+from src.proxy_pool import PLAYWRIGHT_PROXY_ENV, get_proxy_pool, playwright_proxy_env
 
 logger = logging.getLogger(__name__)
 
 
+# Subprocess script for batched profile extraction. Unlike the single-profile
+# scripts it uses the async Playwright API so several pages can share one
+# browser. Config is passed as JSON in argv[1]; the proxy comes from the
+# environment variable it names (see playwright_proxy_env). One JSON result
+# per line is printed to stdout as each profile finishes.
+_BATCH_PROFILE_SCRIPT = r'''
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+
+from playwright.async_api import async_playwright
+
+config = json.loads(sys.argv[1])
+proxy = json.loads(os.environ.get(config["proxy_env"]) or "null")
+
+
+def parse_count(text):
+    if not text:
+        return 0
+    text = text.strip().upper().replace(",", "")
+    try:
+        if "K" in text:
+            return int(float(text.replace("K", "")) * 1000)
+        elif "M" in text:
+            return int(float(text.replace("M", "")) * 1000000)
+        elif "B" in text:
+            return int(float(text.replace("B", "")) * 1000000000)
+        else:
+            return int(text)
+    except (ValueError, TypeError):
+        return 0
+
+
+async def scroll(page, times):
+    for _ in range(times):
+        await page.evaluate("window.scrollBy(0, window.innerHeight)")
+        await asyncio.sleep(random.uniform(1, 2.5))
+
+
+async def extract_tiktok(page, username, video_count):
+    await page.goto(f"https://www.tiktok.com/@{username}", wait_until="networkidle", timeout=30000)
+    await asyncio.sleep(random.uniform(2, 4))
+
+    is_private = bool(await page.query_selector_all("text=/[Pp]rivate/"))
+    info = {
+        "platform": "tiktok",
+        "username": username,
+        "display_name": "",
+        "bio": "",
+        "profile_picture_url": None,
+        "follower_count": 0,
+        "following_count": 0,
+        "post_count": 0,
+        "is_verified": False,
+        "is_private": is_private,
+    }
+
+    name_elem = await page.query_selector('h1[data-e2e="user-subtitle"], h2[data-e2e="user-subtitle"]')
+    if name_elem:
+        info["display_name"] = (await name_elem.inner_text()).strip()
+
+    bio_elem = await page.query_selector('h2[data-e2e="user-bio"]')
+    if bio_elem:
+        info["bio"] = (await bio_elem.inner_text()).strip()
+
+    for elem in await page.query_selector_all('[data-e2e="followers-count"], [data-e2e="following-count"]'):
+        e2e = await elem.get_attribute("data-e2e") or ""
+        count = parse_count(await elem.inner_text())
+        if "followers" in e2e:
+            info["follower_count"] = count
+        elif "following" in e2e:
+            info["following_count"] = count
+
+    if await page.query_selector('[data-e2e="user-verified"], svg[class*="Verified"]'):
+        info["is_verified"] = True
+
+    avatar_elem = await page.query_selector('img[data-e2e="user-avatar"]')
+    if avatar_elem:
+        info["profile_picture_url"] = await avatar_elem.get_attribute("src")
+
+    videos = []
+    if not is_private:
+        await scroll(page, min(video_count // 10 + 1, 5))
+
+        video_elements = await page.query_selector_all('[data-e2e="user-post-item"]')
+        if not video_elements:
+            video_elements = await page.query_selector_all('div[class*="DivItemContainer"]')
+        info["post_count"] = len(video_elements)
+
+        for elem in video_elements[:video_count]:
+            try:
+                link_elem = await elem.query_selector("a")
+                video_url = await link_elem.get_attribute("href") if link_elem else None
+                if not video_url:
+                    continue
+                if not video_url.startswith("http"):
+                    video_url = f"https://www.tiktok.com{video_url}"
+                video_id_match = re.search(r"/video/(\d+)", video_url)
+
+                likes_elem = await elem.query_selector('[data-e2e="video-like-count"], strong[data-e2e="like-count"]')
+                views_elem = await elem.query_selector('[data-e2e="video-views"], strong[class*="views"]')
+                img = await elem.query_selector("img")
+
+                videos.append({
+                    "video_url": video_url,
+                    "video_id": video_id_match.group(1) if video_id_match else "",
+                    "author_username": username,
+                    "thumbnail_url": await img.get_attribute("src") if img else None,
+                    "likes": parse_count(await likes_elem.inner_text()) if likes_elem else 0,
+                    "views": parse_count(await views_elem.inner_text()) if views_elem else 0,
+                })
+            except Exception:
+                continue
+
+    return info, videos
+
+
+async def extract_instagram(page, username, video_count):
+    await page.goto(f"https://www.instagram.com/{username}/", wait_until="networkidle", timeout=30000)
+    await asyncio.sleep(random.uniform(2, 4))
+
+    login_wall = await page.query_selector('input[name="username"]')
+    is_private = bool(await page.query_selector("text=/[Pp]rivate/"))
+    info = {
+        "platform": "instagram",
+        "username": username,
+        "display_name": "",
+        "bio": "",
+        "profile_picture_url": None,
+        "follower_count": 0,
+        "following_count": 0,
+        "post_count": 0,
+        "is_verified": False,
+        "is_private": is_private,
+    }
+
+    meta_desc = await page.query_selector('meta[name="description"]')
+    if meta_desc:
+        content = await meta_desc.get_attribute("content") or ""
+        for key, pattern in (
+            ("follower_count", r"([\d,.]+[KMB]?)\s*[Ff]ollowers"),
+            ("following_count", r"([\d,.]+[KMB]?)\s*[Ff]ollowing"),
+            ("post_count", r"([\d,.]+[KMB]?)\s*[Pp]osts"),
+        ):
+            match = re.search(pattern, content)
+            if match:
+                info[key] = parse_count(match.group(1))
+
+    header_elem = await page.query_selector("header section h1, header h2")
+    if header_elem:
+        info["display_name"] = (await header_elem.inner_text()).strip()
+
+    avatar_elem = await page.query_selector("header img")
+    if avatar_elem:
+        info["profile_picture_url"] = await avatar_elem.get_attribute("src")
+
+    if await page.query_selector('header svg[aria-label*="Verified"], span[title="Verified"]'):
+        info["is_verified"] = True
+
+    videos = []
+    if not is_private and not login_wall:
+        await scroll(page, min(video_count // 12 + 1, 5))
+
+        seen_urls = set()
+        for link_elem in await page.query_selector_all('a[href*="/p/"], a[href*="/reel/"]'):
+            if len(videos) >= video_count:
+                break
+            try:
+                href = await link_elem.get_attribute("href")
+                if not href or href in seen_urls:
+                    continue
+                seen_urls.add(href)
+                if not href.startswith("http"):
+                    href = f"https://www.instagram.com{href}"
+                post_id_match = re.search(r"/(?:p|reel)/([^/]+)", href)
+                img = await link_elem.query_selector("img")
+
+                videos.append({
+                    "video_url": href,
+                    "video_id": post_id_match.group(1) if post_id_match else "",
+                    "author_username": username,
+                    "thumbnail_url": await img.get_attribute("src") if img else None,
+                })
+            except Exception:
+                continue
+
+    return info, videos
+
+
+EXTRACTORS = {"tiktok": extract_tiktok, "instagram": extract_instagram}
+
+
+async def extract_one(context, semaphore, username):
+    video_count = config["video_count"]
+    async with semaphore:
+        page = await context.new_page()
+        try:
+            info, videos = await asyncio.wait_for(
+                EXTRACTORS[config["platform"]](page, username, video_count),
+                timeout=config["profile_timeout"],
+            )
+            result = {
+                "username": username,
+                "success": True,
+                "profile_info": info,
+                "videos": videos,
+                "videos_found": len(videos),
+                "videos_requested": video_count,
+                "error": None,
+            }
+        except asyncio.TimeoutError:
+            result = {
+                "username": username,
+                "success": False,
+                "error": f"Profile extraction timed out after {config['profile_timeout']}s",
+            }
+        except Exception as e:
+            result = {"username": username, "success": False, "error": str(e)}
+        finally:
+            await page.close()
+
+    print(json.dumps(result), flush=True)
+
+
+async def main():
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(
+            headless=True,
+            proxy=proxy,
+            args=["--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage", "--no-sandbox"],
+        )
+        context = await browser.new_context(
+            viewport={"width": 1920, "height": 1080},
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            locale="en-US",
+        )
+        semaphore = asyncio.Semaphore(config["max_concurrent_pages"])
+        await asyncio.gather(*[
+            extract_one(context, semaphore, username)
+            for username in config["usernames"]
+        ])
+        await context.close()
+        await browser.close()
+
+
+asyncio.run(main())
+'''
+
+
 @dataclass
 class ProfileInfo:
     """Extracted profile information."""
@@ -70,6 +329,7 @@ class ProfileExtractor:
     ) -> ProfileExtractionResult:
         """Extract profile info and videos from TikTok profile page."""
         username = username.lstrip("@")
+        proxy_lease = get_proxy_pool().lease()
 
         # Subprocess script for TikTok profile extraction
         script = f'''
@@ -78,6 +338,7 @@ sys.path.insert(0, r"{Path(__file__).parent.parent.parent}")
 
 from playwright.sync_api import sync_playwright
 import json
+import os
 import re
 import random
 import time
@@ -110,6 +371,7 @@ def extract():
         pw = sync_playwright().start()
         browser = pw.chromium.launch(
             headless=True,
+            proxy=json.loads(os.environ.get("{PLAYWRIGHT_PROXY_ENV}") or "null"),
             args=["--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage", "--no-sandbox"]
         )
         context = browser.new_context(
@@ -264,88 +526,53 @@ def extract():
 extract()
 '''
 
-        try:
-            base_path = Path(__file__).parent.parent.parent / "venv"
-            if sys.platform == "win32":
-                venv_python = base_path / "Scripts" / "python.exe"
-            else:
-                venv_python = base_path / "bin" / "python"
-
-            if not venv_python.exists():
-                venv_python = sys.executable
-
-            result = subprocess.run(
-                [str(venv_python), "-c", script],
-                capture_output=True,
-                text=True,
-                timeout=120,
-                cwd=str(Path(__file__).parent.parent.parent)
-            )
+        with proxy_lease:
+            try:
+                result = subprocess.run(
+                    [self._python_executable(), "-c", script],
+                    capture_output=True,
+                    text=True,
+                    timeout=120,
+                    cwd=str(Path(__file__).parent.parent.parent),
+                    env=playwright_proxy_env(proxy_lease.url),
+                )
 
-            if result.returncode != 0:
-                logger.error(f"Subprocess failed: {result.stderr}")
+                if result.returncode != 0:
+                    proxy_lease.fail()
+                    logger.error(f"Subprocess failed: {result.stderr}")
+                    return ProfileExtractionResult(
+                        success=False,
+                        error=result.stderr,
+                        videos_requested=video_count,
+                    )
+
+                data = json.loads(result.stdout)
+                if not data.get("success"):
+                    proxy_lease.fail()
+                return self._build_result(Platform.TIKTOK, data, video_count)
+
+            except subprocess.TimeoutExpired:
+                proxy_lease.fail()
                 return ProfileExtractionResult(
                     success=False,
-                    error=result.stderr,
+                    error="Profile extraction timed out",
                     videos_requested=video_count,
                 )
-
-            data = json.loads(result.stdout)
-
-            profile_info = None
-            if data.get("profile_info"):
-                pi = data["profile_info"]
-                profile_info = ProfileInfo(
-                    platform=Platform.TIKTOK,
-                    username=pi["username"],
-                    display_name=pi.get("display_name", ""),
-                    bio=pi.get("bio", ""),
-                    profile_picture_url=pi.get("profile_picture_url"),
-                    follower_count=pi.get("follower_count", 0),
-                    following_count=pi.get("following_count", 0),
-                    post_count=pi.get("post_count", 0),
-                    is_verified=pi.get("is_verified", False),
-                    is_private=pi.get("is_private", False),
+            except Exception as e:
+                proxy_lease.fail()
+                logger.error(f"Profile extraction failed: {e}")
+                return ProfileExtractionResult(
+                    success=False,
+                    error=str(e),
+                    videos_requested=video_count,
                 )
 
-            videos = [VideoInfo(
-                platform=Platform.TIKTOK,
-                video_url=v["video_url"],
-                video_id=v["video_id"],
-                author_username=v["author_username"],
-                thumbnail_url=v.get("thumbnail_url"),
-                likes=v.get("likes", 0),
-                views=v.get("views", 0),
-            ) for v in data.get("videos", [])]
-
-            return ProfileExtractionResult(
-                success=data["success"],
-                profile_info=profile_info,
-                videos=videos,
-                videos_found=data.get("videos_found", 0),
-                videos_requested=data.get("videos_requested", video_count),
-                error=data.get("error"),
-            )
-
-        except subprocess.TimeoutExpired:
-            return ProfileExtractionResult(
-                success=False,
-                error="Profile extraction timed out",
-                videos_requested=video_count,
-            )
-        except Exception as e:
-            logger.error(f"Profile extraction failed: {e}")
-            return ProfileExtractionResult(
-                success=False,
-                error=str(e),
-                videos_requested=video_count,
-            )
-
     async def extract_instagram_profile(
         self, username: str, video_count: int = 30
     ) -> ProfileExtractionResult:
         """Extract profile info and videos from Instagram profile page."""
         username = username.lstrip("@")
+        proxy_lease = get_proxy_pool().lease()
 
         script = f'''
 import sys
@@ -353,6 +580,7 @@ sys.path.insert(0, r"{Path(__file__).parent.parent.parent}")
 
 from playwright.sync_api import sync_playwright
 import json
+import os
 import re
 import random
 import time
@@ -384,6 +612,7 @@ def extract():
         pw = sync_playwright().start()
         browser = pw.chromium.launch(
             headless=True,
+            proxy=json.loads(os.environ.get("{PLAYWRIGHT_PROXY_ENV}") or "null"),
             args=["--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage", "--no-sandbox"]
         )
         context = browser.new_context(
@@ -524,81 +753,47 @@ def extract():
 extract()
 '''
 
-        try:
-            base_path = Path(__file__).parent.parent.parent / "venv"
-            if sys.platform == "win32":
-                venv_python = base_path / "Scripts" / "python.exe"
-            else:
-                venv_python = base_path / "bin" / "python"
-
-            if not venv_python.exists():
-                venv_python = sys.executable
-
-            result = subprocess.run(
-                [str(venv_python), "-c", script],
-                capture_output=True,
-                text=True,
-                timeout=120,
-                cwd=str(Path(__file__).parent.parent.parent)
-            )
+        with proxy_lease:
+            try:
+                result = subprocess.run(
+                    [self._python_executable(), "-c", script],
+                    capture_output=True,
+                    text=True,
+                    timeout=120,
+                    cwd=str(Path(__file__).parent.parent.parent),
+                    env=playwright_proxy_env(proxy_lease.url),
+                )
 
-            if result.returncode != 0:
-                logger.error(f"Instagram subprocess failed: {result.stderr}")
+                if result.returncode != 0:
+                    proxy_lease.fail()
+                    logger.error(f"Instagram subprocess failed: {result.stderr}")
+                    return ProfileExtractionResult(
+                        success=False,
+                        error=result.stderr,
+                        videos_requested=video_count,
+                    )
+
+                data = json.loads(result.stdout)
+                if not data.get("success"):
+                    proxy_lease.fail()
+                return self._build_result(Platform.INSTAGRAM, data, video_count)
+
+            except subprocess.TimeoutExpired:
+                proxy_lease.fail()
                 return ProfileExtractionResult(
                     success=False,
-                    error=result.stderr,
+                    error="Instagram profile extraction timed out",
                     videos_requested=video_count,
                 )
-
-            data = json.loads(result.stdout)
-
-            profile_info = None
-            if data.get("profile_info"):
-                pi = data["profile_info"]
-                profile_info = ProfileInfo(
-                    platform=Platform.INSTAGRAM,
-                    username=pi["username"],
-                    display_name=pi.get("display_name", ""),
-                    bio=pi.get("bio", ""),
-                    profile_picture_url=pi.get("profile_picture_url"),
-                    follower_count=pi.get("follower_count", 0),
-                    following_count=pi.get("following_count", 0),
-                    post_count=pi.get("post_count", 0),
-                    is_verified=pi.get("is_verified", False),
-                    is_private=pi.get("is_private", False),
+            except Exception as e:
+                proxy_lease.fail()
+                logger.error(f"Instagram profile extraction failed: {e}")
+                return ProfileExtractionResult(
+                    success=False,
+                    error=str(e),
+                    videos_requested=video_count,
                 )
 
-            videos = [VideoInfo(
-                platform=Platform.INSTAGRAM,
-                video_url=v["video_url"],
-                video_id=v["video_id"],
-                author_username=v["author_username"],
-                thumbnail_url=v.get("thumbnail_url"),
-            ) for v in data.get("videos", [])]
-
-            return ProfileExtractionResult(
-                success=data["success"],
-                profile_info=profile_info,
-                videos=videos,
-                videos_found=data.get("videos_found", 0),
-                videos_requested=data.get("videos_requested", video_count),
-                error=data.get("error"),
-            )
-
-        except subprocess.TimeoutExpired:
-            return ProfileExtractionResult(
-                success=False,
-                error="Instagram profile extraction timed out",
-                videos_requested=video_count,
-            )
-        except Exception as e:
-            logger.error(f"Instagram profile extraction failed: {e}")
-            return ProfileExtractionResult(
-                success=False,
-                error=str(e),
-                videos_requested=video_count,
-            )
-
     async def extract_profile(
         self, platform: Platform, username: str, video_count: int = 30
     ) -> ProfileExtractionResult:
@@ -613,3 +808,178 @@ extract()
                 error=f"Unknown platform: {platform}",
                 videos_requested=video_count,
             )
+
+    def _python_executable(self) -> str:
+        """Get the venv python (platform-aware), falling back to the current interpreter."""
+        base_path = Path(__file__).parent.parent.parent / "venv"
+        if sys.platform == "win32":
+            venv_python = base_path / "Scripts" / "python.exe"
+        else:
+            venv_python = base_path / "bin" / "python"
+
+        if not venv_python.exists():
+            return sys.executable
+        return str(venv_python)
+
+    def _build_result(
+        self, platform: Platform, data: dict, video_count: int
+    ) -> ProfileExtractionResult:
+        """Convert a JSON result emitted by an extraction script into a ProfileExtractionResult."""
+        profile_info = None
+        if data.get("profile_info"):
+            pi = data["profile_info"]
+            profile_info = ProfileInfo(
+                platform=platform,
+                username=pi["username"],
+                display_name=pi.get("display_name", ""),
+                bio=pi.get("bio", ""),
+                profile_picture_url=pi.get("profile_picture_url"),
+                follower_count=pi.get("follower_count", 0),
+                following_count=pi.get("following_count", 0),
+                post_count=pi.get("post_count", 0),
+                is_verified=pi.get("is_verified", False),
+                is_private=pi.get("is_private", False),
+            )
+
+        videos = [canonicalize_video(VideoInfo(
+            platform=platform,
+            video_url=v["video_url"],
+            video_id=v["video_id"],
+            author_username=v["author_username"],
+            thumbnail_url=v.get("thumbnail_url"),
+            likes=v.get("likes", 0),
+            views=v.get("views", 0),
+        )) for v in data.get("videos", [])]
+
+        return ProfileExtractionResult(
+            success=data.get("success", False),
+            profile_info=profile_info,
+            videos=videos,
+            videos_found=data.get("videos_found", len(videos)),
+            videos_requested=data.get("videos_requested", video_count),
+            error=data.get("error"),
+        )
+
+    async def extract_profiles_batch(
+        self,
+        platform: Platform,
+        usernames: list[str],
+        video_count: int = 30,
+        max_concurrent_pages: Optional[int] = None,
+        profile_timeout: Optional[int] = None,
+    ) -> dict[str, ProfileExtractionResult]:
+        """
+        Extract many profiles through one warm browser.
+
+        All usernames are processed in a single subprocess that launches
+        Chromium once and opens at most max_concurrent_pages pages at a time.
+        Each profile has its own timeout, so one slow page does not fail the batch.
+
+        Args:
+            platform: TikTok or Instagram
+            usernames: Usernames to extract (leading @ is stripped)
+            video_count: Videos to collect per profile
+            max_concurrent_pages: Concurrent pages in the shared browser
+            profile_timeout: Per-profile timeout in seconds
+
+        Returns:
+            Dict of username -> ProfileExtractionResult (one entry per username)
+        """
+        usernames = list(dict.fromkeys(u.lstrip("@") for u in usernames if u))
+        if not usernames:
+            return {}
+
+        if platform not in (Platform.TIKTOK, Platform.INSTAGRAM):
+            return {
+                u: ProfileExtractionResult(
+                    success=False,
+                    error=f"Unknown platform: {platform}",
+                    videos_requested=video_count,
+                )
+                for u in usernames
+            }
+
+        max_concurrent_pages = max_concurrent_pages or settings.profile_batch_concurrency
+        profile_timeout = profile_timeout or settings.profile_batch_timeout
+
+        proxy_lease = get_proxy_pool().lease()
+        config = {
+            "platform": platform.value,
+            "usernames": usernames,
+            "video_count": video_count,
+            "max_concurrent_pages": max_concurrent_pages,
+            "profile_timeout": profile_timeout,
+            "proxy_env": PLAYWRIGHT_PROXY_ENV,
+        }
+
+        # Worst case every wave of pages hits its timeout, plus browser startup
+        waves = -(-len(usernames) // max_concurrent_pages)
+        overall_timeout = waves * profile_timeout + 60
+
+        logger.info(
+            f"Batch extracting {len(usernames)} {platform.value} profiles "
+            f"({max_concurrent_pages} concurrent pages)"
+        )
+
+        def run_batch():
+            return subprocess.run(
+                [self._python_executable(), "-c", _BATCH_PROFILE_SCRIPT, json.dumps(config)],
+                capture_output=True,
+                text=True,
+                timeout=overall_timeout,
+                cwd=str(Path(__file__).parent.parent.parent),
+                env=playwright_proxy_env(proxy_lease.url),
+            )
+
+        results: dict[str, ProfileExtractionResult] = {}
+        error = None
+
+        def collect(stdout) -> None:
+            # Profiles are printed one per line as they finish, so a crash or
+            # timeout part-way through still yields results for completed profiles
+            if isinstance(stdout, bytes):
+                stdout = stdout.decode("utf-8", errors="replace")
+            for line in (stdout or "").splitlines():
+                line = line.strip()
+                if not line.startswith("{"):
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                username = data.get("username")
+                if username in usernames:
+                    results[username] = self._build_result(platform, data, video_count)
+
+        try:
+            result = await asyncio.to_thread(run_batch)
+            collect(result.stdout)
+
+            if result.returncode != 0:
+                logger.error(f"Batch profile subprocess failed: {result.stderr}")
+                error = result.stderr or f"Subprocess exited with code {result.returncode}"
+
+        except subprocess.TimeoutExpired as e:
+            # TimeoutExpired carries the output captured before the kill (as bytes)
+            collect(e.stdout)
+            logger.warning(f"Batch profile extraction timed out with {len(results)}/{len(usernames)} profiles done")
+            error = "Batch profile extraction timed out"
+        except Exception as e:
+            logger.error(f"Batch profile extraction failed: {e}")
+            error = str(e)
+
+        for username in usernames:
+            if username not in results:
+                results[username] = ProfileExtractionResult(
+                    success=False,
+                    error=error or "No result returned for profile",
+                    videos_requested=video_count,
+                )
+
+        succeeded = sum(1 for r in results.values() if r.success)
+        if not succeeded:
+            proxy_lease.fail()
+        proxy_lease.release()
+        logger.info(f"Batch profile extraction complete: {succeeded}/{len(usernames)} succeeded")
+
+        return results
@@ -2,22 +2,82 @@
 Substack extractor using RSS feeds.
 
 Extracts posts and embedded videos from Substack publications.
+
+Feeds are fetched concurrently through one shared (HTTP/2 when h2 is
+installed) client. A local feed cache keeps ETag/Last-Modified headers so
+unchanged feeds come back as 304 without parsing, and keeps parsed posts by
+guid so only new items go through VideoEmbedParser. Feeds are parsed
+incrementally (XMLPullParser over the response stream), one item at a time.
+
+Archive mode (iter_archive) pages the publication's JSON archive API to
+backfill posts older than the RSS window, streaming SubstackPost objects.
 """
 
 import asyncio
+import json
 import logging
 import re
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Optional
 from xml.etree import ElementTree
 import httpx
 from html.parser import HTMLParser
 
-from src.extractor.hashtag import Platform, VideoInfo, ExtractionResult
+from config.settings import settings
+from src.extractor.hashtag import VideoInfo, ExtractionResult
+from src.extractor.canonical import canonical_id
+from src.proxy_pool import get_proxy_pool
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Status codes that point at the egress IP rather than the request
+PROXY_BLOCK_STATUSES = (403, 429)
+
+_http_clients: dict[Optional[str], httpx.AsyncClient] = {}
+_http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client(proxy: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    Shared Substack HTTP client for a proxy (or direct), recreated if the event loop changed.
+
+    One client is kept per proxy URL so each keeps its own connection pool.
+    """
+    global _http_loop
+    loop = asyncio.get_running_loop()
+    if _http_loop is not loop:
+        _http_clients.clear()
+        _http_loop = loop
+    if proxy not in _http_clients:
+        _http_clients[proxy] = httpx.AsyncClient(
+            timeout=30.0,
+            follow_redirects=True,
+            http2=HTTP2_AVAILABLE,
+            proxy=proxy,
+            limits=httpx.Limits(max_connections=settings.substack_max_concurrent * 2),
+        )
+    return _http_clients[proxy]
+
+
+def embed_source(url: str) -> str:
+    """Short name of the host a video embed points to (youtube, loom, vimeo)."""
+    if "youtube.com" in url or "youtu.be" in url:
+        return "youtube"
+    if "loom.com" in url:
+        return "loom"
+    if "vimeo.com" in url:
+        return "vimeo"
+    return "other"
+
 
 @dataclass
 class SubstackPost:
@@ -30,14 +90,117 @@ class SubstackPost:
     description: str = ""
     content_html: str = ""
     embedded_videos: list[str] = field(default_factory=list)
+    guid: str = ""
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["published_at"] = self.published_at.isoformat() if self.published_at else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SubstackPost":
+        data = dict(data)
+        if data.get("published_at"):
+            data["published_at"] = datetime.fromisoformat(data["published_at"])
+        return cls(**data)
+
+
+class FeedCache:
+    """
+    Per-publication feed cache on disk.
+
+    Stores the validators from the last 200 response (ETag, Last-Modified),
+    the feed title, and the posts of that response keyed by guid with the
+    feed order. Only the current feed window is kept, so the cache stays
+    as small as the feed itself. Post bodies go to a separate file
+    ({publication}.bodies.json), read only when a 304 has to return them.
+    The main file holds parsed fields only, and so does load().
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir or Path(settings.cache_dir) / "substack" / "feeds")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, publication_name: str, suffix: str = ".json") -> Path:
+        safe = re.sub(r"[^a-zA-Z0-9_.-]", "_", publication_name)
+        return self.cache_dir / f"{safe}{suffix}"
+
+    def _read(self, path: Path, publication_name: str) -> dict:
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable feed cache for {publication_name}: {e}")
+            return {}
+
+    def load(self, publication_name: str) -> dict:
+        """Validators, title, order and posts (without bodies) of the cached feed."""
+        return self._read(self._path(publication_name), publication_name)
+
+    def load_bodies(self, publication_name: str) -> dict[str, str]:
+        """content_html of the cached posts, by guid."""
+        return self._read(self._path(publication_name, ".bodies.json"), publication_name)
+
+    def save(
+        self,
+        publication_name: str,
+        title: str,
+        posts: list[SubstackPost],
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        """Replace the cached feed with these posts (the whole feed, in order)."""
+        cached_posts = {}
+        bodies = {}
+        for post in posts:
+            data = post.to_dict()
+            if data.pop("content_html"):
+                bodies[post.guid] = post.content_html
+            cached_posts[post.guid] = data
+
+        self._path(publication_name, ".bodies.json").write_text(json.dumps(bodies), encoding="utf-8")
+        self._path(publication_name).write_text(json.dumps({
+            "title": title,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": datetime.utcnow().isoformat(),
+            "order": [p.guid for p in posts],
+            "posts": cached_posts,
+        }), encoding="utf-8")
+
+    @staticmethod
+    def cached_posts(entry: dict, bodies: Optional[dict[str, str]] = None) -> list[SubstackPost]:
+        """Posts from the last feed response, in feed order, with bodies if given."""
+        posts = entry.get("posts", {})
+        cached = [SubstackPost.from_dict(posts[g]) for g in entry.get("order", []) if g in posts]
+        for post in cached:
+            post.content_html = (bodies or {}).get(post.guid, post.content_html)
+        return cached
 
 
 class VideoEmbedParser(HTMLParser):
-    """Parse HTML content to extract video embed URLs."""
+    """Parse HTML content to extract video embed URLs and a short text summary."""
 
-    def __init__(self):
+    def __init__(self, summary_chars: int = 500):
         super().__init__()
         self.video_urls = []
+        self.summary_chars = summary_chars
+        self._text_parts: list[str] = []
+        self._text_len = 0
+
+    @property
+    def summary(self) -> str:
+        """First summary_chars characters of visible text."""
+        return " ".join(self._text_parts)[:self.summary_chars]
+
+    def handle_data(self, data):
+        if self._text_len >= self.summary_chars:
+            return
+        text = data.strip()
+        if text:
+            self._text_parts.append(text)
+            self._text_len += len(text) + 1
 
     def handle_starttag(self, tag, attrs):
         attrs_dict = dict(attrs)
@@ -83,10 +246,30 @@ class VideoEmbedParser(HTMLParser):
 
 
 class SubstackExtractor:
-    """Extract posts and videos from Substack publications via RSS."""
+    """Extract posts and videos from Substack publications via RSS or the archive API."""
 
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        feed_cache: Optional[FeedCache] = None,
+        use_cache: bool = True,
+        base_url: Optional[str] = None,
+        keep_content_html: bool = True,
+    ):
+        """
+        Args:
+            feed_cache: Feed cache to use (defaults to one under cache_dir)
+            use_cache: Set False to always fetch and parse full feeds
+            base_url: Publication URL template; {publication} is replaced by the
+                subdomain. Point it at a local fixture server for testing.
+            keep_content_html: Set False to drop post bodies once embeds and
+                summary text are extracted (bounded memory for large batches)
+        """
+        self.feed_cache = (feed_cache or FeedCache()) if use_cache else None
+        self.base_url = (base_url or settings.substack_base_url).rstrip("/")
+        self.keep_content_html = keep_content_html
+        self.feeds_not_modified = 0
+        self.posts_reused = 0
+        self.posts_parsed = 0
 
     async def extract_publication(
         self,
@@ -96,6 +279,10 @@ class SubstackExtractor:
         """
         Extract posts from a Substack publication.
 
+        Sends a conditional GET using the cached ETag/Last-Modified. A 304 returns
+        the cached posts without parsing; otherwise only items whose guid is not
+        cached are parsed for embeds.
+
         Args:
             publication_name: The subdomain of the publication (e.g., "engdata" for engdata.substack.com)
             count: Maximum number of posts to retrieve
@@ -103,95 +290,60 @@ class SubstackExtractor:
         Returns:
             Tuple of (list of SubstackPost objects, ExtractionResult with video embeds)
         """
-        rss_url = f"https://{publication_name}.substack.com/feed"
+        rss_url = f"{self._publication_url(publication_name)}/feed"
+        cached = self.feed_cache.load(publication_name) if self.feed_cache else {}
+
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
 
+        proxy_lease = get_proxy_pool().lease()
         try:
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(rss_url)
+            client = get_http_client(proxy_lease.url)
+            async with client.stream("GET", rss_url, headers=headers) as response:
+                proxy_lease.first_byte()
+                if response.status_code == 304 and cached:
+                    self.feeds_not_modified += 1
+                    logger.debug(f"Feed not modified: {publication_name}")
+                    bodies = self.feed_cache.load_bodies(publication_name) if self.keep_content_html else None
+                    posts = [self._trim(p) for p in FeedCache.cached_posts(cached, bodies)[:count]]
+                    return posts, self._build_result(posts, count)
+
                 response.raise_for_status()
 
-                # Parse RSS XML
-                root = ElementTree.fromstring(response.content)
-                channel = root.find("channel")
-
-                if channel is None:
-                    return [], ExtractionResult(
-                        success=False,
-                        error="Invalid RSS feed structure",
-                        videos_requested=count,
-                    )
-
-                pub_title = channel.findtext("title", publication_name)
-                posts = []
-                all_videos = []
-
-                for item in channel.findall("item")[:count]:
-                    title = item.findtext("title", "")
-                    link = item.findtext("link", "")
-                    description = item.findtext("description", "")
-
-                    # Get full content if available (content:encoded)
-                    content_html = ""
-                    for elem in item:
-                        if elem.tag.endswith("encoded"):
-                            content_html = elem.text or ""
-                            break
-
-                    # Parse publish date
-                    pub_date_str = item.findtext("pubDate", "")
-                    published_at = None
-                    if pub_date_str:
-                        try:
-                            from email.utils import parsedate_to_datetime
-                            published_at = parsedate_to_datetime(pub_date_str)
-                        except Exception:
-                            pass
-
-                    # Extract embedded videos
-                    parser = VideoEmbedParser()
-                    parser.feed(content_html or description)
-                    embedded_videos = list(set(parser.video_urls))
-
-                    # Get author from dc:creator if available
-                    author = publication_name
-                    for elem in item:
-                        if elem.tag.endswith("creator"):
-                            author = elem.text or publication_name
-                            break
-
-                    post = SubstackPost(
-                        title=title,
-                        url=link,
-                        author=author,
-                        publication=pub_title,
-                        published_at=published_at,
-                        description=description[:500] if description else "",
-                        content_html=content_html,
-                        embedded_videos=embedded_videos,
-                    )
-                    posts.append(post)
-
-                    # Convert embedded videos to VideoInfo
-                    for video_url in embedded_videos:
-                        video_id = self._generate_video_id(video_url)
-                        video_info = VideoInfo(
-                            platform=Platform.SUBSTACK,
-                            video_url=video_url,
-                            video_id=video_id,
-                            author_username=author,
-                            caption=f"{title} (from {pub_title})",
-                            extracted_at=datetime.utcnow(),
-                        )
-                        all_videos.append(video_info)
-
-                return posts, ExtractionResult(
-                    success=True,
-                    videos=all_videos,
+                channel_seen, pub_title, posts = await self._stream_items(
+                    response,
+                    publication_name,
+                    known=cached.get("posts", {}),
+                )
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+
+            if not channel_seen:
+                return [], ExtractionResult(
+                    success=False,
+                    error="Invalid RSS feed structure",
                     videos_requested=count,
-                    videos_found=len(all_videos),
                 )
 
+            if self.feed_cache:
+                # The whole feed was read, so a 304 later can serve any count
+                self.feed_cache.save(
+                    publication_name,
+                    title=pub_title,
+                    posts=posts,
+                    etag=etag,
+                    last_modified=last_modified,
+                )
+
+            posts = [self._trim(p) for p in posts[:count]]
+            return posts, self._build_result(posts, count)
+
         except httpx.HTTPStatusError as e:
+            if e.response.status_code in PROXY_BLOCK_STATUSES:
+                proxy_lease.fail()
             logger.error(f"Substack RSS error: {e.response.status_code}")
             return [], ExtractionResult(
                 success=False,
@@ -199,12 +351,340 @@ class SubstackExtractor:
                 videos_requested=count,
             )
         except Exception as e:
+            if isinstance(e, httpx.TransportError):
+                proxy_lease.fail()
             logger.error(f"Substack extraction failed: {e}")
             return [], ExtractionResult(
                 success=False,
                 error=str(e),
                 videos_requested=count,
             )
+        finally:
+            proxy_lease.release()
+
+    async def _stream_items(
+        self,
+        response: httpx.Response,
+        publication_name: str,
+        known: dict,
+    ) -> tuple[bool, str, list[SubstackPost]]:
+        """
+        Parse an RSS response incrementally as it downloads.
+
+        Each <item> is handled once when its end tag arrives and then removed
+        from the tree, so the XML tree never holds more than one item. The
+        whole feed is read (a feed window is ~20 items, mostly reused from the
+        cache) so the saved validators describe every post a 304 may serve.
+
+        Returns:
+            Tuple of (channel found, publication title, untrimmed posts in feed order)
+        """
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        path: list[str] = []
+        channel: Optional[ElementTree.Element] = None
+        pub_title = publication_name
+        posts: list[SubstackPost] = []
+
+        async for chunk in response.aiter_bytes():
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    path.append(elem.tag)
+                    if elem.tag == "channel" and channel is None:
+                        channel = elem
+                    continue
+
+                path.pop()
+                if elem.tag == "title" and path and path[-1] == "channel":
+                    pub_title = elem.text or publication_name
+                elif elem.tag == "item" and channel is not None:
+                    posts.append(self._item_to_post(elem, publication_name, pub_title, known))
+                    elem.clear()
+                    channel.remove(elem)
+
+        parser.close()
+        return channel is not None, pub_title, posts
+
+    def _item_to_post(
+        self,
+        item: ElementTree.Element,
+        publication_name: str,
+        pub_title: str,
+        known: dict,
+    ) -> SubstackPost:
+        """
+        Read an <item>'s fields in one pass; reuse the cached post if its guid is known.
+
+        The post is returned untrimmed, with the item's body; callers trim on output.
+        """
+        fields = {}
+        content_html = ""
+        author = None
+        for child in item:
+            tag = child.tag
+            if "}" in tag:
+                # Namespaced: content:encoded, dc:creator
+                local = tag.rsplit("}", 1)[1]
+                if local == "encoded" and not content_html:
+                    content_html = child.text or ""
+                elif local == "creator" and author is None:
+                    author = child.text
+            elif tag in ("title", "link", "description", "pubDate", "guid"):
+                fields.setdefault(tag, child.text or "")
+
+        link = fields.get("link", "")
+        guid = fields.get("guid") or link
+
+        if guid in known:
+            # The cache keeps parsed fields only; the body is the item's own
+            self.posts_reused += 1
+            post = SubstackPost.from_dict(known[guid])
+            post.content_html = content_html
+            return post
+
+        self.posts_parsed += 1
+
+        # Parse publish date
+        published_at = None
+        if fields.get("pubDate"):
+            try:
+                published_at = parsedate_to_datetime(fields["pubDate"])
+            except Exception:
+                pass
+
+        description = fields.get("description", "")
+
+        # Extract embedded videos and summary text in one HTML pass
+        parser = VideoEmbedParser()
+        parser.feed(content_html or description)
+        if not description:
+            description = parser.summary
+
+        return SubstackPost(
+            title=fields.get("title", ""),
+            url=link,
+            author=author or publication_name,
+            publication=pub_title,
+            published_at=published_at,
+            description=description[:500] if description else "",
+            content_html=content_html,
+            embedded_videos=list(set(parser.video_urls)),
+            guid=guid,
+        )
+
+    def _trim(self, post: SubstackPost) -> SubstackPost:
+        """Drop content_html unless the extractor is keeping full post bodies."""
+        if not self.keep_content_html:
+            post.content_html = ""
+        return post
+
+    def _publication_url(self, publication_name: str) -> str:
+        return self.base_url.format(publication=publication_name)
+
+    async def iter_archive(
+        self,
+        publication_name: str,
+        since: Optional[datetime] = None,
+        max_posts: Optional[int] = None,
+        page_size: int = 20,
+        pages_in_flight: int = 3,
+        body_concurrency: int = 5,
+    ) -> AsyncIterator[SubstackPost]:
+        """
+        Stream posts from a publication's archive, newest first.
+
+        Pages /api/v1/archive a few offsets at a time (the next window is fetched
+        while post bodies of the current one are loaded), then fetches
+        /api/v1/posts/{slug} in bounded parallel batches and yields each post
+        once its embeds are parsed.
+
+        Args:
+            publication_name: The subdomain of the publication
+            since: Stop at the first post published at or before this time
+            max_posts: Stop after this many posts
+            page_size: Archive entries per page request
+            pages_in_flight: Archive pages fetched concurrently
+            body_concurrency: Post bodies fetched concurrently
+
+        Yields:
+            SubstackPost objects
+        """
+        base = self._publication_url(publication_name)
+        proxy_lease = get_proxy_pool().lease()
+        client = get_http_client(proxy_lease.url)
+        if since and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        async def fetch_page(offset: int) -> list[dict]:
+            response = await client.get(
+                f"{base}/api/v1/archive",
+                params={"sort": "new", "offset": offset, "limit": page_size},
+            )
+            proxy_lease.first_byte()
+            response.raise_for_status()
+            return response.json() or []
+
+        async def fetch_window(offset: int) -> list[list[dict]]:
+            return await asyncio.gather(*[
+                fetch_page(offset + i * page_size) for i in range(pages_in_flight)
+            ])
+
+        body_semaphore = asyncio.Semaphore(body_concurrency)
+
+        async def fetch_post(meta: dict) -> Optional[SubstackPost]:
+            async with body_semaphore:
+                try:
+                    response = await client.get(f"{base}/api/v1/posts/{meta['slug']}")
+                    if response.status_code in PROXY_BLOCK_STATUSES:
+                        proxy_lease.fail()
+                    response.raise_for_status()
+                    return self._parse_archive_post({**meta, **response.json()}, publication_name)
+                except Exception as e:
+                    if isinstance(e, httpx.TransportError):
+                        proxy_lease.fail()
+                    logger.warning(f"Skipping archive post {meta.get('slug')}: {e}")
+                    return None
+
+        offset = 0
+        yielded = 0
+        window_size = page_size * pages_in_flight
+        next_window: Optional[asyncio.Task] = asyncio.create_task(fetch_window(offset))
+
+        try:
+            while next_window is not None:
+                pages = await next_window
+                offset += window_size
+                exhausted = any(len(page) < page_size for page in pages)
+                next_window = None if exhausted else asyncio.create_task(fetch_window(offset))
+
+                metas = []
+                stop = exhausted
+                for entry in (e for page in pages for e in page):
+                    if entry.get("type") not in (None, "newsletter", "podcast", "video"):
+                        continue
+                    published = self._parse_iso(entry.get("post_date"))
+                    if since and published and published <= since:
+                        stop = True
+                        break
+                    metas.append(entry)
+                    if max_posts is not None and yielded + len(metas) >= max_posts:
+                        stop = True
+                        break
+
+                for i in range(0, len(metas), body_concurrency):
+                    batch = metas[i:i + body_concurrency]
+                    for post in await asyncio.gather(*[fetch_post(m) for m in batch]):
+                        if post:
+                            yielded += 1
+                            yield post
+
+                if stop:
+                    break
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in PROXY_BLOCK_STATUSES:
+                proxy_lease.fail()
+            raise
+        except httpx.TransportError:
+            proxy_lease.fail()
+            raise
+        finally:
+            if next_window is not None and not next_window.done():
+                next_window.cancel()
+            proxy_lease.release()
+
+        logger.info(f"Archive {publication_name}: {yielded} posts")
+
+    def _parse_archive_post(self, data: dict, publication_name: str) -> SubstackPost:
+        """Build a SubstackPost from an archive entry merged with its post body."""
+        bylines = data.get("publishedBylines") or []
+        author = bylines[0].get("name") if bylines else None
+        url = data.get("canonical_url") or f"{self._publication_url(publication_name)}/p/{data.get('slug', '')}"
+        description = data.get("subtitle") or data.get("description") or ""
+        content_html = data.get("body_html") or ""
+
+        parser = VideoEmbedParser()
+        parser.feed(content_html or description)
+        if not description:
+            description = parser.summary
+
+        return self._trim(SubstackPost(
+            title=data.get("title", ""),
+            url=url,
+            author=author or publication_name,
+            publication=publication_name,
+            published_at=self._parse_iso(data.get("post_date")),
+            description=description[:500],
+            content_html=content_html,
+            embedded_videos=list(set(parser.video_urls)),
+            guid=url,
+        ))
+
+    @staticmethod
+    def _parse_iso(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+    def _build_result(self, posts: list[SubstackPost], count: int) -> ExtractionResult:
+        """Convert the embedded videos of posts into an ExtractionResult (one per canonical video)."""
+        all_videos = []
+        seen = set()
+        for post in posts:
+            for video_url in post.embedded_videos:
+                canonical = canonical_id(video_url)
+                if canonical.key in seen:
+                    continue
+                seen.add(canonical.key)
+                all_videos.append(VideoInfo(
+                    platform=canonical.platform,
+                    video_url=video_url,
+                    video_id=canonical.native_id,
+                    author_username=post.author,
+                    caption=f"{post.title} (from {post.publication})",
+                    extracted_at=datetime.utcnow(),
+                ))
+
+        return ExtractionResult(
+            success=True,
+            videos=all_videos,
+            videos_requested=count,
+            videos_found=len(all_videos),
+        )
+
+    async def extract_publications(
+        self,
+        publication_names: list[str],
+        count_per_publication: int = 10,
+        max_concurrent: Optional[int] = None,
+    ) -> dict[str, tuple[list[SubstackPost], ExtractionResult]]:
+        """
+        Fetch several publications concurrently.
+
+        Args:
+            publication_names: List of publication subdomains
+            count_per_publication: Posts per publication
+            max_concurrent: Max feeds in flight (defaults to settings)
+
+        Returns:
+            Dict of publication name to (posts, ExtractionResult)
+        """
+        publication_names = list(dict.fromkeys(publication_names))
+        semaphore = asyncio.Semaphore(max_concurrent or settings.substack_max_concurrent)
+
+        async def fetch(pub_name: str) -> tuple[list[SubstackPost], ExtractionResult]:
+            async with semaphore:
+                return await self.extract_publication(pub_name, count_per_publication)
+
+        results = await asyncio.gather(*[fetch(p) for p in publication_names])
+        logger.info(
+            f"Fetched {len(publication_names)} Substack feeds "
+            f"({self.feeds_not_modified} not modified, {self.posts_reused} posts reused, "
+            f"{self.posts_parsed} parsed)"
+        )
+        return dict(zip(publication_names, results))
 
     async def extract_multiple_publications(
         self,
@@ -224,8 +704,8 @@ class SubstackExtractor:
         all_videos = []
         errors = []
 
-        for pub_name in publication_names:
-            posts, result = await self.extract_publication(pub_name, count_per_publication)
+        results = await self.extract_publications(publication_names, count_per_publication)
+        for pub_name, (posts, result) in results.items():
             if result.success:
                 all_videos.extend(result.videos)
             else:
@@ -240,6 +720,5 @@ class SubstackExtractor:
         )
 
     def _generate_video_id(self, url: str) -> str:
-        """Generate a unique ID for a video URL."""
-        import hashlib
-        return hashlib.md5(url.encode()).hexdigest()[:16]
+        """Canonical native ID for a video URL (same video, same ID across URL shapes)."""
+        return canonical_id(url).native_id
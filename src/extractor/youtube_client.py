@@ -0,0 +1,406 @@
+"""
+Shared YouTube Data API v3 client.
+
+Wraps one httpx.AsyncClient for all YouTube extraction and adds:
+- A daily quota tracker (units per endpoint, persisted to disk, reset at
+  midnight Pacific like the API itself) that refuses work near the cap
+- A local JSON response cache with a TTL, revalidated with ETag
+  conditional requests once it goes stale
+- Per-video statistics caching, with videos.list lookups merged into
+  50-id batches
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
+
+# Quota units charged per request (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    "search": 100,
+    "videos": 1,
+    "channels": 1,
+    "playlistItems": 1,
+}
+
+# videos.list accepts at most 50 ids per request
+VIDEOS_BATCH_SIZE = 50
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:  # tzdata missing (e.g. Windows without the tzdata package)
+    _QUOTA_TZ = timezone(timedelta(hours=-8))
+
+
+class QuotaExceeded(RuntimeError):
+    """Raised when a request would push daily usage past the configured cap."""
+
+    def __init__(self, message: str, resets_at: datetime):
+        super().__init__(message)
+        self.resets_at = resets_at
+
+
+def parse_iso_duration(duration: str) -> int:
+    """Parse an ISO 8601 duration (PT1M30S) to seconds."""
+    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration or "")
+    if not match:
+        return 0
+    hours = int(match.group(1) or 0)
+    minutes = int(match.group(2) or 0)
+    seconds = int(match.group(3) or 0)
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_video_item(item: dict) -> dict:
+    """Flatten a videos.list item into the stats dict used by the extractor."""
+    statistics = item.get("statistics", {})
+    content_details = item.get("contentDetails", {})
+    snippet = item.get("snippet", {})
+    return {
+        "views": int(statistics.get("viewCount", 0)),
+        "likes": int(statistics.get("likeCount", 0)),
+        "comments": int(statistics.get("commentCount", 0)),
+        "duration_seconds": parse_iso_duration(content_details.get("duration", "PT0S")),
+        "published_at": snippet.get("publishedAt"),
+    }
+
+
+class QuotaTracker:
+    """Track YouTube quota units spent today and refuse requests near the cap."""
+
+    def __init__(self, daily_limit: int, reserve: int, state_path: Path):
+        """
+        Args:
+            daily_limit: Units available per day for this API key
+            reserve: Units held back from automated work (for manual/API use)
+            state_path: JSON file the running total is persisted to
+        """
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        self.state_path = state_path
+        self._day = ""
+        self._used = 0
+        self._by_endpoint: dict[str, int] = {}
+        self._load()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(_QUOTA_TZ).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def resets_at() -> datetime:
+        """Next quota reset (midnight Pacific) as an aware datetime."""
+        now = datetime.now(_QUOTA_TZ)
+        return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _load(self) -> None:
+        if self.state_path.exists():
+            try:
+                state = json.loads(self.state_path.read_text())
+                self._day = state.get("day", "")
+                self._used = state.get("used", 0)
+                self._by_endpoint = state.get("by_endpoint", {})
+            except Exception as e:
+                logger.warning(f"Could not read YouTube quota state: {e}")
+        self._roll_day()
+
+    def _save(self) -> None:
+        self.state_path.write_text(json.dumps({
+            "day": self._day,
+            "used": self._used,
+            "by_endpoint": self._by_endpoint,
+        }))
+
+    def _roll_day(self) -> None:
+        today = self._today()
+        if self._day != today:
+            self._day = today
+            self._used = 0
+            self._by_endpoint = {}
+
+    @property
+    def used(self) -> int:
+        self._roll_day()
+        return self._used
+
+    @property
+    def remaining(self) -> int:
+        """Units still available to automated work today."""
+        return max(0, self.daily_limit - self.reserve - self.used)
+
+    def can_afford(self, units: int) -> bool:
+        return units <= self.remaining
+
+    def charge(self, endpoint: str, units: Optional[int] = None) -> None:
+        """
+        Record units for a request about to be sent.
+
+        Raises:
+            QuotaExceeded: If the request would go past daily_limit - reserve
+        """
+        units = QUOTA_COSTS.get(endpoint, 1) if units is None else units
+        if not self.can_afford(units):
+            raise QuotaExceeded(
+                f"YouTube quota exhausted ({self._used}/{self.daily_limit} used, "
+                f"{self.reserve} reserved); {endpoint} needs {units}",
+                resets_at=self.resets_at(),
+            )
+        self._used += units
+        self._by_endpoint[endpoint] = self._by_endpoint.get(endpoint, 0) + units
+        self._save()
+
+    def to_dict(self) -> dict:
+        return {
+            "day": self._day,
+            "daily_limit": self.daily_limit,
+            "reserve": self.reserve,
+            "used": self.used,
+            "remaining": self.remaining,
+            "by_endpoint": dict(self._by_endpoint),
+            "resets_at": self.resets_at().isoformat(),
+        }
+
+
+class YouTubeDataClient:
+    """Quota-aware, caching YouTube Data API client shared across extractors."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        daily_quota: Optional[int] = None,
+        quota_reserve: Optional[int] = None,
+        cache_dir: Optional[Path] = None,
+        max_concurrent: Optional[int] = None,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            api_key: YouTube Data API key (defaults to settings)
+            daily_quota: Units per day for this key
+            quota_reserve: Units held back from automated work
+            cache_dir: Directory for cached responses and quota state
+            max_concurrent: Max in-flight API requests
+        """
+        self.api_key = api_key or settings.youtube_api_key
+        if not self.api_key:
+            raise ValueError("YouTube API key is required. Set YOUTUBE_API_KEY in .env")
+
+        self.cache_dir = Path(cache_dir or Path(settings.cache_dir) / "youtube")
+        (self.cache_dir / "responses").mkdir(parents=True, exist_ok=True)
+
+        self.quota = QuotaTracker(
+            daily_limit=daily_quota or settings.youtube_daily_quota,
+            reserve=settings.youtube_quota_reserve if quota_reserve is None else quota_reserve,
+            state_path=self.cache_dir / "quota.json",
+        )
+        self.max_concurrent = max_concurrent or settings.youtube_max_concurrent
+
+        self._stats_path = self.cache_dir / "video_stats.json"
+        self._stats_cache: Optional[dict[str, dict]] = None
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.cache_hits = 0
+        self.cache_revalidated = 0
+        self.cache_misses = 0
+
+    def _ensure_http(self) -> httpx.AsyncClient:
+        """Return the shared httpx client, recreating it if the event loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(timeout=30.0)
+            self._http_loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # ==================== Response cache ====================
+
+    def _cache_path(self, endpoint: str, params: dict) -> Path:
+        key = json.dumps([endpoint, sorted(params.items())], default=str)
+        return self.cache_dir / "responses" / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[dict]:
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except Exception:
+            return None
+
+    async def request(
+        self,
+        endpoint: str,
+        params: dict,
+        ttl: int = 0,
+    ) -> dict:
+        """
+        GET an API endpoint, serving from cache while fresh.
+
+        Stale cache entries with an ETag are revalidated with If-None-Match;
+        a 304 reuses the cached body. Quota is charged for every request sent.
+
+        Args:
+            endpoint: Resource name ("search", "videos", "playlistItems", ...)
+            params: Query parameters (without the API key)
+            ttl: Seconds a cached response stays fresh (0 disables caching)
+
+        Returns:
+            Parsed JSON response body
+
+        Raises:
+            QuotaExceeded: If the daily cap would be exceeded
+            httpx.HTTPStatusError: On API errors
+        """
+        path = self._cache_path(endpoint, params) if ttl else None
+        cached = self._read_json(path) if path else None
+
+        if cached and time.time() - cached.get("fetched_at", 0) < ttl:
+            self.cache_hits += 1
+            return cached["body"]
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        self.quota.charge(endpoint)
+        client = self._ensure_http()
+        async with self._semaphore:
+            response = await client.get(
+                f"{YOUTUBE_API_BASE}/{endpoint}",
+                params={**params, "key": self.api_key},
+                headers=headers,
+            )
+
+        if response.status_code == 304 and cached:
+            self.cache_revalidated += 1
+            cached["fetched_at"] = time.time()
+            path.write_text(json.dumps(cached))
+            return cached["body"]
+
+        response.raise_for_status()
+        body = response.json()
+        self.cache_misses += 1
+
+        if path:
+            path.write_text(json.dumps({
+                "etag": response.headers.get("ETag") or body.get("etag"),
+                "fetched_at": time.time(),
+                "body": body,
+            }))
+        return body
+
+    # ==================== Video stats ====================
+
+    def _load_stats_cache(self) -> dict[str, dict]:
+        if self._stats_cache is None:
+            self._stats_cache = self._read_json(self._stats_path) or {}
+        return self._stats_cache
+
+    def _save_stats_cache(self) -> None:
+        self._stats_path.write_text(json.dumps(self._stats_cache or {}))
+
+    async def get_video_stats(
+        self,
+        video_ids: list[str],
+        ttl: Optional[int] = None,
+    ) -> dict[str, dict]:
+        """
+        Get statistics and duration for videos, in 50-id videos.list batches.
+
+        Cached stats younger than ttl are reused; only the rest are fetched.
+
+        Args:
+            video_ids: YouTube video IDs (duplicates are merged)
+            ttl: Seconds cached stats stay fresh (defaults to settings)
+
+        Returns:
+            Dict of video_id to stats (views, likes, comments, duration_seconds, published_at)
+        """
+        ttl = settings.youtube_stats_cache_ttl if ttl is None else ttl
+        cache = self._load_stats_cache()
+        now = time.time()
+
+        stats: dict[str, dict] = {}
+        missing: list[str] = []
+        for video_id in dict.fromkeys(video_ids):
+            entry = cache.get(video_id)
+            if entry and now - entry.get("fetched_at", 0) < ttl:
+                stats[video_id] = entry["stats"]
+            else:
+                missing.append(video_id)
+
+        self.cache_hits += len(stats)
+
+        async def fetch_batch(batch: list[str]) -> None:
+            try:
+                data = await self.request("videos", {
+                    "part": "snippet,statistics,contentDetails",
+                    "id": ",".join(batch),
+                    "maxResults": VIDEOS_BATCH_SIZE,
+                })
+            except QuotaExceeded:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to get video stats: {e}")
+                return
+            for item in data.get("items", []):
+                parsed = parse_video_item(item)
+                stats[item["id"]] = parsed
+                cache[item["id"]] = {"fetched_at": time.time(), "stats": parsed}
+
+        batches = [
+            missing[i:i + VIDEOS_BATCH_SIZE]
+            for i in range(0, len(missing), VIDEOS_BATCH_SIZE)
+        ]
+        if batches:
+            try:
+                await asyncio.gather(*[fetch_batch(b) for b in batches])
+            finally:
+                self._save_stats_cache()
+
+        return stats
+
+    def get_status(self) -> dict:
+        """Quota usage and cache counters."""
+        return {
+            "quota": self.quota.to_dict(),
+            "cache": {
+                "hits": self.cache_hits,
+                "revalidated": self.cache_revalidated,
+                "misses": self.cache_misses,
+            },
+        }
+
+
+_shared_client: Optional[YouTubeDataClient] = None
+
+
+def get_youtube_client(api_key: Optional[str] = None) -> YouTubeDataClient:
+    """Get the process-wide YouTube client (created on first use)."""
+    global _shared_client
+    if _shared_client is None or (api_key and api_key != _shared_client.api_key):
+        _shared_client = YouTubeDataClient(api_key=api_key)
+    return _shared_client
@@ -1,34 +1,45 @@
 """
 YouTube Shorts extractor using YouTube Data API v3.
 
-Extracts Shorts videos from search results or channel listings.
+Extracts Shorts videos from search results or channel uploads playlists. All API
+traffic goes through the shared YouTubeDataClient, which tracks daily quota,
+caches responses and batches videos.list lookups.
 """
 
 import asyncio
+import json
 import logging
-from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
+from pathlib import Path
 from typing import Optional
+
 import httpx
 
 from config.settings import settings
 from src.extractor.hashtag import Platform, VideoInfo, ExtractionResult
+from src.extractor.youtube_client import (
+    QuotaExceeded,
+    YouTubeDataClient,
+    get_youtube_client,
+)
 
 logger = logging.getLogger(__name__)
 
-# YouTube Data API v3 endpoints
-YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
-YOUTUBE_VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
-YOUTUBE_CHANNELS_URL = "https://www.googleapis.com/youtube/v3/channels"
+# Shorts are at most 60 seconds
+MAX_SHORT_SECONDS = 60
+
+# A channel's uploads playlist ID never changes; cache the lookup for a week
+UPLOADS_PLAYLIST_TTL = 7 * 24 * 3600
 
 
 class YouTubeShortsExtractor:
     """Extract YouTube Shorts using the Data API v3."""
 
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, client: Optional[YouTubeDataClient] = None):
         self.api_key = api_key or settings.youtube_api_key
         if not self.api_key:
             raise ValueError("YouTube API key is required. Set YOUTUBE_API_KEY in .env")
+        self.client = client or get_youtube_client(self.api_key)
 
     async def search_shorts(
         self,
@@ -47,158 +58,273 @@ class YouTubeShortsExtractor:
         Returns:
             ExtractionResult with list of VideoInfo objects
         """
+        results = await self.search_shorts_many([query], count_per_query=count, order=order)
+        return results[query]
+
+    async def search_shorts_many(
+        self,
+        queries: list[str],
+        count_per_query: int = 30,
+        order: str = "relevance",
+    ) -> dict[str, ExtractionResult]:
+        """
+        Search several queries concurrently and share one round of stats lookups.
+
+        Search pages are served from cache while fresh. Video IDs from every
+        query are merged and deduplicated before videos.list, so overlapping
+        queries cost one stats lookup per 50 unique videos. Queries that would
+        exceed the daily quota are deferred (returned with success=False).
+
+        Args:
+            queries: Search queries
+            count_per_query: Maximum results per query
+            order: Sort order - "relevance", "date", "viewCount", "rating"
+
+        Returns:
+            Dict of query to ExtractionResult
+        """
+        queries = list(dict.fromkeys(queries))
+        search_items: dict[str, list[dict]] = {}
+        results: dict[str, ExtractionResult] = {}
+
+        async def run_search(query: str) -> None:
+            try:
+                search_items[query] = await self._search_items(query, count_per_query, order)
+            except QuotaExceeded as e:
+                logger.warning(f"Deferring YouTube search '{query}': {e}")
+                results[query] = ExtractionResult(
+                    success=False,
+                    error=f"Quota exhausted, deferred until {e.resets_at.isoformat()}",
+                    videos_requested=count_per_query,
+                )
+            except httpx.HTTPStatusError as e:
+                logger.error(f"YouTube API error: {e.response.status_code} - {e.response.text}")
+                results[query] = ExtractionResult(
+                    success=False,
+                    error=f"YouTube API error: {e.response.status_code}",
+                    videos_requested=count_per_query,
+                )
+            except Exception as e:
+                logger.error(f"YouTube extraction failed: {e}")
+                results[query] = ExtractionResult(
+                    success=False,
+                    error=str(e),
+                    videos_requested=count_per_query,
+                )
+
+        await asyncio.gather(*[run_search(q) for q in queries])
+
+        all_ids = [
+            item["id"]["videoId"]
+            for items in search_items.values()
+            for item in items
+        ]
         try:
+            stats = await self.client.get_video_stats(all_ids)
+        except QuotaExceeded as e:
+            # Without stats there are no durations or counts; defer rather than
+            # return every video as a zero-view Short. Search pages stay cached.
+            logger.warning(f"Video stats lookup deferred: {e}")
+            for query in search_items:
+                results[query] = ExtractionResult(
+                    success=False,
+                    error=f"Quota exhausted, deferred until {e.resets_at.isoformat()}",
+                    videos_requested=count_per_query,
+                )
+            return {q: results[q] for q in queries}
+
+        for query, items in search_items.items():
             videos = []
-            next_page_token = None
-            remaining = min(count, 50)  # API max per request
-
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                while remaining > 0:
-                    params = {
-                        "part": "snippet",
-                        "q": query,
-                        "type": "video",
-                        "videoDuration": "short",  # Under 4 minutes (Shorts are under 60s)
-                        "maxResults": min(remaining, 50),
-                        "order": order,
-                        "key": self.api_key,
-                    }
-                    if next_page_token:
-                        params["pageToken"] = next_page_token
-
-                    response = await client.get(YOUTUBE_SEARCH_URL, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    # Extract video IDs for detailed stats
-                    video_ids = [item["id"]["videoId"] for item in data.get("items", [])]
-
-                    if video_ids:
-                        # Get detailed video statistics
-                        stats = await self._get_video_stats(client, video_ids)
-
-                        for item in data.get("items", []):
-                            video_id = item["id"]["videoId"]
-                            snippet = item["snippet"]
-                            video_stats = stats.get(video_id, {})
-
-                            # Filter for actual Shorts (under 60 seconds)
-                            duration = video_stats.get("duration_seconds", 0)
-                            if duration > 60:
-                                continue
-
-                            video_info = VideoInfo(
-                                platform=Platform.YOUTUBE_SHORTS,
-                                video_url=f"https://www.youtube.com/shorts/{video_id}",
-                                video_id=video_id,
-                                author_username=snippet.get("channelTitle", ""),
-                                thumbnail_url=snippet.get("thumbnails", {}).get("high", {}).get("url"),
-                                likes=video_stats.get("likes", 0),
-                                comments=video_stats.get("comments", 0),
-                                views=video_stats.get("views", 0),
-                                caption=snippet.get("title", ""),
-                                hashtags=self._extract_hashtags(snippet.get("description", "")),
-                                extracted_at=datetime.utcnow(),
-                            )
-                            videos.append(video_info)
-
-                    next_page_token = data.get("nextPageToken")
-                    if not next_page_token:
-                        break
-                    remaining -= len(data.get("items", []))
+            for item in items:
+                video_id = item["id"]["videoId"]
+                video_info = self._to_video_info(video_id, item["snippet"], stats.get(video_id, {}))
+                if video_info:
+                    videos.append(video_info)
 
-            return ExtractionResult(
+            results[query] = ExtractionResult(
                 success=True,
                 videos=videos,
-                videos_requested=count,
+                videos_requested=count_per_query,
                 videos_found=len(videos),
             )
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"YouTube API error: {e.response.status_code} - {e.response.text}")
-            return ExtractionResult(
-                success=False,
-                error=f"YouTube API error: {e.response.status_code}",
-                videos_requested=count,
-            )
-        except Exception as e:
-            logger.error(f"YouTube extraction failed: {e}")
-            return ExtractionResult(
-                success=False,
-                error=str(e),
-                videos_requested=count,
+        return {q: results[q] for q in queries}
+
+    async def _search_items(self, query: str, count: int, order: str) -> list[dict]:
+        """Page through search results (100 quota units per page) until count items."""
+        items: list[dict] = []
+        next_page_token = None
+
+        while len(items) < count:
+            params = {
+                "part": "snippet",
+                "q": query,
+                "type": "video",
+                "videoDuration": "short",  # Under 4 minutes (Shorts are under 60s)
+                "maxResults": min(count - len(items), 50),
+                "order": order,
+            }
+            if next_page_token:
+                params["pageToken"] = next_page_token
+
+            data = await self.client.request(
+                "search", params, ttl=settings.youtube_search_cache_ttl
             )
+            page = data.get("items", [])
+            items.extend(page)
+
+            next_page_token = data.get("nextPageToken")
+            if not next_page_token or not page:
+                break
+
+        return items[:count]
+
+    def _to_video_info(self, video_id: str, snippet: dict, video_stats: dict) -> Optional[VideoInfo]:
+        """Build a VideoInfo, or None if the video is longer than a Short or has no stats."""
+        if "duration_seconds" not in video_stats:
+            # Not returned by videos.list (private or deleted since the search)
+            logger.debug(f"No stats for video {video_id}; skipping")
+            return None
+        # Filter for actual Shorts (under 60 seconds)
+        if video_stats["duration_seconds"] > MAX_SHORT_SECONDS:
+            return None
+
+        return VideoInfo(
+            platform=Platform.YOUTUBE_SHORTS,
+            video_url=f"https://www.youtube.com/shorts/{video_id}",
+            video_id=video_id,
+            author_username=snippet.get("channelTitle", ""),
+            thumbnail_url=snippet.get("thumbnails", {}).get("high", {}).get("url"),
+            likes=video_stats.get("likes", 0),
+            comments=video_stats.get("comments", 0),
+            views=video_stats.get("views", 0),
+            caption=snippet.get("title", ""),
+            hashtags=self._extract_hashtags(snippet.get("description", "")),
+            extracted_at=datetime.utcnow(),
+        )
 
     async def get_channel_shorts(
         self,
         channel_id: str,
-        count: int = 30
+        count: int = 30,
+        since: Optional[datetime] = None,
+        incremental: bool = False,
+        max_pages: int = 10,
     ) -> ExtractionResult:
         """
-        Get Shorts from a specific YouTube channel.
+        Get Shorts from a specific YouTube channel via its uploads playlist.
+
+        Uses channels.list (cached) to find the uploads playlist, then pages
+        playlistItems.list newest-first with one batched videos.list per page.
+        Each page costs 2 quota units instead of 100 for a search page.
+
+        In incremental mode the first run returns the newest `count` Shorts and
+        stores the newest publish time as the channel's watermark. Later runs
+        page back to the watermark and return the oldest `count` Shorts newer
+        than it, advancing the watermark to the newest one returned, so a
+        backlog larger than `count` is worked off over successive runs.
 
         Args:
             channel_id: YouTube channel ID (starts with UC...)
             count: Maximum number of results
+            since: Only return videos published after this time
+            incremental: Use and advance the channel's stored last-seen watermark
+            max_pages: Stop after this many playlist pages (uploads include long videos)
 
         Returns:
             ExtractionResult with list of VideoInfo objects
         """
         try:
-            # Search within the channel for short videos
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            watermark = self._parse_timestamp(since)
+            if incremental and watermark is None:
+                watermark = self._get_watermark(channel_id)
+            # Catching up to a watermark needs every newer upload before count applies
+            catch_up = incremental and watermark is not None
+
+            uploads_playlist = await self._get_uploads_playlist(channel_id)
+            if not uploads_playlist:
+                return ExtractionResult(
+                    success=False,
+                    error=f"Channel not found: {channel_id}",
+                    videos_requested=count,
+                )
+
+            found: list[tuple[Optional[datetime], VideoInfo]] = []  # newest first
+            newest_seen: Optional[datetime] = None
+            next_page_token = None
+            reached_watermark = False
+
+            for _ in range(max_pages):
                 params = {
-                    "part": "snippet",
-                    "channelId": channel_id,
-                    "type": "video",
-                    "videoDuration": "short",
-                    "maxResults": min(count, 50),
-                    "order": "date",
-                    "key": self.api_key,
+                    "part": "snippet,contentDetails",
+                    "playlistId": uploads_playlist,
+                    "maxResults": 50,
                 }
+                if next_page_token:
+                    params["pageToken"] = next_page_token
+
+                data = await self.client.request("playlistItems", params)
+                items = data.get("items", [])
+
+                page_items = []
+                for item in items:
+                    published = self._parse_timestamp(
+                        item.get("contentDetails", {}).get("videoPublishedAt")
+                        or item["snippet"].get("publishedAt")
+                    )
+                    if published and (newest_seen is None or published > newest_seen):
+                        newest_seen = published
+                    if watermark and published and published <= watermark:
+                        reached_watermark = True
+                        break
+                    page_items.append((published, item))
 
-                response = await client.get(YOUTUBE_SEARCH_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                video_ids = [item["id"]["videoId"] for item in data.get("items", [])]
-                videos = []
-
-                if video_ids:
-                    stats = await self._get_video_stats(client, video_ids)
-
-                    for item in data.get("items", []):
-                        video_id = item["id"]["videoId"]
-                        snippet = item["snippet"]
-                        video_stats = stats.get(video_id, {})
-
-                        # Filter for actual Shorts
-                        duration = video_stats.get("duration_seconds", 0)
-                        if duration > 60:
-                            continue
-
-                        video_info = VideoInfo(
-                            platform=Platform.YOUTUBE_SHORTS,
-                            video_url=f"https://www.youtube.com/shorts/{video_id}",
-                            video_id=video_id,
-                            author_username=snippet.get("channelTitle", ""),
-                            thumbnail_url=snippet.get("thumbnails", {}).get("high", {}).get("url"),
-                            likes=video_stats.get("likes", 0),
-                            comments=video_stats.get("comments", 0),
-                            views=video_stats.get("views", 0),
-                            caption=snippet.get("title", ""),
-                            hashtags=self._extract_hashtags(snippet.get("description", "")),
-                            extracted_at=datetime.utcnow(),
-                        )
-                        videos.append(video_info)
-
-                return ExtractionResult(
-                    success=True,
-                    videos=videos,
-                    videos_requested=count,
-                    videos_found=len(videos),
+                stats = await self.client.get_video_stats(
+                    [item["contentDetails"]["videoId"] for _, item in page_items]
+                )
+                for published, item in page_items:
+                    video_id = item["contentDetails"]["videoId"]
+                    video_info = self._to_video_info(video_id, item["snippet"], stats.get(video_id, {}))
+                    if video_info:
+                        found.append((published, video_info))
+
+                next_page_token = data.get("nextPageToken")
+                if reached_watermark or not next_page_token:
+                    break
+                if not catch_up and len(found) >= count:
+                    break
+
+            caught_up = reached_watermark or not next_page_token
+            new_watermark = None
+            if catch_up and caught_up:
+                if len(found) > count:
+                    # Return the oldest `count`; the newer rest stay above the watermark
+                    found = found[-count:]
+                    new_watermark = found[0][0]
+                else:
+                    new_watermark = newest_seen
+            elif incremental and watermark is None:
+                # First run: start from the newest upload rather than the channel's history
+                new_watermark = newest_seen
+            elif catch_up:
+                # Stopped at max_pages with uploads between here and the watermark
+                # still unseen; keep it so they are not skipped
+                logger.info(
+                    f"Channel {channel_id}: stopped before the watermark; keeping it so older uploads are not skipped"
                 )
 
+            if new_watermark:
+                self._set_watermark(channel_id, new_watermark)
+
+            videos = [video for _, video in found]
+            videos = videos[:count]
+            return ExtractionResult(
+                success=True,
+                videos=videos,
+                videos_requested=count,
+                videos_found=len(videos),
+            )
+
         except Exception as e:
             logger.error(f"Channel shorts extraction failed: {e}")
             return ExtractionResult(
@@ -207,56 +333,82 @@ class YouTubeShortsExtractor:
                 videos_requested=count,
             )
 
-    async def _get_video_stats(
+    async def get_channels_shorts_many(
         self,
-        client: httpx.AsyncClient,
-        video_ids: list[str]
-    ) -> dict:
-        """Get detailed statistics for a list of videos."""
-        try:
-            params = {
-                "part": "statistics,contentDetails",
-                "id": ",".join(video_ids),
-                "key": self.api_key,
-            }
-
-            response = await client.get(YOUTUBE_VIDEOS_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            stats = {}
-            for item in data.get("items", []):
-                video_id = item["id"]
-                statistics = item.get("statistics", {})
-                content_details = item.get("contentDetails", {})
-
-                # Parse duration (ISO 8601 format: PT1M30S)
-                duration_str = content_details.get("duration", "PT0S")
-                duration_seconds = self._parse_duration(duration_str)
-
-                stats[video_id] = {
-                    "views": int(statistics.get("viewCount", 0)),
-                    "likes": int(statistics.get("likeCount", 0)),
-                    "comments": int(statistics.get("commentCount", 0)),
-                    "duration_seconds": duration_seconds,
-                }
+        channel_ids: list[str],
+        count_per_channel: int = 30,
+        incremental: bool = True,
+    ) -> dict[str, ExtractionResult]:
+        """
+        Refresh many channels concurrently, by default only fetching new uploads.
 
-            return stats
+        Args:
+            channel_ids: YouTube channel IDs
+            count_per_channel: Maximum Shorts per channel
+            incremental: Only fetch uploads newer than each channel's watermark
 
-        except Exception as e:
-            logger.warning(f"Failed to get video stats: {e}")
+        Returns:
+            Dict of channel_id to ExtractionResult
+        """
+        channel_ids = list(dict.fromkeys(channel_ids))
+        results = await asyncio.gather(*[
+            self.get_channel_shorts(c, count=count_per_channel, incremental=incremental)
+            for c in channel_ids
+        ])
+        return dict(zip(channel_ids, results))
+
+    async def _get_uploads_playlist(self, channel_id: str) -> Optional[str]:
+        """Look up a channel's uploads playlist ID (cached for a week)."""
+        data = await self.client.request(
+            "channels",
+            {"part": "contentDetails", "id": channel_id},
+            ttl=UPLOADS_PLAYLIST_TTL,
+        )
+        items = data.get("items", [])
+        if not items:
+            return None
+        return items[0].get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
+
+    @property
+    def _watermarks_path(self) -> Path:
+        return self.client.cache_dir / "channel_watermarks.json"
+
+    def _load_watermarks(self) -> dict:
+        path = self._watermarks_path
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except Exception:
             return {}
 
-    def _parse_duration(self, duration: str) -> int:
-        """Parse ISO 8601 duration to seconds."""
-        import re
-        match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
-        if not match:
-            return 0
-        hours = int(match.group(1) or 0)
-        minutes = int(match.group(2) or 0)
-        seconds = int(match.group(3) or 0)
-        return hours * 3600 + minutes * 60 + seconds
+    def _get_watermark(self, channel_id: str) -> Optional[datetime]:
+        """Publish time of the newest upload seen on a previous incremental run."""
+        entry = self._load_watermarks().get(channel_id)
+        return self._parse_timestamp(entry.get("last_published_at")) if entry else None
+
+    def _set_watermark(self, channel_id: str, published_at: datetime) -> None:
+        watermarks = self._load_watermarks()
+        previous = self._parse_timestamp(watermarks.get(channel_id, {}).get("last_published_at"))
+        if previous and previous >= published_at:
+            return
+        watermarks[channel_id] = {
+            "last_published_at": published_at.isoformat(),
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        self._watermarks_path.write_text(json.dumps(watermarks, indent=2))
+
+    @staticmethod
+    def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+        """Parse an API timestamp (2024-01-01T12:00:00Z) to an aware datetime."""
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
 
     def _extract_hashtags(self, text: str) -> list[str]:
         """Extract hashtags from text."""
@@ -4,7 +4,6 @@ Hashtag generator using Google Gemini.
 Converts niche descriptions into relevant, searchable hashtags.
 """
 
-import asyncio
 import logging
 from dataclasses import dataclass
 from typing import Optional
@@ -13,6 +12,7 @@ from google import genai
 from google.genai import types
 
 from config.settings import settings
+from src.analyzer.rate_limiter import get_gemini_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -100,10 +100,8 @@ class HashtagGenerator:
                 count=count,
             )
 
-            loop = asyncio.get_event_loop()
-
-            def do_generation():
-                response = self.client.models.generate_content(
+            async with get_gemini_rate_limiter().limit("hashtag_generation") as call:
+                response = await self.client.aio.models.generate_content(
                     model=self.model,
                     contents=[
                         types.Content(
@@ -116,9 +114,10 @@ class HashtagGenerator:
                         max_output_tokens=500,
                     ),
                 )
-                return response.text
+                usage = getattr(response, "usage_metadata", None)
+                call.actual_tokens = getattr(usage, "total_token_count", None)
 
-            response_text = await loop.run_in_executor(None, do_generation)
+            response_text = response.text
 
             # Parse response - one hashtag per line
             hashtags = self._parse_hashtags(response_text, count)
@@ -4,7 +4,7 @@ Supabase storage client for social scraper.
 Handles storing posts, analyses, and job tracking.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 from pathlib import Path
 import logging
@@ -13,6 +13,7 @@ from supabase import create_client, Client
 
 from config.settings import settings
 from src.extractor import VideoInfo, ExtractionResult
+from src.extractor.canonical import canonical_id
 from src.downloader.video import DownloadResult
 from src.analyzer.gemini import VideoAnalysis
 
@@ -118,6 +119,7 @@ class SupabaseStorage:
         niche: Optional[str] = None,
         source_hashtag: Optional[str] = None,
         niche_mode: Optional[str] = None,
+        record_metrics: bool = True,
     ) -> dict:
         """
         Store a post with optional download and analysis data.
@@ -125,12 +127,16 @@ class SupabaseStorage:
         Args:
             niche: Business vertical (e.g., 'dj_nightlife', 'bars_restaurants')
             niche_mode: Analysis mode ('entertainment', 'data_engineering', 'both')
+            record_metrics: Also append an engagement snapshot to post_metrics
+                (store_batch turns this off and writes all snapshots at once)
 
         Returns the inserted/updated record.
         """
+        # Same video via a different URL shape maps to the same row
+        canonical = canonical_id(video_info.video_url, video_info.platform, video_info.video_id)
         data = {
-            "platform": video_info.platform.value,
-            "platform_id": video_info.video_id,
+            "platform": canonical.platform.value,
+            "platform_id": canonical.native_id,
             "video_url": video_info.video_url,
             "author_username": video_info.author_username,
             "content_type": "video",
@@ -180,8 +186,14 @@ class SupabaseStorage:
             .execute()
         )
 
-        logger.info(f"Stored post: {video_info.platform.value}/{video_info.video_id}")
-        return result.data[0] if result.data else {}
+        logger.info(f"Stored post: {canonical.key}")
+        row = result.data[0] if result.data else {}
+        if record_metrics and row:
+            try:
+                self.record_post_metrics([row])
+            except Exception as e:
+                logger.error(f"Failed to record engagement snapshot for {canonical.key}: {e}")
+        return row
 
     def store_batch(
         self,
@@ -217,6 +229,7 @@ class SupabaseStorage:
                     analyses_map[a.video_path] = a
 
         stored = 0
+        rows = []
         for video in videos:
             download = downloads_map.get(video.video_url)
             analysis = None
@@ -224,16 +237,100 @@ class SupabaseStorage:
                 analysis = analyses_map.get(str(download.file_path))
 
             try:
-                self.store_post(
+                row = self.store_post(
                     video, download, analysis,
-                    niche=niche, source_hashtag=source_hashtag, niche_mode=validated_mode
+                    niche=niche, source_hashtag=source_hashtag, niche_mode=validated_mode,
+                    record_metrics=False,
                 )
                 stored += 1
+                if row:
+                    rows.append(row)
             except Exception as e:
                 logger.error(f"Failed to store post {video.video_id}: {e}")
 
+        try:
+            self.record_post_metrics(rows)
+        except Exception as e:
+            logger.error(f"Failed to record engagement snapshots: {e}")
+
         return stored
 
+    def record_post_metrics(self, posts: list[dict], chunk_size: int = 500) -> int:
+        """
+        Append engagement snapshots for stored posts to post_metrics.
+
+        Velocity (post_velocity) is updated by a trigger on insert, so one
+        multi-row insert per chunk keeps that incremental and cheap.
+
+        Args:
+            posts: Post rows with at least id, views, likes, comments, shares
+
+        Returns:
+            Number of snapshots written
+        """
+        snapshots = [
+            {
+                "post_id": post["id"],
+                "views": post.get("views"),
+                "likes": post.get("likes"),
+                "comments": post.get("comments"),
+                "shares": post.get("shares"),
+            }
+            for post in posts
+            if post.get("id")
+        ]
+        for i in range(0, len(snapshots), chunk_size):
+            self.client.table("post_metrics").insert(snapshots[i:i + chunk_size]).execute()
+        return len(snapshots)
+
+    def get_post_metrics(self, post_id: str, limit: int = 500) -> list[dict]:
+        """Get a post's engagement snapshots, newest first."""
+        result = (
+            self.client.table("post_metrics")
+            .select("captured_at, views, likes, comments, shares")
+            .eq("post_id", post_id)
+            .order("captured_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return result.data or []
+
+    def get_accelerating_posts(
+        self,
+        niche: Optional[str] = None,
+        niche_mode: Optional[str] = None,
+        platform: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """
+        Get the posts whose view velocity is rising fastest.
+
+        Ordered by acceleration (6h views/hour minus 24h views/hour), served by
+        the partial (niche, acceleration) index.
+
+        Args:
+            niche: Business vertical to rank within (None = all niches)
+            niche_mode: Optional analysis mode filter
+            platform: Optional platform filter
+            limit: Maximum posts
+
+        Returns:
+            accelerating_posts rows (velocity columns plus video_url, author, caption)
+        """
+        query = (
+            self.client.table("accelerating_posts")
+            .select("*")
+            .not_.is_("acceleration", "null")
+        )
+        if niche:
+            query = query.eq("niche", niche)
+        if niche_mode:
+            query = query.eq("niche_mode", niche_mode)
+        if platform:
+            query = query.eq("platform", platform)
+        result = query.order("acceleration", desc=True).limit(limit).execute()
+        return result.data or []
+
     def create_job(
         self,
         platform: str,
@@ -325,6 +422,129 @@ class SupabaseStorage:
         result = query.execute()
         return result.data
 
+    def get_posts_for_engagement_refresh(
+        self,
+        limit: Optional[int] = None,
+        stale_hours: Optional[float] = None,
+        missing_date_only: bool = False,
+        missing_engagement_only: bool = False,
+        page_size: int = 1000,
+    ) -> list[dict]:
+        """
+        Get posts whose engagement should be refreshed, stalest first.
+
+        Args:
+            limit: Maximum posts (None = all matching)
+            stale_hours: Only posts not refreshed within this many hours
+            missing_date_only: Only posts missing posted_at
+            missing_engagement_only: Only posts with zero views and comments
+            page_size: Rows per request (PostgREST caps responses)
+
+        Returns:
+            List of {id, video_url, views, likes, comments, shares, posted_at}
+        """
+        posts: list[dict] = []
+        while limit is None or len(posts) < limit:
+            query = self.client.table("posts").select(
+                "id, video_url, views, likes, comments, shares, posted_at"
+            )
+            if missing_date_only:
+                query = query.is_("posted_at", "null")
+            if missing_engagement_only:
+                query = query.eq("views", 0).eq("comments", 0)
+            if stale_hours is not None:
+                cutoff = (datetime.utcnow() - timedelta(hours=stale_hours)).isoformat()
+                query = query.or_(
+                    f"engagement_refreshed_at.is.null,engagement_refreshed_at.lt.{cutoff}"
+                )
+
+            start = len(posts)
+            end = start + page_size - 1 if limit is None else min(start + page_size, limit) - 1
+            result = (
+                query.order("engagement_refreshed_at", desc=False, nullsfirst=True)
+                .order("id")  # Tie-breaker so offset pages don't overlap
+                .range(start, end)
+                .execute()
+            )
+            page = result.data or []
+            posts.extend(page)
+            if len(page) < end - start + 1:
+                break
+        return posts
+
+    def _fetch_all_pages(
+        self,
+        table_name: str,
+        columns: str,
+        order_by: str,
+        page_size: int = 1000,
+    ) -> list[dict]:
+        """Fetch every row of a table or view, paging past the PostgREST response cap."""
+        rows: list[dict] = []
+        while True:
+            start = len(rows)
+            result = (
+                self.client.table(table_name)
+                .select(columns)
+                .order(order_by)
+                .range(start, start + page_size - 1)
+                .execute()
+            )
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    def get_refresh_candidates(self) -> list[dict]:
+        """
+        Get every post with the fields the refresh scheduler prioritizes on.
+
+        Returns:
+            List of {id, video_url, views, posted_at, scraped_at,
+            engagement_refreshed_at, views_per_hour} where views_per_hour is
+            the 6h velocity (or lifetime rate) from post_velocity, if known
+        """
+        posts = self._fetch_all_pages(
+            "posts",
+            "id, video_url, views, posted_at, scraped_at, engagement_refreshed_at",
+            order_by="id",
+        )
+        velocities = {
+            row["post_id"]: (
+                row["views_per_hour_6h"]
+                if row["views_per_hour_6h"] is not None
+                else row["views_per_hour_lifetime"]
+            )
+            for row in self._fetch_all_pages(
+                "post_velocity",
+                "post_id, views_per_hour_6h, views_per_hour_lifetime",
+                order_by="post_id",
+            )
+        }
+        for post in posts:
+            post["views_per_hour"] = velocities.get(post["id"])
+        return posts
+
+    def update_post_engagement_bulk(self, rows: list[dict], chunk_size: int = 500) -> int:
+        """
+        Write refreshed engagement for many posts in chunked RPC calls.
+
+        The RPC also appends a post_metrics snapshot for every updated post.
+
+        Args:
+            rows: {"id", "views", "likes", "comments", "shares", "posted_at"?} per post
+
+        Returns:
+            Number of posts updated
+        """
+        updated = 0
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            result = self.client.rpc("update_post_engagement_bulk", {"updates": chunk}).execute()
+            updated += result.data or 0
+        logger.info(f"Refreshed engagement for {updated} posts")
+        return updated
+
     def update_post_analysis(self, post_id: str, analysis: VideoAnalysis) -> None:
         """Update a post with analysis results."""
         data = {
@@ -763,3 +983,52 @@ class SupabaseStorage:
                 "replicability": sum(replicabilities) / len(replicabilities) if replicabilities else 0,
                 "count": len(result.data),
             }
+
+    # ==================== Comment Methods ====================
+
+    def store_comments_bulk(self, rows: list[dict], chunk_size: int = 500) -> int:
+        """
+        Upsert comment rows in chunks. Returns the number of rows written.
+
+        Rows are keyed by comment_id, so re-harvesting a post is idempotent.
+        """
+        written = 0
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            result = (
+                self.client.table("comments")
+                .upsert(chunk, on_conflict="comment_id")
+                .execute()
+            )
+            written += len(result.data) if result.data else 0
+        logger.info(f"Stored {written} comments")
+        return written
+
+    def get_comment_cursors(self, media_ids: list[str]) -> dict[str, dict]:
+        """Get saved harvest cursors keyed by media_id."""
+        if not media_ids:
+            return {}
+        result = (
+            self.client.table("comment_cursors")
+            .select("*")
+            .in_("media_id", media_ids)
+            .execute()
+        )
+        return {row["media_id"]: row for row in (result.data or [])}
+
+    def save_comment_cursors(self, cursors: list[dict]) -> None:
+        """Upsert harvest cursors (media_id, next_cursor, comments_fetched, completed)."""
+        if not cursors:
+            return
+        self.client.table("comment_cursors").upsert(
+            cursors, on_conflict="media_id"
+        ).execute()
+
+    def get_post_comments(self, media_id: str, limit: int = 500) -> list[dict]:
+        """Get stored comments for a post, newest first."""
+        return self._fetch_table(
+            "comments",
+            filters={"media_id": media_id},
+            order_by="commented_at",
+            limit=limit
+        )
@@ -0,0 +1,38 @@
+-- Comment Harvesting
+-- Stores comments pulled page by page from posts, plus per-post cursors so
+-- an interrupted harvest can resume where it stopped.
+
+-- ============================================
+-- COMMENTS TABLE
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS comments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    platform platform_type NOT NULL DEFAULT 'instagram',
+    media_id VARCHAR(255) NOT NULL,      -- matches posts.platform_id
+    comment_id VARCHAR(255) NOT NULL UNIQUE,
+
+    username VARCHAR(255),
+    text TEXT,
+    likes INTEGER DEFAULT 0,
+    commented_at TIMESTAMP WITH TIME ZONE,
+
+    scraped_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_comments_media_id ON comments(media_id);
+CREATE INDEX IF NOT EXISTS idx_comments_media_commented_at ON comments(media_id, commented_at DESC);
+
+-- ============================================
+-- HARVEST CURSORS
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS comment_cursors (
+    media_id VARCHAR(255) PRIMARY KEY,
+    next_cursor TEXT,                    -- NULL once the post is fully harvested
+    comments_fetched INTEGER DEFAULT 0,
+    completed BOOLEAN DEFAULT FALSE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_comment_cursors_completed ON comment_cursors(completed);
@@ -0,0 +1,46 @@
+-- Bulk Engagement Refresh
+-- Lets the metadata-only refresh write engagement for many posts in one call
+-- and pick the stalest posts first.
+
+-- ============================================
+-- REFRESH TRACKING
+-- ============================================
+
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS engagement_refreshed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_posts_engagement_refreshed_at
+    ON posts(engagement_refreshed_at NULLS FIRST);
+
+-- ============================================
+-- BULK UPDATE
+-- ============================================
+
+-- updates: JSON array of {"id", "views", "likes", "comments", "shares", "posted_at"}.
+-- Missing or null fields keep their current value. Returns the rows updated.
+CREATE OR REPLACE FUNCTION update_post_engagement_bulk(updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE posts p
+    SET
+        views = COALESCE(u.views, p.views),
+        likes = COALESCE(u.likes, p.likes),
+        comments = COALESCE(u.comments, p.comments),
+        shares = COALESCE(u.shares, p.shares),
+        posted_at = COALESCE(u.posted_at, p.posted_at),
+        engagement_refreshed_at = NOW()
+    FROM jsonb_to_recordset(updates) AS u(
+        id UUID,
+        views INTEGER,
+        likes INTEGER,
+        comments INTEGER,
+        shares INTEGER,
+        posted_at TIMESTAMP WITH TIME ZONE
+    )
+    WHERE p.id = u.id;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql;
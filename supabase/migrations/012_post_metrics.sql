@@ -0,0 +1,186 @@
+-- Engagement Time Series and Velocity
+-- posts only holds the latest engagement, so every refresh overwrote the
+-- history needed for growth signals. post_metrics keeps every observation
+-- (append-only), and post_velocity holds views/hour over sliding windows per
+-- post, updated incrementally as snapshots are inserted.
+
+-- ============================================
+-- SNAPSHOTS
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS post_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    post_id UUID NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    captured_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    views BIGINT,
+    likes BIGINT,
+    comments BIGINT,
+    shares BIGINT
+);
+
+-- Serves both "latest snapshot" and "oldest snapshot inside a window" lookups
+CREATE INDEX IF NOT EXISTS idx_post_metrics_post_captured
+    ON post_metrics(post_id, captured_at DESC);
+
+-- ============================================
+-- VELOCITY
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS post_velocity (
+    post_id UUID PRIMARY KEY REFERENCES posts(id) ON DELETE CASCADE,
+    platform platform_type,
+    niche VARCHAR(100),
+    niche_mode VARCHAR(50),
+    captured_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    views BIGINT,
+    views_per_hour_6h DOUBLE PRECISION,
+    views_per_hour_24h DOUBLE PRECISION,
+    views_per_hour_lifetime DOUBLE PRECISION,
+    -- Recent rate minus longer-window rate: positive means the post is speeding up
+    acceleration DOUBLE PRECISION,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Top-accelerating queries are an index range scan, not a sort over all posts
+CREATE INDEX IF NOT EXISTS idx_post_velocity_niche_acceleration
+    ON post_velocity(niche, acceleration DESC)
+    WHERE acceleration IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_post_velocity_acceleration
+    ON post_velocity(acceleration DESC)
+    WHERE acceleration IS NOT NULL;
+
+-- Views/hour between the oldest snapshot inside the window and the latest one.
+-- Snapshots less than 10 minutes apart are ignored as too noisy.
+CREATE OR REPLACE FUNCTION views_per_hour(
+    p_post_id UUID,
+    p_latest_at TIMESTAMP WITH TIME ZONE,
+    p_latest_views BIGINT,
+    p_window INTERVAL
+)
+RETURNS DOUBLE PRECISION AS $$
+    SELECT (p_latest_views - m.views)::DOUBLE PRECISION
+           / (EXTRACT(EPOCH FROM p_latest_at - m.captured_at) / 3600.0)
+    FROM post_metrics m
+    WHERE m.post_id = p_post_id
+      AND m.captured_at >= p_latest_at - p_window
+      AND m.captured_at <= p_latest_at - INTERVAL '10 minutes'
+      AND m.views IS NOT NULL
+    ORDER BY m.captured_at ASC
+    LIMIT 1;
+$$ LANGUAGE sql STABLE;
+
+-- Recompute velocity only for the posts touched by the inserted snapshots
+CREATE OR REPLACE FUNCTION refresh_post_velocity()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO post_velocity (
+        post_id, platform, niche, niche_mode, captured_at, views,
+        views_per_hour_6h, views_per_hour_24h, views_per_hour_lifetime,
+        acceleration, updated_at
+    )
+    SELECT
+        latest.post_id,
+        p.platform,
+        p.niche,
+        p.niche_mode,
+        latest.captured_at,
+        latest.views,
+        w.vph_6h,
+        w.vph_24h,
+        CASE WHEN p.posted_at IS NOT NULL AND latest.captured_at > p.posted_at
+            THEN latest.views / (EXTRACT(EPOCH FROM latest.captured_at - p.posted_at) / 3600.0)
+        END,
+        w.vph_6h - w.vph_24h,
+        NOW()
+    FROM (
+        SELECT DISTINCT ON (post_id) post_id, captured_at, views
+        FROM new_metrics
+        WHERE views IS NOT NULL
+        ORDER BY post_id, captured_at DESC
+    ) latest
+    JOIN posts p ON p.id = latest.post_id
+    CROSS JOIN LATERAL (
+        SELECT
+            views_per_hour(latest.post_id, latest.captured_at, latest.views, INTERVAL '6 hours') AS vph_6h,
+            views_per_hour(latest.post_id, latest.captured_at, latest.views, INTERVAL '24 hours') AS vph_24h
+    ) w
+    ON CONFLICT (post_id) DO UPDATE SET
+        platform = EXCLUDED.platform,
+        niche = EXCLUDED.niche,
+        niche_mode = EXCLUDED.niche_mode,
+        captured_at = EXCLUDED.captured_at,
+        views = EXCLUDED.views,
+        views_per_hour_6h = EXCLUDED.views_per_hour_6h,
+        views_per_hour_24h = EXCLUDED.views_per_hour_24h,
+        views_per_hour_lifetime = EXCLUDED.views_per_hour_lifetime,
+        acceleration = EXCLUDED.acceleration,
+        updated_at = EXCLUDED.updated_at
+    -- A backfilled older snapshot must not replace a newer velocity
+    WHERE post_velocity.captured_at <= EXCLUDED.captured_at;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS post_metrics_refresh_velocity ON post_metrics;
+CREATE TRIGGER post_metrics_refresh_velocity
+    AFTER INSERT ON post_metrics
+    REFERENCING NEW TABLE AS new_metrics
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION refresh_post_velocity();
+
+CREATE OR REPLACE VIEW accelerating_posts AS
+SELECT
+    v.*,
+    p.video_url,
+    p.author_username,
+    p.caption,
+    p.posted_at
+FROM post_velocity v
+JOIN posts p ON p.id = v.post_id;
+
+-- ============================================
+-- ENGAGEMENT REFRESH WRITES SNAPSHOTS
+-- ============================================
+
+-- Same contract as migration 011, plus one post_metrics row per updated post
+CREATE OR REPLACE FUNCTION update_post_engagement_bulk(updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    WITH updated AS (
+        UPDATE posts p
+        SET
+            views = COALESCE(u.views, p.views),
+            likes = COALESCE(u.likes, p.likes),
+            comments = COALESCE(u.comments, p.comments),
+            shares = COALESCE(u.shares, p.shares),
+            posted_at = COALESCE(u.posted_at, p.posted_at),
+            engagement_refreshed_at = NOW()
+        FROM jsonb_to_recordset(updates) AS u(
+            id UUID,
+            views INTEGER,
+            likes INTEGER,
+            comments INTEGER,
+            shares INTEGER,
+            posted_at TIMESTAMP WITH TIME ZONE
+        )
+        WHERE p.id = u.id
+        RETURNING p.id, p.views, p.likes, p.comments, p.shares, p.engagement_refreshed_at
+    )
+    INSERT INTO post_metrics (post_id, captured_at, views, likes, comments, shares)
+    SELECT id, engagement_refreshed_at, views, likes, comments, shares
+    FROM updated;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Seed the series with the engagement already stored
+INSERT INTO post_metrics (post_id, captured_at, views, likes, comments, shares)
+SELECT id, COALESCE(engagement_refreshed_at, scraped_at, NOW()), views, likes, comments, shares
+FROM posts
+WHERE NOT EXISTS (SELECT 1 FROM post_metrics m WHERE m.post_id = posts.id);
@@ -0,0 +1,216 @@
+-- Canonical Platform IDs
+-- store_post now keys posts on the canonical (platform, platform_id) pair
+-- from src/extractor/canonical.py. Rows stored before that still carry the
+-- legacy IDs:
+--   - Instagram: numeric media pk (or "pk_userid") instead of the shortcode
+--   - Substack embeds: an MD5 of the raw URL instead of the video's own ID
+--     (YouTube embeds move to youtube_shorts; Loom/Vimeo become "loom:ID" /
+--     "vimeo:ID"; Substack posts become "publication/slug")
+--   - Any other URL shape canonicalize_url() now resolves differently
+-- Without this backfill, the upsert on (platform, platform_id) would insert a
+-- second row for every post already stored. This migration rewrites legacy
+-- IDs in place and merges rows that turn out to be the same video.
+
+BEGIN;
+
+-- ============================================
+-- CANONICALIZATION (mirrors src/extractor/canonical.py)
+-- ============================================
+
+-- Instagram shortcodes are the media pk in URL-safe base64
+CREATE OR REPLACE FUNCTION instagram_pk_to_shortcode(pk TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    alphabet CONSTANT TEXT := 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_';
+    value NUMERIC := split_part(pk, '_', 1)::NUMERIC;
+    code TEXT := '';
+BEGIN
+    WHILE value > 0 LOOP
+        code := substr(alphabet, (value % 64)::INTEGER + 1, 1) || code;
+        value := div(value, 64);
+    END LOOP;
+    RETURN code;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- (platform, platform_id) for a stored post, like canonical_id(): the ID the
+-- URL resolves to, else the stored one (Instagram pks become shortcodes)
+CREATE OR REPLACE FUNCTION canonical_post_id(platform TEXT, platform_id TEXT, video_url TEXT)
+RETURNS TABLE (canonical_platform TEXT, canonical_id TEXT) AS $$
+DECLARE
+    parts TEXT[] := regexp_match(
+        regexp_replace(btrim(COALESCE(video_url, '')), '^[A-Za-z][A-Za-z0-9+.-]*://', ''),
+        '^([^/?#]*)([^?#]*)(?:\?([^#]*))?'
+    );
+    host TEXT := regexp_replace(lower(split_part(parts[1], ':', 1)), '^(www\.|m\.)', '');
+    path TEXT := COALESCE(parts[2], '');
+    query TEXT := COALESCE(parts[3], '');
+    m TEXT[];
+BEGIN
+    IF host IN ('youtube.com', 'youtube-nocookie.com', 'music.youtube.com') THEN
+        m := regexp_match(query, '(?:^|&)v=([^&]*)');
+        IF m IS NULL OR m[1] !~ '^[A-Za-z0-9_-]{11}$' THEN
+            m := regexp_match(path, '^/(?:shorts|embed|live|v|e)/([A-Za-z0-9_-]{11})');
+        END IF;
+        IF m IS NOT NULL THEN
+            RETURN QUERY SELECT 'youtube_shorts'::TEXT, m[1];
+            RETURN;
+        END IF;
+    ELSIF host = 'youtu.be' THEN
+        m := regexp_match(path, '^/([A-Za-z0-9_-]{11})');
+        IF m IS NOT NULL THEN
+            RETURN QUERY SELECT 'youtube_shorts'::TEXT, m[1];
+            RETURN;
+        END IF;
+    ELSIF host LIKE '%tiktok.com' THEN
+        m := COALESCE(
+            regexp_match(path, '/video/(\d+)'),
+            regexp_match(path, '^/v/(\d+)'),
+            regexp_match(path, '^/embed(?:/v2)?/(\d+)')
+        );
+        IF m IS NOT NULL THEN
+            RETURN QUERY SELECT 'tiktok'::TEXT, m[1];
+            RETURN;
+        END IF;
+    ELSIF host IN ('instagram.com', 'instagr.am') THEN
+        m := regexp_match(path, '^/(?:[\w.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)');
+        IF m IS NOT NULL THEN
+            RETURN QUERY SELECT 'instagram'::TEXT, m[1];
+            RETURN;
+        END IF;
+    ELSIF host LIKE '%substack.com' AND host <> 'substack.com' THEN
+        m := regexp_match(path, '^/p/([\w-]+)');
+        IF m IS NOT NULL THEN
+            RETURN QUERY SELECT 'substack'::TEXT, split_part(host, '.', 1) || '/' || m[1];
+            RETURN;
+        END IF;
+    ELSIF host LIKE '%loom.com' THEN
+        m := regexp_match(path, '^/(?:share|embed)/([0-9a-f]{32})');
+        IF m IS NOT NULL THEN
+            RETURN QUERY SELECT 'substack'::TEXT, 'loom:' || m[1];
+            RETURN;
+        END IF;
+    ELSIF host LIKE '%vimeo.com' THEN
+        m := regexp_match(path, '/(?:video/)?(\d{6,})');
+        IF m IS NOT NULL THEN
+            RETURN QUERY SELECT 'substack'::TEXT, 'vimeo:' || m[1];
+            RETURN;
+        END IF;
+    END IF;
+
+    IF platform = 'instagram' AND platform_id ~ '^\d+(_\d+)?$' THEN
+        RETURN QUERY SELECT platform, instagram_pk_to_shortcode(platform_id);
+        RETURN;
+    END IF;
+    RETURN QUERY SELECT platform, platform_id;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- ============================================
+-- MAPPING
+-- ============================================
+
+CREATE TEMP TABLE canonical_posts ON COMMIT DROP AS
+SELECT
+    p.id,
+    p.platform::TEXT AS old_platform,
+    p.platform_id AS old_platform_id,
+    c.canonical_platform AS new_platform,
+    c.canonical_id AS new_platform_id
+FROM posts p
+CROSS JOIN LATERAL canonical_post_id(p.platform::TEXT, p.platform_id, p.video_url) c;
+
+-- One survivor per canonical video: a row already stored under the canonical
+-- ID first, then analyzed rows, then the most recently scraped
+CREATE TEMP TABLE canonical_groups ON COMMIT DROP AS
+SELECT
+    cp.*,
+    FIRST_VALUE(cp.id) OVER (
+        PARTITION BY cp.new_platform, cp.new_platform_id
+        ORDER BY
+            (cp.old_platform = cp.new_platform AND cp.old_platform_id = cp.new_platform_id) DESC,
+            (p.analysis IS NOT NULL) DESC,
+            p.scraped_at DESC NULLS LAST,
+            p.id
+    ) AS survivor_id
+FROM canonical_posts cp
+JOIN posts p ON p.id = cp.id;
+
+-- ============================================
+-- MERGE DUPLICATES
+-- ============================================
+
+-- Fill gaps in each survivor from its duplicates; engagement keeps the highest count
+UPDATE posts s
+SET
+    analysis = COALESCE(s.analysis, d.analysis),
+    analyzed_at = COALESCE(s.analyzed_at, d.analyzed_at),
+    local_file_path = COALESCE(s.local_file_path, d.local_file_path),
+    file_size_bytes = COALESCE(s.file_size_bytes, d.file_size_bytes),
+    duration_seconds = COALESCE(s.duration_seconds, d.duration_seconds),
+    caption = COALESCE(s.caption, d.caption),
+    posted_at = COALESCE(s.posted_at, d.posted_at),
+    views = GREATEST(s.views, d.views),
+    likes = GREATEST(s.likes, d.likes),
+    comments = GREATEST(s.comments, d.comments),
+    shares = GREATEST(s.shares, d.shares)
+FROM (
+    SELECT
+        g.survivor_id,
+        (ARRAY_AGG(p.analysis ORDER BY p.analyzed_at DESC NULLS LAST) FILTER (WHERE p.analysis IS NOT NULL))[1] AS analysis,
+        MAX(p.analyzed_at) AS analyzed_at,
+        (ARRAY_AGG(p.local_file_path) FILTER (WHERE p.local_file_path IS NOT NULL))[1] AS local_file_path,
+        MAX(p.file_size_bytes) AS file_size_bytes,
+        MAX(p.duration_seconds) AS duration_seconds,
+        (ARRAY_AGG(p.caption) FILTER (WHERE p.caption IS NOT NULL))[1] AS caption,
+        MIN(p.posted_at) AS posted_at,
+        MAX(p.views) AS views,
+        MAX(p.likes) AS likes,
+        MAX(p.comments) AS comments,
+        MAX(p.shares) AS shares
+    FROM canonical_groups g
+    JOIN posts p ON p.id = g.id
+    WHERE g.id <> g.survivor_id
+    GROUP BY g.survivor_id
+) d
+WHERE s.id = d.survivor_id;
+
+-- Keep the engagement history of merged rows (post_velocity is rebuilt from new snapshots)
+UPDATE post_metrics m
+SET post_id = g.survivor_id
+FROM canonical_groups g
+WHERE m.post_id = g.id AND g.id <> g.survivor_id;
+
+DELETE FROM posts p
+USING canonical_groups g
+WHERE p.id = g.id AND g.id <> g.survivor_id;
+
+-- ============================================
+-- REWRITE IDS
+-- ============================================
+
+UPDATE posts p
+SET
+    platform = g.new_platform::platform_type,
+    platform_id = g.new_platform_id
+FROM canonical_groups g
+WHERE p.id = g.id
+  AND g.id = g.survivor_id
+  AND (g.old_platform <> g.new_platform OR g.old_platform_id <> g.new_platform_id);
+
+-- Comments and harvest cursors are keyed by the Instagram media id, now the shortcode
+UPDATE comments
+SET media_id = instagram_pk_to_shortcode(media_id)
+WHERE platform = 'instagram' AND media_id ~ '^\d+(_\d+)?$';
+
+DELETE FROM comment_cursors c
+WHERE c.media_id ~ '^\d+(_\d+)?$'
+  AND EXISTS (
+      SELECT 1 FROM comment_cursors s WHERE s.media_id = instagram_pk_to_shortcode(c.media_id)
+  );
+
+UPDATE comment_cursors
+SET media_id = instagram_pk_to_shortcode(media_id)
+WHERE media_id ~ '^\d+(_\d+)?$';
+
+COMMIT;
@@ -0,0 +1,73 @@
+"""Shared test fixtures."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+class FixtureServer:
+    """
+    Local HTTP server that answers every GET from a handler function.
+
+    The handler receives (path, query, headers) and returns (status, headers,
+    body). A dict or list body is sent as JSON. Requests are recorded as
+    (path, query) tuples in `requests`.
+    """
+
+    def __init__(self, handler: Callable):
+        self.handler = handler
+        self.requests: list[tuple[str, dict]] = []
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                server.requests.append((url.path, query))
+                status, headers, body = server.handler(url.path, query, self.headers)
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body)
+                    headers = {"Content-Type": "application/json", **headers}
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def paths(self) -> list[str]:
+        return [path for path, _ in self.requests]
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def fixture_server():
+    """Start FixtureServers with serve(handler); all are shut down after the test."""
+    servers: list[FixtureServer] = []
+
+    def serve(handler: Callable) -> FixtureServer:
+        server = FixtureServer(handler)
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.close()
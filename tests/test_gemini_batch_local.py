@@ -0,0 +1,119 @@
+"""BatchAnalyzer.analyze_with_batch_api against the offline LocalBatchService."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from config.settings import settings
+from src.batch.analyzer import BatchAnalyzer
+from src.batch.gemini_batch import LocalBatchService
+
+
+class ProcessDied(Exception):
+    """Stands in for the process being killed while a job runs."""
+
+
+def describe_file(request: dict) -> str:
+    """Responder that names the video the request is about, to check result mapping."""
+    uri = request["contents"][0]["parts"][0]["file_data"]["file_uri"]
+    return json.dumps({"description": f"Analysis of {Path(uri).name}"})
+
+
+@pytest.fixture(autouse=True)
+def offline_settings(monkeypatch):
+    monkeypatch.setattr(settings, "analysis_cache_enabled", False)
+    monkeypatch.setattr(settings, "gemini_api_key", "")
+
+
+@pytest.fixture
+def items(tmp_path) -> list[dict]:
+    videos = tmp_path / "videos"
+    videos.mkdir()
+    items = []
+    for i in range(3):
+        path = videos / f"video{i}.mp4"
+        path.write_bytes(b"\0" * 16)
+        items.append({"video_url": f"https://example.com/{i}", "file_path": str(path), "download_success": True})
+    items.append({"video_url": "https://example.com/missing", "file_path": str(videos / "gone.mp4"), "download_success": True})
+    return items
+
+
+async def test_submit_restart_resume(tmp_path, items):
+    jobs = tmp_path / "jobs"
+    output = tmp_path / "batch"
+
+    def die(state: str) -> None:
+        raise ProcessDied(state)
+
+    # First process: submits the job, then dies while it is still pending
+    slow = LocalBatchService(jobs, latency_seconds=3600, responder=describe_file)
+    with pytest.raises(ProcessDied):
+        await BatchAnalyzer(output).analyze_with_batch_api(
+            items, "b1", service=slow, poll_seconds=0.01, on_state=die, metadata={"request": {"niche": "dj"}}
+        )
+
+    state = json.loads((output / "b1_gemini_batch.json").read_text())
+    assert [Path(r["file_path"]).name for r in state["requests"]] == ["video0.mp4", "video1.mp4", "video2.mp4"]
+    # What a restarted server finds to resume
+    assert BatchAnalyzer(output).pending_batch_jobs() == {"b1": state}
+    assert state["metadata"] == {"request": {"niche": "dj"}}
+
+    # Second process: same batch_id resumes the persisted job instead of resubmitting
+    done = LocalBatchService(jobs, latency_seconds=0, responder=describe_file)
+    states = []
+    result = await BatchAnalyzer(output).analyze_with_batch_api(
+        items, "b1", service=done, poll_seconds=0.01, on_state=states.append
+    )
+
+    assert result.job_name == state["job_name"]
+    assert len(list(jobs.glob("*.json"))) == 1
+    assert states == ["JOB_STATE_SUCCEEDED"]
+    assert (result.total, result.analyzed, result.failed) == (4, 3, 1)
+    assert not (output / "b1_gemini_batch.json").exists()
+    assert BatchAnalyzer(output).pending_batch_jobs() == {}
+
+    by_name = {Path(r["file_path"]).name: r for r in BatchAnalyzer(output).load_results("b1")}
+    for i in range(3):
+        assert by_name[f"video{i}.mp4"]["analysis"]["description"] == f"Analysis of video{i}.mp4"
+    assert by_name["gone.mp4"]["analysis_error"] == "File not found"
+
+
+class FlakyStateService(LocalBatchService):
+    """Local service whose state checks fail with the given exception."""
+
+    def __init__(self, directory: Path, error: Exception):
+        super().__init__(directory)
+        self.error = error
+        self.polls = 0
+
+    async def get_state(self, job_name: str) -> str:
+        self.polls += 1
+        raise self.error
+
+
+async def test_gives_up_after_consecutive_poll_failures(tmp_path, items, monkeypatch):
+    monkeypatch.setattr(settings, "gemini_batch_max_poll_failures", 3)
+    service = FlakyStateService(tmp_path / "jobs", ConnectionError("connection reset"))
+
+    result = await BatchAnalyzer(tmp_path / "batch").analyze_with_batch_api(
+        items, "b2", service=service, poll_seconds=0.01
+    )
+
+    assert service.polls == 3
+    assert (result.analyzed, result.failed) == (0, 4)
+    assert not (tmp_path / "batch" / "b2_gemini_batch.json").exists()
+    errors = [r["analysis_error"] for r in BatchAnalyzer(tmp_path / "batch").load_results("b2")]
+    assert sum("could not be polled" in e for e in errors) == 3
+
+
+async def test_gives_up_on_permanent_poll_error(tmp_path, items):
+    service = FlakyStateService(tmp_path / "jobs", FileNotFoundError("job not found"))
+
+    result = await BatchAnalyzer(tmp_path / "batch").analyze_with_batch_api(
+        items, "b3", service=service, poll_seconds=0.01
+    )
+
+    assert service.polls == 1
+    assert result.failed == 4
+    assert not (tmp_path / "batch" / "b3_gemini_batch.json").exists()
@@ -0,0 +1,79 @@
+"""SubstackExtractor.iter_archive against a local archive fixture server."""
+
+from datetime import datetime, timedelta, timezone
+
+from src.extractor.substack import SubstackExtractor
+
+NEWEST = datetime(2024, 6, 1, tzinfo=timezone.utc)
+POST_COUNT = 45
+
+
+def archive_entry(i: int) -> dict:
+    return {
+        "slug": f"post-{i}",
+        "title": f"Post {i}",
+        "type": "newsletter",
+        "post_date": (NEWEST - timedelta(days=i)).isoformat().replace("+00:00", "Z"),
+    }
+
+
+def archive_handler(path: str, query: dict, headers) -> tuple:
+    if path == "/api/v1/archive":
+        offset, limit = int(query["offset"]), int(query["limit"])
+        return 200, {}, [archive_entry(i) for i in range(offset, min(offset + limit, POST_COUNT))]
+    if path.startswith("/api/v1/posts/"):
+        i = int(path.rsplit("-", 1)[1])
+        body = f'<p>Body {i}</p><iframe src="https://www.youtube.com/embed/vid{i:08d}x"></iframe>'
+        return 200, {}, {"body_html": body, "publishedBylines": [{"name": "Author"}]}
+    return 404, {}, {"error": "not found"}
+
+
+async def collect(extractor: SubstackExtractor, **kwargs) -> list:
+    return [post async for post in extractor.iter_archive("fixture", **kwargs)]
+
+
+async def test_pages_through_whole_archive(fixture_server):
+    server = fixture_server(archive_handler)
+    extractor = SubstackExtractor(use_cache=False, base_url=server.url)
+
+    posts = await collect(extractor, page_size=10, pages_in_flight=2)
+
+    assert [p.title for p in posts] == [f"Post {i}" for i in range(POST_COUNT)]
+    offsets = sorted(int(q["offset"]) for path, q in server.requests if path == "/api/v1/archive")
+    # Windows of two pages until a short page (offset 40 has 5 entries) ends the archive
+    assert offsets == [0, 10, 20, 30, 40, 50]
+    assert posts[0].author == "Author"
+    assert posts[0].embedded_videos and "vid00000000x" in posts[0].embedded_videos[0]
+    assert posts[0].url == f"{server.url}/p/post-0"
+
+
+async def test_since_cutoff_stops_paging(fixture_server):
+    server = fixture_server(archive_handler)
+    extractor = SubstackExtractor(use_cache=False, base_url=server.url)
+
+    posts = await collect(extractor, since=NEWEST - timedelta(days=12), page_size=5, pages_in_flight=2)
+
+    # Posts published at or before `since` are not returned, nor are their bodies fetched
+    assert [p.title for p in posts] == [f"Post {i}" for i in range(12)]
+    fetched = {path for path in server.paths() if path.startswith("/api/v1/posts/")}
+    assert fetched == {f"/api/v1/posts/post-{i}" for i in range(12)}
+    assert all(int(q["offset"]) < 30 for path, q in server.requests if path == "/api/v1/archive")
+
+
+async def test_naive_since_is_utc(fixture_server):
+    server = fixture_server(archive_handler)
+    extractor = SubstackExtractor(use_cache=False, base_url=server.url)
+
+    posts = await collect(extractor, since=(NEWEST - timedelta(days=3)).replace(tzinfo=None), page_size=10)
+
+    assert [p.title for p in posts] == ["Post 0", "Post 1", "Post 2"]
+
+
+async def test_max_posts(fixture_server):
+    server = fixture_server(archive_handler)
+    extractor = SubstackExtractor(use_cache=False, base_url=server.url)
+
+    posts = await collect(extractor, max_posts=7, page_size=5, pages_in_flight=1)
+
+    assert len(posts) == 7
+    assert sum(1 for path in server.paths() if path.startswith("/api/v1/posts/")) == 7
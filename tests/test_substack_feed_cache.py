@@ -0,0 +1,82 @@
+"""SubstackExtractor.extract_publication conditional GETs and the FeedCache."""
+
+from src.extractor.substack import FeedCache, SubstackExtractor
+
+ETAG = '"feed-v1"'
+
+
+def rss(item_count: int, start: int = 0) -> str:
+    items = "".join(
+        f"""<item>
+            <title>Post {i}</title>
+            <link>https://fixture.substack.com/p/post-{i}</link>
+            <guid>post-{i}</guid>
+            <pubDate>Mon, 0{i + 1} Jan 2024 12:00:00 GMT</pubDate>
+            <content:encoded><![CDATA[<p>Body {i}</p><iframe src="https://www.youtube.com/embed/video{i:06d}"></iframe>]]></content:encoded>
+        </item>"""
+        for i in range(start, start + item_count)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>Fixture</title>{items}</channel></rss>"""
+
+
+def feed_handler(path: str, query: dict, headers) -> tuple:
+    if headers.get("If-None-Match") == ETAG:
+        return 304, {}, b""
+    return 200, {"ETag": ETAG, "Content-Type": "application/rss+xml"}, rss(5)
+
+
+async def test_small_count_still_saves_validators(fixture_server, tmp_path):
+    server = fixture_server(feed_handler)
+    cache = FeedCache(tmp_path)
+
+    first_extractor = SubstackExtractor(feed_cache=cache, base_url=server.url)
+    first, _ = await first_extractor.extract_publication("fixture", count=2)
+    assert [p.title for p in first] == ["Post 0", "Post 1"]
+    # The whole feed is read, so the validators cover every post
+    assert first_extractor.posts_parsed == 5
+    assert cache.load("fixture")["etag"] == ETAG
+
+    # A larger count is answered by a 304 from the full cached feed
+    extractor = SubstackExtractor(feed_cache=cache, base_url=server.url)
+    second, _ = await extractor.extract_publication("fixture", count=10)
+    assert extractor.feeds_not_modified == 1
+    assert [p.title for p in second] == [f"Post {i}" for i in range(5)]
+
+
+async def test_trimmed_readers_keep_bodies_in_cache(fixture_server, tmp_path):
+    server = fixture_server(feed_handler)
+    cache = FeedCache(tmp_path)
+
+    trimmed, result = await SubstackExtractor(
+        feed_cache=cache, base_url=server.url, keep_content_html=False
+    ).extract_publication("fixture", count=10)
+    assert all(p.content_html == "" for p in trimmed)
+    assert result.videos_found == 5
+
+    # Reused from the cache (304), but with bodies for an extractor that keeps them
+    extractor = SubstackExtractor(feed_cache=cache, base_url=server.url)
+    full, _ = await extractor.extract_publication("fixture", count=10)
+    assert extractor.feeds_not_modified == 1
+    assert [p.content_html.startswith(f"<p>Body {i}</p>") for i, p in enumerate(full)] == [True] * 5
+
+
+async def test_cache_keeps_only_the_feed_window(fixture_server, tmp_path):
+    window = {"start": 0}
+
+    def sliding_handler(path: str, query: dict, headers) -> tuple:
+        return 200, {"Content-Type": "application/rss+xml"}, rss(5, start=window["start"])
+
+    server = fixture_server(sliding_handler)
+    cache = FeedCache(tmp_path)
+    await SubstackExtractor(feed_cache=cache, base_url=server.url).extract_publication("fixture", count=10)
+    window["start"] = 3
+    await SubstackExtractor(feed_cache=cache, base_url=server.url).extract_publication("fixture", count=10)
+
+    entry = cache.load("fixture")
+    assert entry["order"] == [f"post-{i}" for i in range(3, 8)]
+    assert set(entry["posts"]) == set(entry["order"])
+    # Bodies live in their own file, not in what load() reads
+    assert all("content_html" not in post for post in entry["posts"].values())
+    assert set(cache.load_bodies("fixture")) == set(entry["order"])
@@ -0,0 +1,116 @@
+"""YouTubeShortsExtractor.get_channel_shorts incremental watermarks against a local API fixture."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.extractor import youtube_client
+from src.extractor.youtube_client import YouTubeDataClient
+from src.extractor.youtube_shorts import YouTubeShortsExtractor
+
+CHANNEL = "UCfixture"
+PLAYLIST = "UUfixture"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PAGE_SIZE = 50
+
+
+class FakeChannel:
+    """Uploads playlist of a channel; upload i is published i hours after START."""
+
+    def __init__(self, uploads: int):
+        self.uploads = uploads
+
+    @staticmethod
+    def video_id(i: int) -> str:
+        return f"vid{i:08d}"
+
+    @staticmethod
+    def published(i: int) -> str:
+        return (START + timedelta(hours=i)).isoformat().replace("+00:00", "Z")
+
+    def handler(self, path: str, query: dict, headers) -> tuple:
+        if path == "/channels":
+            return 200, {}, {"items": [{"contentDetails": {"relatedPlaylists": {"uploads": PLAYLIST}}}]}
+        if path == "/playlistItems":
+            offset = int(query.get("pageToken", 0))
+            newest_first = list(range(self.uploads - 1, -1, -1))
+            page = newest_first[offset:offset + PAGE_SIZE]
+            body = {"items": [
+                {
+                    "snippet": {"title": f"Short {i}", "channelTitle": "Fixture", "publishedAt": self.published(i)},
+                    "contentDetails": {"videoId": self.video_id(i), "videoPublishedAt": self.published(i)},
+                }
+                for i in page
+            ]}
+            if offset + PAGE_SIZE < len(newest_first):
+                body["nextPageToken"] = str(offset + PAGE_SIZE)
+            return 200, {}, body
+        if path == "/videos":
+            return 200, {}, {"items": [
+                {
+                    "id": video_id,
+                    "snippet": {"publishedAt": self.published(int(video_id[3:]))},
+                    "statistics": {"viewCount": "1"},
+                    "contentDetails": {"duration": "PT30S"},
+                }
+                for video_id in query["id"].split(",")
+            ]}
+        return 404, {}, {"error": "not found"}
+
+
+@pytest.fixture
+def extractor_for(fixture_server, tmp_path, monkeypatch):
+    def build(channel: FakeChannel) -> YouTubeShortsExtractor:
+        server = fixture_server(channel.handler)
+        monkeypatch.setattr(youtube_client, "YOUTUBE_API_BASE", server.url)
+        client = YouTubeDataClient(api_key="test", cache_dir=tmp_path / "youtube", quota_reserve=0)
+        return YouTubeShortsExtractor(api_key="test", client=client)
+    return build
+
+
+def ids(result) -> list[int]:
+    return sorted(int(v.video_id[3:]) for v in result.videos)
+
+
+async def test_watermark_advances_across_runs(extractor_for):
+    channel = FakeChannel(uploads=120)
+    extractor = extractor_for(channel)
+
+    # First run starts from the newest uploads and stores a watermark
+    first = await extractor.get_channel_shorts(CHANNEL, count=30, incremental=True)
+    assert ids(first) == list(range(90, 120))
+    assert extractor._load_watermarks()[CHANNEL]["last_published_at"].startswith(FakeChannel.published(119)[:19])
+
+    # 70 new uploads: worked off oldest first, 30 per run
+    channel.uploads = 190
+    second = await extractor.get_channel_shorts(CHANNEL, count=30, incremental=True)
+    assert ids(second) == list(range(120, 150))
+    third = await extractor.get_channel_shorts(CHANNEL, count=30, incremental=True)
+    assert ids(third) == list(range(150, 180))
+    fourth = await extractor.get_channel_shorts(CHANNEL, count=30, incremental=True)
+    assert ids(fourth) == list(range(180, 190))
+
+    fifth = await extractor.get_channel_shorts(CHANNEL, count=30, incremental=True)
+    assert fifth.success and fifth.videos == []
+
+
+async def test_watermark_kept_when_max_pages_stops_short(extractor_for):
+    channel = FakeChannel(uploads=10)
+    extractor = extractor_for(channel)
+    await extractor.get_channel_shorts(CHANNEL, count=30, incremental=True)
+    watermark = extractor._load_watermarks()[CHANNEL]["last_published_at"]
+
+    # 200 new uploads but only two pages allowed: the gap must not be skipped
+    channel.uploads = 210
+    result = await extractor.get_channel_shorts(CHANNEL, count=30, incremental=True, max_pages=2)
+    assert len(result.videos) == 30
+    assert extractor._load_watermarks()[CHANNEL]["last_published_at"] == watermark
+
+
+async def test_non_incremental_does_not_touch_watermark(extractor_for):
+    extractor = extractor_for(FakeChannel(uploads=120))
+
+    result = await extractor.get_channel_shorts(CHANNEL, count=30)
+
+    assert ids(result) == list(range(90, 120))
+    assert extractor._load_watermarks() == {}